@@ -0,0 +1,4 @@
+# Filter-MSMARCO
+# @File:   __init__.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
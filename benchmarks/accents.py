@@ -0,0 +1,78 @@
+# Filter-MSMARCO
+# @File:   accents.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Compares the accent folding of src.utils.accents with the str.replace loop sanitize
+used to do, on the texts of the generated skill: the intent examples, the entity
+values and the titles and answers of the dialog nodes.
+
+    python -m benchmarks.accents
+"""
+
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+from src.io.file_operations import load_skill
+from src.utils.accents import (
+    FOLD_TABLE,
+    fold_accents,
+    fold_accents_cached,
+    fold_accents_series,
+)
+
+RESULTS = Path(__file__).parent / "../results"
+
+
+def legacy_sanitize(palavra: str) -> str:
+    substituicoes = {
+        "a": ["á", "â", "ã", "à"],
+        "c": ["ç"],
+        "e": ["é", "ê"],
+        "i": ["í"],
+        "o": ["ó", "ô", "õ"],
+        "u": ["ú", "ü"],
+    }
+    for substituta, letras in substituicoes.items():
+        for letra in letras:
+            palavra = palavra.replace(letra, substituta)
+    return palavra
+
+
+def get_texts(skill: dict) -> list:
+    texts = [e["text"] for intent in skill["intents"] for e in intent["examples"]]
+    for entity in skill["entities"]:
+        for value in entity["values"]:
+            texts += [value["value"], *value.get("synonyms", [])]
+    for node in skill["dialog_nodes"]:
+        texts += [node.get("title") or "", node.get("conditions") or ""]
+    return texts
+
+
+def main(number: int = 20):
+    skill = load_skill((RESULTS / "skill-Amazônia-Azul2.json").resolve().as_posix())
+    texts = get_texts(skill)
+    # the old loop only folded lowercase letters
+    lowercase = [t.lower() for t in texts]
+    assert [legacy_sanitize(t) for t in lowercase] == [fold_accents(t) for t in lowercase]
+    assert [fold_accents(t) for t in texts] == [t.translate(FOLD_TABLE) for t in texts]
+    series = pd.Series(texts)
+    assert fold_accents_series(series).to_list() == [fold_accents(t) for t in texts]
+    timings = {
+        "str.replace loop": lambda: [legacy_sanitize(t) for t in texts],
+        "str.translate": lambda: [t.translate(FOLD_TABLE) for t in texts],
+        "fold_accents": lambda: [fold_accents(t) for t in texts],
+        "fold_accents_cached": lambda: [fold_accents_cached(t) for t in texts],
+        "fold_accents_series": lambda: fold_accents_series(series),
+    }
+    print(f"{len(texts)} texts")
+    for name, function in timings.items():
+        seconds = timeit.timeit(function, number=number) / number
+        print(f"{name}: {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# Filter-MSMARCO
+# @File:   classifier.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Times the IntentClassifier on the intents of the generated skill: how long it takes
+to train and how many texts per second it classifies, one by one and in batches.
+
+    python -m benchmarks.classifier
+"""
+
+import time
+from pathlib import Path
+
+from src.intents.classifier import IntentClassifier, get_labeled_examples
+from src.io.file_operations import load_skill
+
+RESULTS = Path(__file__).parent / "../results"
+
+
+def main(repeat: int = 5):
+    skill = load_skill((RESULTS / "skill-Amazônia-Azul2.json").resolve().as_posix())
+    start = time.perf_counter()
+    classifier = IntentClassifier().fit(skill["intents"])
+    print(f"Trained in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    texts, _ = get_labeled_examples(skill["intents"])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classifier.predict([text])
+    seconds = time.perf_counter() - start
+    print(f"{len(texts) * repeat / seconds:.0f} texts per second, one by one")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        classifier.predict(texts)
+    seconds = time.perf_counter() - start
+    print(f"{len(texts) * repeat / seconds:.0f} texts per second, in a batch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# Filter-MSMARCO
+# @File:   entities.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Times the FuzzyEntityMatcher on the entities of the generated skill: how long it
+takes to index them and to extract the values of each intent example.
+
+    python -m benchmarks.entities
+"""
+
+import time
+from pathlib import Path
+
+from src.entities.fuzzy_match import FuzzyEntityMatcher
+from src.io.file_operations import load_skill
+
+RESULTS = Path(__file__).parent / "../results"
+
+
+def main(repeat: int = 5):
+    skill = load_skill((RESULTS / "skill-Amazônia-Azul2.json").resolve().as_posix())
+    start = time.perf_counter()
+    matcher = FuzzyEntityMatcher(skill["entities"])
+    print(f"Indexed in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    texts = [e["text"] for intent in skill["intents"] for e in intent["examples"]]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            matcher(text)
+    seconds = time.perf_counter() - start
+    print(f"{seconds * 1000 / (len(texts) * repeat):.3f} ms per text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Filter-MSMARCO
+# @File:   export.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Compares convert_to_list, which exports the organized nodes as they are in the
+dataframe, with the version which parsed every context and next_step written as a
+string by the organizer and removed nans record by record. Runs on the shipped skill
+and on synthetic questions of the given sizes; checks that both give the same nodes
+and times them.
+
+    python -m benchmarks.export [sizes...]
+"""
+
+import ast
+import contextlib
+import io
+import json
+import sys
+import timeit
+from typing import List
+
+import pandas as pd
+
+from benchmarks.organizers import get_mixed_nodes
+from benchmarks.synthetic import make_base_skill, make_questions
+from src import generate_skill
+from src.dialog_nodes.NodeOrganizer import NodeOrganizer
+from src.dialog_nodes.dialog_node_operations import convert_to_list
+from src.utils.list_dict_operations import remove_nans
+
+
+def legacy_convert_to_list(df: pd.DataFrame) -> List[dict]:
+    list_of_dicts = df.to_dict(orient="records")
+    list_of_dicts = [remove_nans(d) for d in list_of_dicts]
+    list_of_dicts = [legacy_eval_column(d, "context") for d in list_of_dicts]
+    list_of_dicts = [legacy_eval_column(d, "next_step") for d in list_of_dicts]
+    return list_of_dicts
+
+
+def legacy_eval_column(d: dict, col: str):
+    if col not in d:
+        return d
+    value = d[col]
+    if isinstance(value, str):
+        evaluated = ast.literal_eval(value)
+        d[col] = evaluated
+    return d
+
+
+def get_legacy_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the nodes with the cells the organizer wrote as strings before."""
+    df = df.copy()
+    manual = df.dialog_node.str.match(r"node_._")
+    for text in ("welcome", "ajuda"):
+        rows = manual & df.conditions.str.contains(text).fillna(False)
+        df.loc[rows, "context"] = df.loc[rows, "context"].map(str)
+    answers_id = df.loc[df.title == "Respostas", "dialog_node"].values[0]
+    rows = (df.parent == answers_id) & (df.conditions == "anything_else")
+    df.loc[rows, "next_step"] = df.loc[rows, "next_step"].map(json.dumps)
+    return df
+
+
+def get_organized_df(nodes: list) -> pd.DataFrame:
+    with contextlib.redirect_stdout(io.StringIO()):
+        organizer = NodeOrganizer(nodes)
+        organizer.run()
+    return organizer.df
+
+
+def get_cases(sizes: List[int]) -> dict:
+    """Returns the organized nodes to export, by name."""
+    cases = {"shipped": get_organized_df(get_mixed_nodes())}
+    for size in sizes:
+        questions = make_questions(size)
+        with contextlib.redirect_stdout(io.StringIO()):
+            nodes = generate_skill.get_mixed_nodes(
+                questions, make_base_skill(questions), 0.8
+            )
+        cases[f"{size} questions"] = get_organized_df(nodes)
+    return cases
+
+
+def main(sizes: List[int], number: int = 3):
+    for name, df in get_cases(sizes).items():
+        legacy_df = get_legacy_df(df)
+        times = {}
+        for implementation, function, argument in (
+            ("legacy", legacy_convert_to_list, legacy_df),
+            ("current", convert_to_list, df),
+        ):
+            seconds = timeit.timeit(lambda: function(argument), number=number)
+            times[implementation] = seconds / number * 1000
+        identical = legacy_convert_to_list(legacy_df) == convert_to_list(df)
+        print(
+            f"{name} ({len(df)} nodes): legacy {times['legacy']:.1f} ms, current "
+            f"{times['current']:.1f} ms, identical output: {identical}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10000, 100000])
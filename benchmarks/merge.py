@@ -0,0 +1,141 @@
+# Filter-MSMARCO
+# @File:   merge.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Compares mix_list/mix_dict with the versions which deep-copied their inputs, on the
+merges generate_skill does and on a merge of the two shipped skills. Checks that
+both give the same output, key order included, and times them.
+
+    python -m benchmarks.merge
+"""
+
+import contextlib
+import io
+import json
+import re
+import timeit
+from copy import deepcopy
+from pathlib import Path
+
+from src.dialog_nodes.dialog_node_operations import get_dialog_nodes
+from src.entities.entity_operations import get_entities
+from src.intents.intent_operations import get_intents
+from src.io.file_operations import load_questions, load_skill
+from src.utils import list_dict_operations
+from src.utils.list_dict_operations import is_flat, is_flat_list, drop_duplicates
+
+RESULTS = Path(__file__).parent / "../results"
+
+
+def legacy_mix_list(a: list, b: list, priority: dict = None) -> list:
+    if priority is None:
+        priority = {}
+    if is_flat_list(a) and is_flat_list(b):
+        return drop_duplicates(a + b)
+    elif is_flat_list(a) or is_flat_list(b):
+        raise ValueError(a, b)
+
+    a_keys = legacy_get_possible_global_keys(a)
+    b_keys = legacy_get_possible_global_keys(b)
+    common_keys = [v for v in a_keys + b_keys if v in a_keys and v in b_keys]
+    if len(common_keys) > 0:
+        common_keys.sort(key=lambda x: priority.get(x, 999))
+        global_key = common_keys[0]
+    else:
+        raise ValueError(a_keys, b_keys)
+
+    a_dict = {subdict[global_key]: subdict for subdict in a}
+    b_dict = {subdict[global_key]: subdict for subdict in b}
+    return list(legacy_mix_dict(a_dict, b_dict).values())
+
+
+def legacy_get_possible_global_keys(ls: list) -> list:
+    global_keys = []
+    for key in ls[0]:
+        if not all(key in d_ for d_ in ls):
+            continue
+        if not all(is_flat(d_[key]) for d_ in ls):
+            continue
+        if not all(bool(d_[key]) for d_ in ls):
+            continue
+        if not len(set(d_[key] for d_ in ls)) == len(ls):
+            continue
+        global_keys.append(key)
+    return global_keys
+
+
+def legacy_mix_dict(a: dict, b: dict) -> dict:
+    out = deepcopy(b)
+    for k, v in a.items():
+        if k not in out:
+            out[k] = v
+        elif isinstance(v, list):
+            out[k] = legacy_mix_list(v, b[k])
+        elif isinstance(v, dict):
+            out[k] = legacy_mix_dict(v, b[k])
+        else:
+            out[k] = v
+    return out
+
+
+def get_merges() -> dict:
+    """Returns the arguments of each merge, by name."""
+    questions = load_questions((RESULTS / "Perguntas.xlsx").resolve().as_posix())
+    old_skill = load_skill((RESULTS / "skill-Amazônia-Azul.json").resolve().as_posix())
+    new_skill = load_skill((RESULTS / "skill-Amazônia-Azul2.json").resolve().as_posix())
+    with contextlib.redirect_stdout(io.StringIO()):
+        new_intents = get_intents(questions)
+        new_entities = get_entities(questions)
+        new_nodes = get_dialog_nodes(questions, 0.8)
+    old_nodes = [
+        n for n in old_skill["dialog_nodes"] if re.search(r"node_._", n["dialog_node"])
+    ]
+    return {
+        "intents": ("list", old_skill["intents"], new_intents, None),
+        "entities": (
+            "list",
+            old_skill["entities"],
+            new_entities,
+            {"conditions": 1, "title": 0},
+        ),
+        "dialog_nodes": ("list", old_nodes, new_nodes, None),
+        "skills": ("dict", old_skill, new_skill, None),
+    }
+
+
+def merge(implementation: str, kind: str, a, b, priority: dict):
+    if implementation == "legacy":
+        if kind == "list":
+            return legacy_mix_list(a, b, priority)
+        return legacy_mix_dict(a, b)
+    if kind == "list":
+        return list_dict_operations.mix_list(a, b, priority)
+    return list_dict_operations.mix_dict(a, b)
+
+
+def dumps(merged) -> str:
+    # generated nodes keep their Node children, which aren't serializable
+    return json.dumps(merged, ensure_ascii=False, default=repr)
+
+
+def main(number: int = 5):
+    for name, (kind, a, b, priority) in get_merges().items():
+        times = {}
+        for implementation in ("legacy", "current"):
+            seconds = timeit.timeit(
+                lambda: merge(implementation, kind, a, b, priority), number=number
+            )
+            times[implementation] = seconds / number * 1000
+        identical = dumps(merge("legacy", kind, a, b, priority)) == dumps(
+            merge("current", kind, a, b, priority)
+        )
+        print(
+            f"{name}: legacy {times['legacy']:.1f} ms, current "
+            f"{times['current']:.1f} ms, identical output: {identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Filter-MSMARCO
+# @File:   node_memory.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Compares the slotted Node with the dataclass it replaced: the memory taken by a
+generated tree (measured with tracemalloc) and the time to build it and to convert
+it to dicts.
+
+    python -m benchmarks.node_memory
+"""
+
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from src.dialog_nodes.Node import Node
+from src.utils.list_dict_operations import drop_empty
+
+
+@dataclass
+class LegacyNode:
+    type: str = "standard"
+    title: str = None
+    conditions: str = None
+    context: Dict = None
+    output: Dict = None
+    dialog_node: str = None
+    parent: str = None
+    previous_sibling: str = None
+    next_step: Dict[str, str] = None
+    fonte: str = None
+    intent: str = None
+    modificador: str = None
+    substantivo: str = None
+    recipiente: str = None
+    rotulos: str = None
+    children: List["LegacyNode"] = field(default_factory=list, init=False)
+
+    def add_child(self, node: "LegacyNode"):
+        node.parent = self.dialog_node
+        self.children.append(node)
+
+    def to_dict(self) -> dict:
+        return drop_empty(self.__dict__)
+
+
+def build(node_class: type, size: int) -> list:
+    """Builds a folder with size answer nodes, each with a source node as a child."""
+    folder = node_class(type="folder", title="Respostas", dialog_node="folder")
+    nodes = [folder]
+    for i in range(size):
+        answer = node_class(
+            title=f"Pergunta {i}?",
+            conditions=f"#intent-{i} && intent.confidence > 0.8",
+            context={"other_counter": 0},
+            output={"generic": [{"values": [{"text": f"Resposta {i}"}]}]},
+            dialog_node=f"node_answer_{i}",
+            fonte="https://example.org",
+            intent=f"intent-{i}",
+            modificador="detalhar",
+            substantivo=f"substantivo {i % 50}",
+            recipiente=f"recipiente {i % 20}",
+            rotulos="amazônia azul",
+        )
+        answer.add_child(node_class(title="Fonte", dialog_node=f"node_source_{i}"))
+        folder.add_child(answer)
+        nodes += [answer, *answer.children]
+    return nodes
+
+
+def measure(node_class: type, size: int) -> str:
+    start = time.perf_counter()
+    nodes = build(node_class, size)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    for node in nodes:
+        node.to_dict()
+    converted = time.perf_counter() - start
+    del nodes
+
+    tracemalloc.start()
+    nodes = build(node_class, size)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (
+        f"{memory / 2 ** 20:.1f} MiB, built in {built * 1000:.0f} ms, "
+        f"to_dict in {converted * 1000:.0f} ms"
+    )
+
+
+def main(sizes=(1000, 10000, 50000)):
+    for size in sizes:
+        print(f"{size * 2 + 1} nodes")
+        for node_class in (LegacyNode, Node):
+            print(f"\t{node_class.__name__}: {measure(node_class, size)}")
+
+
+if __name__ == "__main__":
+    main()
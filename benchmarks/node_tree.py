@@ -0,0 +1,79 @@
+# Filter-MSMARCO
+# @File:   node_tree.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Compares Node.to_list with the version which sorted the whole subtree four times at
+every level, on random trees with many ties between siblings. Checks that both give
+the same nodes in the same order and times them.
+
+    python -m benchmarks.node_tree
+"""
+
+import random
+import timeit
+from typing import List
+
+from src.dialog_nodes.Node import Node
+from src.utils.accents import fold_accents_cached as sanitize
+
+VALUES = ["", "área", "area", "baleia", "ção", "cao", "zona", "Ázul"]
+
+
+def legacy_sort(node: Node, key):
+    node.children.sort(key=key)
+    for child in node.children:
+        legacy_sort(child, key)
+
+
+def legacy_to_list(node: Node) -> List[dict]:
+    if len(node.children) > 1:
+        legacy_sort(node, lambda x: sanitize(x.recipiente or "zzzzz"))
+        legacy_sort(node, lambda x: sanitize(x.substantivo or "zzzzz"))
+        legacy_sort(node, lambda x: sanitize(x.modificador or "zzzzz"))
+        legacy_sort(node, lambda x: sanitize(x.rotulos or ""))
+        node.apply_previous_siblings()
+
+    out = [node.to_dict()]
+    for child in node.children:
+        out += legacy_to_list(child)
+    return out
+
+
+def get_tree(size: int, seed: int = 0) -> Node:
+    """Returns a random tree of size nodes, attaching each node to an earlier one."""
+    rng = random.Random(seed)
+    nodes = [Node(dialog_node="node_0")]
+    for i in range(1, size):
+        node = Node(
+            dialog_node=f"node_{i}",
+            **{
+                field: rng.choice(VALUES)
+                for field in ("rotulos", "modificador", "substantivo", "recipiente")
+            },
+        )
+        parent = nodes[int(rng.random() ** 3 * i)]
+        parent.add_child(node)
+        nodes.append(node)
+    return nodes[0]
+
+
+def get_order(dicts: List[dict]) -> List[tuple]:
+    return [(d["dialog_node"], d.get("previous_sibling")) for d in dicts]
+
+
+def main(sizes=(1000, 10000), number: int = 3):
+    for size in sizes:
+        same = get_order(legacy_to_list(get_tree(size))) == get_order(
+            get_tree(size).to_list()
+        )
+        print(f"{size} nodes, same order: {same}")
+        for name, to_list in (("legacy", legacy_to_list), ("to_list", Node.to_list)):
+            trees = [get_tree(size) for _ in range(number)]
+            seconds = timeit.timeit(lambda: to_list(trees.pop()), number=number)
+            print(f"\t{name}: {seconds / number * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
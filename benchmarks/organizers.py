@@ -0,0 +1,58 @@
+# Filter-MSMARCO
+# @File:   organizers.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Compares the NodeOrganizer and the GraphOrganizer on the shipped skill: checks that
+both give byte-identical output and times them.
+
+    python -m benchmarks.organizers
+"""
+
+import contextlib
+import io
+import json
+import timeit
+from copy import deepcopy
+from pathlib import Path
+
+from src.dialog_nodes.GraphOrganizer import GraphOrganizer
+from src.dialog_nodes.NodeOrganizer import NodeOrganizer
+from src import generate_skill
+from src.io.file_operations import load_questions, load_skill
+
+RESULTS = Path(__file__).parent / "../results"
+
+
+def get_mixed_nodes(confidence: float = 0.8) -> list:
+    """Returns the nodes which generate_skill.main gives to the organizer."""
+    questions = load_questions((RESULTS / "Perguntas.xlsx").resolve().as_posix())
+    old_skill = load_skill((RESULTS / "skill-Amazônia-Azul.json").resolve().as_posix())
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_skill.get_mixed_nodes(questions, old_skill, confidence)
+
+
+def organize(organizer: type, nodes: list, limit: int) -> str:
+    with contextlib.redirect_stdout(io.StringIO()):
+        node_organizer = organizer(deepcopy(nodes))
+        node_organizer.run(intent_limit=limit)
+        return json.dumps(node_organizer.to_list(), ensure_ascii=False, indent=2)
+
+
+def main(limit: int = 2000, number: int = 5):
+    nodes = get_mixed_nodes()
+    outputs = {}
+    for organizer in (NodeOrganizer, GraphOrganizer):
+        outputs[organizer] = organize(organizer, nodes, limit)
+        seconds = timeit.timeit(
+            lambda: organize(organizer, nodes, limit), number=number
+        )
+        print(f"{organizer.__name__}: {seconds / number * 1000:.1f} ms per run")
+
+    identical = outputs[NodeOrganizer] == outputs[GraphOrganizer]
+    print(f"{len(nodes)} nodes, identical output: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Filter-MSMARCO
+# @File:   runtime.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Times the local DialogRuntime on the generated skill: how long it takes to load it
+and how many turns per second it runs, sending every intent example as a new
+conversation.
+
+    python -m benchmarks.runtime
+"""
+
+import time
+from pathlib import Path
+
+from src.io.file_operations import load_skill
+from src.runtime.DialogRuntime import DialogRuntime
+
+RESULTS = Path(__file__).parent / "../results"
+
+
+def main(repeat: int = 5):
+    skill = load_skill((RESULTS / "skill-Amazônia-Azul2.json").resolve().as_posix())
+    start = time.perf_counter()
+    runtime = DialogRuntime(skill)
+    print(f"Loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    texts = [e["text"] for intent in skill["intents"] for e in intent["examples"]]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            runtime.reset()
+            runtime.message(text)
+    seconds = time.perf_counter() - start
+    print(f"{len(texts) * repeat / seconds:.0f} turns per second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# Filter-MSMARCO
+# @File:   scaling.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Times the main stages of the pipeline on synthetic questions of growing size: nodes
+generation, mixing, organizing, exporting, unit tests and saving. Each size is run
+once for the times, the best of a few runs for the small ones, and once more under
+tracemalloc for the peak memory, unless --no-memory is given. How each stage scales
+is the exponent of its time between consecutive sizes: 1 is linear, 2 quadratic.
+
+The results are saved as benchmarks/results/<commit>.json, to compare with the ones
+of another commit:
+
+    python -m benchmarks.scaling [--no-memory] [sizes...]
+    python -m benchmarks.scaling compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import contextlib
+import io
+import json
+import math
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+from copy import deepcopy
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from benchmarks.synthetic import make_base_skill, make_questions
+from src.dialog_nodes.NodeOrganizer import NodeOrganizer
+from src.dialog_nodes.dialog_node_operations import get_dialog_nodes
+from src.intents.intent_operations import get_intents
+from src.io.file_operations import save_skill
+from src.skills.skill_operations import mix_skills
+from src.utils.list_dict_operations import mix_list
+from src.utils.tracing import StageTracer, stage, tracing
+from tests import unit
+
+RESULTS = Path(__file__).parent / "results"
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# the organizer drops the nodes of the intents over this share of the generated ones
+INTENT_LIMIT_SHARE = 0.9
+
+
+def run_pipeline(questions: pd.DataFrame, base_skill: dict, directory: Path):
+    """Runs the stages as generate_skill does, each inside a stage of the tracer."""
+    new_intents = get_intents(questions)
+    with stage("get_dialog_nodes") as counts:
+        new_nodes = get_dialog_nodes(questions, 0.8)
+        counts["dialog_nodes"] = len(new_nodes)
+    old_nodes = [
+        n for n in base_skill["dialog_nodes"] if re.search(r"node_._", n["dialog_node"])
+    ]
+    with stage("mix_list") as counts:
+        nodes = mix_list(old_nodes, new_nodes)
+        intents = mix_list(base_skill["intents"], new_intents)
+        counts["dialog_nodes"] = len(nodes)
+        counts["intents"] = len(intents)
+    with stage("NodeOrganizer.run") as counts:
+        organizer = NodeOrganizer(nodes)
+        organizer.run(intent_limit=int(len(new_intents) * INTENT_LIMIT_SHARE))
+        counts["dialog_nodes"] = len(organizer)
+    with stage("NodeOrganizer.to_list") as counts:
+        organized_nodes = organizer.to_list()
+        counts["dialog_nodes"] = len(organized_nodes)
+    with stage("tests.unit.run") as counts:
+        counts["failures"] = len(unit.run(pd.DataFrame(organized_nodes)))
+    skill = mix_skills(base_skill, intents=intents, dialog_nodes=organized_nodes)
+    with stage("save_skill") as counts:
+        save_skill(directory / "skill.json", skill)
+        counts["bytes"] = (directory / "skill2.json").stat().st_size
+
+
+def measure(
+    questions: pd.DataFrame, base_skill: dict, memory: bool = False
+) -> Dict[str, dict]:
+    """Returns the record of every stage of a run."""
+    tracer = StageTracer(memory=memory)
+    with tempfile.TemporaryDirectory() as directory:
+        with contextlib.redirect_stdout(io.StringIO()), tracing(tracer):
+            run_pipeline(questions, deepcopy(base_skill), Path(directory))
+    return {record.pop("stage"): record for record in tracer.stages}
+
+
+def benchmark(sizes: List[int], memory: bool = True) -> Dict[str, Dict[str, dict]]:
+    """
+    Returns the measures of every stage, by stage and size. The substeps of the
+    organizer are measured too, as NodeOrganizer.run/<substep>.
+    """
+    results = {}
+    for size in sizes:
+        questions = make_questions(size)
+        base_skill = make_base_skill(questions)
+        repeats = max(1, min(3, 10000 // size))
+        runs = [measure(questions, base_skill) for _ in range(repeats)]
+        peaks = measure(questions, base_skill, memory=True) if memory else {}
+        for name in runs[0]:
+            best = min((r[name] for r in runs), key=lambda record: record["seconds"])
+            if name in peaks:
+                best["start_memory"] = peaks[name]["start_memory"]
+                best["peak_memory"] = peaks[name]["peak_memory"]
+            results.setdefault(name, {})[str(size)] = best
+        print(f"{size} questions measured", file=sys.stderr)
+    return results
+
+
+def get_exponents(stages: Dict[str, Dict[str, dict]]) -> Dict[str, List[float]]:
+    """Returns the exponent of each stage's time between consecutive sizes."""
+    exponents = {}
+    for name, by_size in stages.items():
+        sizes = sorted(by_size, key=int)
+        exponents[name] = [
+            round(
+                math.log(by_size[b]["seconds"] / by_size[a]["seconds"])
+                / math.log(int(b) / int(a)),
+                2,
+            )
+            for a, b in zip(sizes, sizes[1:])
+            if by_size[a]["seconds"] > 0 and by_size[b]["seconds"] > 0
+        ]
+    return exponents
+
+
+def get_commit() -> dict:
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+
+    try:
+        return {
+            "commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        }
+    except OSError:
+        return {"commit": "unknown", "dirty": True}
+
+
+def print_table(results: dict):
+    sizes = results["sizes"]
+    width = max(map(len, results["stages"])) + 2
+    print(f"{'stage':<{width}}" + "".join(f"{size:>12}" for size in sizes) + "   exponents")
+    for name, by_size in results["stages"].items():
+        seconds = "".join(f"{by_size[str(s)]['seconds']:>11.3f}s" for s in sizes)
+        exponents = ", ".join(map(str, results["exponents"][name]))
+        print(f"{name:<{width}}{seconds}   {exponents}")
+        if all("peak_memory" in by_size[str(s)] for s in sizes):
+            peaks = "".join(
+                f"{by_size[str(s)]['peak_memory'] / 2 ** 20:>10.1f}MB" for s in sizes
+            )
+            print(f"{'  peak memory':<{width}}{peaks}")
+
+
+def compare(old: dict, new: dict):
+    """Prints the ratio of the new times and peaks to the old ones."""
+    print(f"{old['commit']} -> {new['commit']}")
+    for name, by_size in new["stages"].items():
+        for size, record in by_size.items():
+            before = old["stages"].get(name, {}).get(size)
+            if not before:
+                continue
+            ratios = [f"time x{record['seconds'] / max(before['seconds'], 1e-9):.2f}"]
+            if "peak_memory" in record and "peak_memory" in before:
+                memory = record["peak_memory"] / before["peak_memory"]
+                ratios.append(f"memory x{memory:.2f}")
+            print(f"{name} ({size}): {', '.join(ratios)}")
+
+
+def main(sizes: List[int], memory: bool = True) -> dict:
+    stages = benchmark(sizes, memory)
+    results = {
+        **get_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "sizes": sizes,
+        "stages": stages,
+        "exponents": get_exponents(stages),
+    }
+    RESULTS.mkdir(exist_ok=True)
+    filepath = RESULTS / f"{results['commit']}{'-dirty' if results['dirty'] else ''}.json"
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print_table(results)
+    print(f"Results saved as {filepath.as_posix()}")
+    return results
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["compare"]:
+        with open(sys.argv[2], encoding="utf-8") as old_file:
+            with open(sys.argv[3], encoding="utf-8") as new_file:
+                compare(json.load(old_file), json.load(new_file))
+    else:
+        arguments = [a for a in sys.argv[1:] if a != "--no-memory"]
+        main([int(a) for a in arguments] or DEFAULT_SIZES, "--no-memory" not in sys.argv)
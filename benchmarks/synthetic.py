@@ -0,0 +1,199 @@
+# Filter-MSMARCO
+# @File:   synthetic.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Synthetic inputs of any size, to see how the pipeline scales beyond the ~370
+questions of Perguntas.xlsx. Questions have the columns load_questions gives, with
+rótulos, modificadores, substantivos and recipientes like the real ones, titles made
+by get_title as questions and a few examples each. Base skills keep the manual
+dialog of the shipped skill, which the organizer needs, and get the intents and
+entities of an earlier build of the same questions, so that mixing them has work to do.
+
+    python -m benchmarks.synthetic 1000 questions.csv
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from src.dialog_nodes.get_title import NON_CONTEXTUAL_TAGS, get_contexts, get_title
+from src.entities.entity_operations import get_entities
+from src.intents.intent_operations import get_intents
+from src.io.file_operations import QUESTION_COLUMNS, load_skill
+
+RESULTS = Path(__file__).parent / "../results"
+
+TOPICS = [
+    "amazônia-azul", "animais-marinhos", "baleias", "corais", "energia-de-maré",
+    "engenharia-de-petróleo", "gás", "litoral", "maré", "oceano", "oceanografia",
+    "pesca", "petróleo", "poluição", "tartarugas",
+]
+
+NOUNS = [
+    "albatroz", "alga", "animal", "ave", "bacia", "baleia", "camarão", "canal",
+    "cientista", "clima", "combustível", "coral", "corrente", "costa", "crustáceo",
+    "espécie", "esgoto", "estuário", "foca", "fonte", "fóssil", "golfinho", "ilha",
+    "impacto", "iniciativa", "lagosta", "lei", "lixo", "manguezal", "mapa", "mineral",
+    "molusco", "navio", "nutriente", "onda", "ostra", "peixe", "pescador", "pesquisa",
+    "pinguim", "plataforma", "plástico", "polvo", "porto", "poço", "praia", "projeto",
+    "rede", "recife", "rocha", "sedimento", "satélite", "temperatura", "tipo",
+    "tubarão", "turbina", "uso", "usina", "vento",
+]
+
+RECIPIENTS = [
+    "amazônia-azul", "atlântico", "brasil", "costa", "governo", "litoral", "mundo",
+    "oceano", "pré-sal", "recife", "região-sul", "região-nordeste", "branqueamento",
+    "extinção", "poluição",
+]
+
+# how often each modificador is used in Perguntas.xlsx
+MODIFICADORES = {
+    "definição": 123, "detalhar": 66, "listar": 51, "efeito": 29, "explicar": 19,
+    "onde": 16, "maior": 13, "causa": 10, "quantidade": 10, "é": 7, "maiores": 6,
+    "porque": 6, "responsável": 5, "diferença": 4, "existe": 4, "composição": 2,
+    "menor": 2, "menores": 1,
+}
+
+# about a third of the real questions have only non-contextual rótulos
+NON_CONTEXTUAL_SHARE = 0.35
+
+# the real questions have about 15 questions per rótulo
+QUESTIONS_PER_TOPIC = 15
+
+EXAMPLE_FORMS = [
+    "me fala sobre {substantivo} de {topico}",
+    "queria saber sobre {topico}",
+    "{pergunta}",
+    "você sabe {pergunta}",
+    "{substantivo} {recipiente}",
+]
+
+WORDS = (
+    "o a os as de da do em no na que é são um uma para com por mais muito água mar "
+    "oceano costa espécies pesquisa brasil região recursos energia vida marinha"
+).split()
+
+
+def get_topics(number: int, rng: random.Random) -> List[str]:
+    """Returns number rótulos, the real ones first, then combinations of them."""
+    pairs = [f"{topic}-{noun}" for topic in TOPICS for noun in NOUNS]
+    rng.shuffle(pairs)
+    topics = TOPICS + pairs
+    while len(topics) < number:
+        topics += [f"{pair}-{rng.choice(NOUNS)}" for pair in pairs]
+        topics = list(dict.fromkeys(topics))
+    return topics[:number]
+
+
+def make_question(
+    topics: List[str], rng: random.Random, attempts: int = 20
+) -> Optional[dict]:
+    """Returns a question whose title can be made, or None if none was found."""
+    modificadores, weights = zip(*MODIFICADORES.items())
+    for _ in range(attempts):
+        if rng.random() < NON_CONTEXTUAL_SHARE:
+            rotulos = rng.choice(sorted(NON_CONTEXTUAL_TAGS))
+        else:
+            rotulos = rng.choice(topics)
+        modificador = rng.choices(modificadores, weights)[0]
+        substantivo = rng.choice(NOUNS) if rng.random() < 0.8 else ""
+        recipiente = rng.choice(RECIPIENTS) if rng.random() < 0.35 else ""
+        record = {
+            "pergunta": "",
+            "modificador": modificador,
+            "substantivo": substantivo,
+            "recipiente": recipiente,
+        }
+        try:
+            title = get_title(record, get_contexts(rotulos.split()))
+        except (ValueError, IndexError):
+            # composição without recipiente nor contexto raises an IndexError
+            continue
+        # diferença without recipiente nor contexto has nothing to compare with
+        if title.endswith(" e?"):
+            continue
+        intent = "-".join(p for p in (modificador, substantivo, recipiente) if p)
+        return {**record, "pergunta": title, "rótulos": rotulos, "intent": intent}
+    return None
+
+
+def make_examples(question: dict, rng: random.Random) -> str:
+    forms = rng.sample(EXAMPLE_FORMS, rng.choice([0, 0, 1, 1, 2, 3]))
+    examples = [
+        form.format(
+            substantivo=question["substantivo"] or question["modificador"],
+            recipiente=question["recipiente"].replace("-", " "),
+            topico=question["rótulos"].replace("-", " "),
+            pergunta=question["pergunta"].lower(),
+        ).strip()
+        for form in forms
+    ]
+    # intents can't have the same example twice
+    examples = dict.fromkeys(e for e in examples if e and e != question["pergunta"])
+    return "--".join(examples)
+
+
+def make_questions(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Returns rows questions with the columns given by load_questions."""
+    rng = random.Random(seed)
+    topics = get_topics(max(len(TOPICS), rows // QUESTIONS_PER_TOPIC), rng)
+    questions, intents = [], set()
+    while len(questions) < rows:
+        question = make_question(topics, rng)
+        if question is None:
+            continue
+        intent = f"{question['rótulos']}--{question['intent']}"
+        if intent in intents:
+            continue
+        intents.add(intent)
+        sentences = rng.randint(2, 6)
+        questions.append(
+            {
+                **question,
+                "intent": intent,
+                "resposta": " ".join(
+                    " ".join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + "."
+                    for _ in range(sentences)
+                ),
+                "fonte": f"https://exemplo.org/{question['rótulos']}/{len(questions)}",
+                "examples": make_examples(question, rng),
+            }
+        )
+    return pd.DataFrame(questions, columns=list(QUESTION_COLUMNS.values()))
+
+
+def make_base_skill(questions: pd.DataFrame, seed: int = 0) -> dict:
+    """
+    Returns the shipped skill with the intents and entities an earlier build of most
+    of the questions would have left, some of them with an extra example.
+    """
+    rng = random.Random(seed)
+    skill = load_skill((RESULTS / "skill-Amazônia-Azul.json").resolve().as_posix())
+    earlier = questions.sample(frac=0.8, random_state=seed)
+    intents = get_intents(earlier)
+    for intent in intents:
+        if rng.random() < 0.1:
+            intent["examples"].append({"text": f"{intent['intent']} antigo"})
+    manual_intents = [i for i in skill["intents"] if "--" not in i["intent"]]
+    entities = {e["entity"]: e for e in skill["entities"]}
+    entities.update({e["entity"]: e for e in get_entities(earlier)})
+    skill["intents"] = manual_intents + intents
+    skill["entities"] = sorted(entities.values(), key=lambda e: e["entity"])
+    return skill
+
+
+if __name__ == "__main__":
+    df = make_questions(int(sys.argv[1]))
+    if len(sys.argv) > 2:
+        # with the headers of the sheet, so that load_questions reads it back
+        headers = {column: header for header, column in QUESTION_COLUMNS.items()}
+        df.rename(columns=headers).to_csv(sys.argv[2], index=False)
+    else:
+        print(df.head(20).to_string())
+        print(json.dumps(df.modificador.value_counts().to_dict(), ensure_ascii=False))
@@ -0,0 +1,230 @@
+# Filter-MSMARCO
+# @File:   build_skills.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Builds several skills at once, from a manifest of jobs like:
+
+    {
+      "jobs": [
+        {
+          "name": "amazonia-azul",
+          "workbook": "Perguntas.xlsx",
+          "base_skill": "skill-Amazônia-Azul.json",
+          "confidence": 0.8,
+          "intent_limit": 2000,
+          "output": "skill-Amazônia-Azul2.json",
+          "compact": false
+        }
+      ]
+    }
+
+Paths are relative to the manifest. Compact skills have no whitespace, for uploading.
+Jobs run in a pool of processes, so building all the skills takes about as long as
+the slowest one, given enough processors. Every process keeps the workbooks and base
+skills it already parsed, for the next jobs using them. The log and timing of each
+job and a summary are printed at the end, and the summary is saved next to the
+manifest, as <manifest>.summary.json. With --json-logs, the logs of the jobs are
+JSON lines.
+
+    python -m src.build_skills builds.json [processes] [--json-logs]
+"""
+
+import io
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from src.dialog_nodes.node_ids import ContentIds
+from src.generate_skill import build_skill
+from src.io.file_operations import load_questions, load_skill, write_skill
+from src.utils.logs import setup_logging
+from src.utils.tracing import StageTracer, tracing
+
+REQUIRED_FIELDS = ["workbook", "base_skill", "output"]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BuildJob:
+    name: str
+    workbook: str
+    base_skill: str
+    output: str
+    confidence: float = 0.8
+    intent_limit: int = 0
+    sheet_name: str = "finais"
+    compact: bool = False
+
+
+def load_jobs(filepath: str) -> List[BuildJob]:
+    """Returns the jobs of a manifest, with paths made relative to it."""
+    path = Path(filepath)
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    jobs, errors = [], []
+    for i, job in enumerate(manifest.get("jobs", [])):
+        name = job.get("name", f"job {i}")
+        missing = [field for field in REQUIRED_FIELDS if field not in job]
+        unknown = [field for field in job if field not in BuildJob.__annotations__]
+        if missing:
+            errors.append(f"{name}: faltam os campos {missing}")
+        if unknown:
+            errors.append(f"{name}: campos desconhecidos {unknown}")
+        if missing or unknown:
+            continue
+        paths = {field: (path.parent / job[field]).as_posix() for field in REQUIRED_FIELDS}
+        jobs.append(BuildJob(**{**job, "name": name, **paths}))
+    if not jobs and not errors:
+        errors.append("o manifesto não tem jobs")
+    outputs = [job.output for job in jobs]
+    repeated = {output for output in outputs if outputs.count(output) > 1}
+    if repeated:
+        errors.append(f"mais de um job salva em {sorted(repeated)}")
+    if errors:
+        raise ValueError(f"Manifesto inválido {filepath}:\n\t- " + "\n\t- ".join(errors))
+    return jobs
+
+
+# inputs parsed by this process, by kind, path and modification time
+_inputs: Dict[Tuple[str, str, int], object] = {}
+
+
+def get_input(kind: str, filepath: str, loader: Callable[[], object]):
+    key = (kind, filepath, os.stat(filepath).st_mtime_ns)
+    if key not in _inputs:
+        _inputs[key] = loader()
+    return _inputs[key]
+
+
+def run_job(job: BuildJob, json_logs: bool = False) -> dict:
+    """Builds and saves the skill of a job, returning its log and timing."""
+    result = {"name": job.name, "output": job.output, "error": None}
+    log = io.StringIO()
+    tracer = StageTracer()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    setup_logging(as_json=json_logs)
+    try:
+        with redirect_stdout(log), tracing(tracer):
+            questions = get_input(
+                f"questions:{job.sheet_name}",
+                job.workbook,
+                lambda: load_questions(job.workbook, job.sheet_name),
+            )
+            base_skill = get_input(
+                "skill", job.base_skill, lambda: load_skill(job.base_skill)
+            )
+            loaded = time.perf_counter()
+
+            skill = build_skill(
+                questions,
+                base_skill,
+                job.confidence,
+                job.intent_limit,
+                node_ids=ContentIds(),
+            )
+            built = time.perf_counter()
+
+            write_skill(Path(job.output), skill, job.compact)
+            logger.info("Skill saved as %s!", job.output)
+        result.update(
+            intents=len(skill["intents"]),
+            entities=len(skill["entities"]),
+            dialog_nodes=len(skill["dialog_nodes"]),
+            load_seconds=round(loaded - start, 3),
+            build_seconds=round(built - loaded, 3),
+            save_seconds=round(time.perf_counter() - built, 3),
+        )
+    except Exception:
+        result["error"] = traceback.format_exc()
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["cpu_seconds"] = round(time.process_time() - cpu_start, 3)
+    result["pid"] = os.getpid()
+    result["log"] = log.getvalue()
+    result["stages"] = tracer.stages
+    return result
+
+
+def run(jobs: List[BuildJob], processes: int = None, json_logs: bool = False) -> dict:
+    """Runs the jobs, in order if there is a single process, and returns a summary."""
+    processes = processes or min(os.cpu_count() or 1, len(jobs)) or 1
+    start = time.perf_counter()
+
+    # snapshots of the workbooks are written once, before the processes read them
+    for workbook, sheet_name in dict.fromkeys((j.workbook, j.sheet_name) for j in jobs):
+        if Path(workbook).suffix not in (".csv", ".json"):
+            load_questions(workbook, sheet_name)
+
+    if processes == 1:
+        results = [run_job(job, json_logs) for job in jobs]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(partial(run_job, json_logs=json_logs), jobs))
+    seconds = time.perf_counter() - start
+
+    job_seconds = sum(result["seconds"] for result in results)
+    return {
+        "jobs": len(jobs),
+        "failed": sum(result["error"] is not None for result in results),
+        "processes": processes,
+        "seconds": round(seconds, 3),
+        "job_seconds": round(job_seconds, 3),
+        "speedup": round(job_seconds / seconds, 2),
+        "results": results,
+    }
+
+
+def print_summary(summary: dict):
+    for result in summary["results"]:
+        print(f"=== {result['name']} ===")
+        print(result["log"], end="")
+        if result["error"]:
+            print(result["error"], end="")
+    print("=== Summary ===")
+    for result in summary["results"]:
+        if result["error"]:
+            print(f"{result['name']}: failed after {result['seconds']} s")
+            continue
+        print(
+            f"{result['name']}: {result['seconds']} s "
+            f"(load {result['load_seconds']} s, build {result['build_seconds']} s, "
+            f"save {result['save_seconds']} s), {result['intents']} intents, "
+            f"{result['dialog_nodes']} nodes"
+        )
+    print(
+        f"{summary['jobs'] - summary['failed']}/{summary['jobs']} skills built in "
+        f"{summary['seconds']} s with {summary['processes']} processes "
+        f"({summary['job_seconds']} s of jobs, {summary['speedup']}x)"
+    )
+
+
+if __name__ == "__main__":
+    arguments = [a for a in sys.argv[1:] if not a.startswith("--")]
+    json_logs = "--json-logs" in sys.argv
+    setup_logging(as_json=json_logs)
+    manifest_path = Path(arguments[0])
+    build_jobs = load_jobs(manifest_path)
+    build_summary = run(
+        build_jobs, int(arguments[1]) if len(arguments) > 1 else None, json_logs
+    )
+    print_summary(build_summary)
+    summary_path = manifest_path.with_suffix(".summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {**build_summary, "manifest": [asdict(job) for job in build_jobs]},
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+    sys.exit(1 if build_summary["failed"] else 0)
@@ -0,0 +1,247 @@
+# Filter-MSMARCO
+# @File:   GraphOrganizer.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+import pandas as pd
+
+from src.dialog_nodes.NodeGraph import GraphNode, NodeGraph
+from src.dialog_nodes.node_index import (
+    DropReport,
+    get_interface_order,
+    get_intents_to_remove,
+    get_node_chains,
+)
+from src.utils.tracing import stage
+
+logger = logging.getLogger(__name__)
+
+
+class GraphOrganizer:
+    """
+    Does the same as the NodeOrganizer, but over a NodeGraph instead of dataframes:
+    every step changes the graph in place and the nodes are only exported at the end,
+    by to_list().
+
+    The nodes are kept in three ordered groups (manual, generated and the root
+    anything_else), which are exported in that order.
+    """
+
+    def __init__(self, nodes: List[dict]):
+        self.graph = NodeGraph(nodes)
+        self.manual: Dict[str, GraphNode] = {}
+        self.generated: Dict[str, GraphNode] = {}
+        self.anything_else: Dict[str, GraphNode] = {}
+        self._separate_nodes()
+
+    def _separate_nodes(self):
+        for node in self.graph:
+            if node.parent is None and node.conditions == "anything_else":
+                group = self.anything_else
+            elif re.match(r"node_._", node.dialog_node):
+                group = self.manual
+            else:
+                group = self.generated
+            group[node.dialog_node] = node
+
+        self.answers_folder = next(
+            node.dialog_node
+            for node in self.generated.values()
+            if node.fields.get("title") == "Respostas"
+        )
+
+    def __iter__(self):
+        for group in (self.manual, self.generated, self.anything_else):
+            yield from group.values()
+
+    def __len__(self) -> int:
+        return len(self.manual) + len(self.generated) + len(self.anything_else)
+
+    @property
+    def answers(self) -> pd.Series:
+        """Same as NodeOrganizer.answers: a mask of the answer nodes in df_generated."""
+        return pd.Series(
+            [node.parent == self.answers_folder for node in self.generated.values()],
+            dtype=bool,
+        )
+
+    @property
+    def df_generated(self) -> pd.DataFrame:
+        """Returns the generated nodes (build-time fields included) as a dataframe."""
+        columns = list(self.graph.columns)
+        return pd.DataFrame(
+            [node.to_dict(columns) for node in self.generated.values()],
+            columns=columns,
+        )
+
+    def get_answers(self) -> List[GraphNode]:
+        return self.graph.get_children(self.answers_folder)
+
+    def to_list(self) -> List[dict]:
+        return self.graph.to_list(self)
+
+    def run(self, intent_limit: int = 0):
+        with stage("sort_nodes"):
+            self.sort_nodes()
+        with stage("limit_intents"):
+            self.limit_intents(intent_limit)
+        with stage("set_contexts_node"):
+            self.set_contexts_node()
+        with stage("set_help_node"):
+            self.set_help_node()
+        with stage("fix_previous_siblings"):
+            self.fix_previous_siblings()
+        with stage("apply_previous_siblings"):
+            self.apply_previous_siblings()
+        with stage("point_to_anything_else_node"):
+            self.point_to_anything_else_node()
+
+    def sort_nodes(self):
+        nodes = list(self.manual.values())
+        order = get_interface_order(
+            [node.dialog_node for node in nodes],
+            [node.parent for node in nodes],
+            [node.previous_sibling for node in nodes],
+            self.graph.nodes,
+        )
+        self.manual = {nodes[i].dialog_node: nodes[i] for i in order}
+        logger.info("Nodes sorted!")
+
+    def set_contexts_node(self):
+        """
+        Adds contexts to the 'welcome' node which are a mapping of generated nodes'
+        titles. This enables the 'help' node, which picks random integers and offers
+        a set of questions to the user.
+        """
+        titles = {
+            str(i): node.fields.get("title")
+            for i, node in enumerate(self.get_answers())
+            if "anything_else" not in node.conditions
+        }
+        welcome_nodes = self._find_manual("welcome")
+        node_context = {**welcome_nodes[0].fields["context"], "titles": titles}
+        for node in welcome_nodes:
+            self.graph.set_field(node, "context", node_context)
+        logger.info("Contexts set!")
+
+    def set_help_node(self, number_of_hints: int = 3):
+        intents_per_hint = len(self.get_answers()) // number_of_hints
+        node_context = {
+            f"dica{i}": f"<? new Random().nextInt({intents_per_hint}) +{i * intents_per_hint} ?>"
+            for i in range(number_of_hints)
+        }
+        for node in self._find_manual("ajuda"):
+            self.graph.set_field(node, "context", node_context)
+        logger.info("Help node set!")
+
+    def _find_manual(self, text: str) -> List[GraphNode]:
+        """Returns the manual nodes whose conditions contain some text."""
+        return [
+            node
+            for node in self.manual.values()
+            if isinstance(node.conditions, str) and text in node.conditions
+        ]
+
+    def fix_previous_siblings(self):
+        for node in self.graph:
+            if node.previous_sibling not in self.graph:
+                node.previous_sibling = None
+
+    def apply_previous_siblings(self):
+        """
+        Applies previous_sibling to root level nodes as the root level node above and to
+        generated nodes which don't have one as the node above with the same parent.
+        """
+        node_above = None
+        for node in self:
+            if node.parent is None:
+                node.previous_sibling = node_above
+                if node_above is None:
+                    # the dataframe shift leaves an explicit null on the first node
+                    node.fields["previous_sibling"] = None
+                node_above = node.dialog_node
+
+        sibling_above = {}
+        for node in self.generated.values():
+            node.previous_sibling = node.previous_sibling or sibling_above.get(
+                node.parent
+            )
+            if node.previous_sibling == node.parent:
+                node.previous_sibling = None
+            if node.parent is not None:
+                sibling_above[node.parent] = node.dialog_node
+        logger.info("Previous siblings fixed!")
+
+    def point_to_anything_else_node(self):
+        """
+        Fixes the "next_step" field of the anything_else node inside the answers folder to
+        be the value of the root anything_else.
+        """
+        root_node = next(iter(self.anything_else))
+        for node in self.get_answers():
+            if node.conditions == "anything_else":
+                self.graph.set_field(
+                    node,
+                    "next_step",
+                    {
+                        "behavior": "jump_to",
+                        "selector": "body",
+                        "dialog_node": root_node,
+                    },
+                )
+
+    def limit_intents(self, limit: int, dry_run: bool = False) -> DropReport:
+        """
+        In case there is an intent limit (100 on the lite plan), cuts down on the generated
+        nodes to respect the maximum number. On a dry run, only reports what would be
+        dropped.
+        """
+        if not limit:
+            return DropReport()
+        intents_to_remove = get_intents_to_remove(
+            (node.intent for node in self.generated.values()),
+            len(self.get_intents()) - limit,
+        )
+        report = self.drop_node_chains(intents_to_remove, dry_run)
+        if dry_run:
+            logger.info("Intent limit (dry run): %s", report)
+            return report
+        logger.info("Intents limited!")
+        return report
+
+    def get_intents(self) -> list:
+        """Returns a list of the intents used in the dialog nodes."""
+        return [intent for intent, nodes in self.graph.intents.items() if intent and nodes]
+
+    def drop_node_chains(self, intents: List[str], dry_run: bool = False) -> DropReport:
+        """
+        Removes the generated nodes of some intents and all nodes which depend on them:
+        the ones which jump to them and their children, transitively.
+        """
+        nodes = list(self.generated.values())
+        positions = defaultdict(list)
+        for i, node in enumerate(nodes):
+            positions[node.intent].append(i)
+        chains = get_node_chains(
+            [node.dialog_node for node in nodes],
+            [node.parent for node in nodes],
+            [node.fields.get("next_step") for node in nodes],
+            {intent: positions[intent] for intent in intents},
+        )
+        report = DropReport(
+            {
+                intent: [nodes[i].dialog_node for i in chain]
+                for intent, chain in chains.items()
+            }
+        )
+        if not dry_run:
+            for chain in chains.values():
+                for i in chain:
+                    del self.generated[nodes[i].dialog_node]
+                    self.graph.remove(nodes[i])
+        return report
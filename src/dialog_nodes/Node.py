@@ -5,69 +5,122 @@
 
 from __future__ import annotations
 
-import uuid
-from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 
-from src.utils.list_dict_operations import drop_empty
-from src.utils.sanitize import sanitize
+from src.dialog_nodes.node_ids import new_dialog_node
+from src.utils.accents import fold_accents_cached
+
+# the fields of a dialog node in the skill file, in the order they are exported
+EXPORT_FIELDS = (
+    "type",
+    "title",
+    "conditions",
+    "context",
+    "output",
+    "dialog_node",
+    "parent",
+    "previous_sibling",
+    "next_step",
+)
+
+# the fields which come from the spreadsheet and are only used while building
+METADATA_FIELDS = ("fonte", "intent", "modificador", "substantivo", "recipiente", "rotulos")
+
+NodeDict = Dict[str, Any]
 
 
-@dataclass
 class Node:
-    type: str = "standard"
-    title: str = None
-    conditions: str = None
-    context: Dict = None
-    output: Dict = None
-    dialog_node: str = field(
-        default_factory=lambda: f"node_{uuid.uuid4().hex[:16]}", init=False
-    )
-    parent: str = None
-    previous_sibling: str = None
-    next_step: Dict[str, str] = None
-    fonte: str = None
-    intent: str = None
-    modificador: str = None
-    substantivo: str = None
-    recipiente: str = None
-    rotulos: str = None
-    children: List["Node"] = field(default_factory=list, init=False)
+    """
+    A generated dialog node, without a __dict__. Only the fields in EXPORT_FIELDS go
+    to the skill file; the ones in METADATA_FIELDS are kept until the nodes are
+    organized, e.g. to sort siblings and to test for collisions.
+    """
+
+    __slots__ = EXPORT_FIELDS + METADATA_FIELDS + ("children",)
+
+    def __init__(
+        self,
+        type: str = "standard",
+        title: str = None,
+        conditions: str = None,
+        context: Dict = None,
+        output: Dict = None,
+        dialog_node: str = None,
+        parent: str = None,
+        previous_sibling: str = None,
+        next_step: Dict[str, str] = None,
+        fonte: str = None,
+        intent: str = None,
+        modificador: str = None,
+        substantivo: str = None,
+        recipiente: str = None,
+        rotulos: str = None,
+    ):
+        self.type = type
+        self.title = title
+        self.conditions = conditions
+        self.context = context
+        self.output = output
+        self.dialog_node = dialog_node if dialog_node is not None else new_dialog_node()
+        self.parent = parent
+        self.previous_sibling = previous_sibling
+        self.next_step = next_step
+        self.fonte = fonte
+        self.intent = intent
+        self.modificador = modificador
+        self.substantivo = substantivo
+        self.recipiente = recipiente
+        self.rotulos = rotulos
+        self.children: List[Node] = []
+
+    def __repr__(self) -> str:
+        return f"Node({self.dialog_node}, {self.title or self.conditions!r})"
 
     def add_child(self, node: Node):
         node.parent = self.dialog_node
         self.children.append(node)
 
-    def to_list(self) -> List[NodeDict]:
+    def to_list(self, metadata: bool = True) -> List[NodeDict]:
         """
-        Returns this node and its children as a list of dicts.
-
-        First, sorts the children. The priority of the sort key is higher on later
-        sorts and 'zzzzz' is used to ensure that empty values go last without needing
-        to reverse the sorts.
+        Returns this node and its descendants as a list of dicts, depth first, with
+        or without the metadata fields. The build keeps them, for the organizers;
+        without them, the dicts are the nodes as in the skill file.
 
-        Then, assembles a list, converting itself to a dict and calling to_list()
-        recursively on children.
+        Before a node is converted, its children are sorted by rotulos, modificador,
+        substantivo and recipiente, in that priority, with 'zzzzz' making empty
+        values go last. The sort is stable, so children which tie keep their order.
         """
-        if len(self.children) > 1:
-            self.sort(key=lambda x: sanitize(x.recipiente or "zzzzz"))
-            self.sort(key=lambda x: sanitize(x.substantivo or "zzzzz"))
-            self.sort(key=lambda x: sanitize(x.modificador or "zzzzz"))
-            self.sort(key=lambda x: sanitize(x.rotulos or ""))
-            self.apply_previous_siblings()
-
-        out = [self.to_dict()]
-        for node in self.children:
-            out += node.to_list()
-        return out
+        return list(self.iter_dicts(metadata))
+
+    def iter_dicts(self, metadata: bool = True) -> Iterator[NodeDict]:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if len(node.children) > 1:
+                node.children.sort(key=sort_key)
+                node.apply_previous_siblings()
+            yield node.to_dict() if metadata else node.export()
+            stack.extend(reversed(node.children))
 
     def to_dict(self) -> NodeDict:
-        return drop_empty(self.__dict__)
+        """
+        Returns the non-empty export and metadata fields, which is what the organizers
+        work on. Values aren't copied, so the dict shares context, output and
+        next_step with the node.
+        """
+        return self._get_fields(EXPORT_FIELDS + METADATA_FIELDS)
 
-    def sort(self, *args, **kwargs):
-        self.children.sort(*args, **kwargs)
-        for i, child in enumerate(self.children):
-            child.sort(*args, **kwargs)
+    def export(self) -> NodeDict:
+        """Returns the non-empty export fields, as in the skill file, without copies."""
+        return self._get_fields(EXPORT_FIELDS)
+
+    def _get_fields(self, names: Tuple[str, ...]) -> NodeDict:
+        out = {}
+        for name in names:
+            value = getattr(self, name)
+            if value:
+                out[name] = value
+        return out
 
     def apply_previous_siblings(self):
         for i, node in enumerate(self.children):
@@ -76,4 +129,11 @@ class Node:
             node.previous_sibling = self.children[i - 1].dialog_node
 
 
-NodeDict = Node.__annotations__
+def sort_key(node: Node) -> Tuple[str, str, str, str]:
+    return (
+        fold_accents_cached(node.rotulos or ""),
+        fold_accents_cached(node.modificador or "zzzzz"),
+        fold_accents_cached(node.substantivo or "zzzzz"),
+        fold_accents_cached(node.recipiente or "zzzzz"),
+    )
+
@@ -0,0 +1,130 @@
+# Filter-MSMARCO
+# @File:   NodeGraph.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# fields which are only used while building the skill and are never exported
+TEMPORARY_FIELDS = {
+    "fonte",
+    "intent",
+    "modificador",
+    "substantivo",
+    "recipiente",
+    "children",
+    "rotulos",
+    "node_above",
+}
+
+
+# fields which are kept as attributes of a GraphNode
+LINK_FIELDS = ("dialog_node", "parent", "previous_sibling")
+
+
+def is_missing(value) -> bool:
+    """Returns whether a value would be a nan cell in a dataframe."""
+    return value != value
+
+
+def extract_intent(conditions) -> str:
+    search = re.search(r"#(\S+)", conditions) if isinstance(conditions, str) else None
+    return search.group(1) if search else ""
+
+
+class GraphNode:
+    """
+    A dialog node with the fields used to link nodes kept as attributes and every
+    other field kept as-is in a dict. An unset link is None; a None in fields is an
+    explicit null, which gets exported.
+    """
+
+    __slots__ = LINK_FIELDS + ("intent", "fields")
+
+    def __init__(self, record: dict):
+        fields = {k: v for k, v in record.items() if not is_missing(v)}
+        self.dialog_node: str = fields.pop("dialog_node")
+        self.parent: Optional[str] = fields.pop("parent", None)
+        self.previous_sibling: Optional[str] = fields.pop("previous_sibling", None)
+        self.intent: str = extract_intent(fields.get("conditions"))
+        self.fields: dict = fields
+
+    @property
+    def conditions(self) -> Optional[str]:
+        return self.fields.get("conditions")
+
+    def to_dict(self, columns: Iterable[str]) -> dict:
+        """Returns the node as a dict with keys in the order of columns."""
+        out = {}
+        fields = self.fields
+        for column in columns:
+            value = getattr(self, column) if column in LINK_FIELDS else None
+            if value is not None:
+                out[column] = value
+            elif column in fields:
+                out[column] = fields[column]
+        return out
+
+
+class NodeGraph:
+    """
+    Dialog nodes indexed by dialog_node, parent and intent. Keeps track of the order
+    in which fields first appear, so that exporting gives the same key order as a
+    dataframe built from the same records.
+    """
+
+    def __init__(self, records: Iterable[dict] = ()):
+        self.columns: Dict[str, None] = {}
+        self.nodes: Dict[str, GraphNode] = {}
+        self.children: Dict[Optional[str], Dict[str, GraphNode]] = defaultdict(dict)
+        self.intents: Dict[str, Dict[str, GraphNode]] = defaultdict(dict)
+        for record in records:
+            self.add(GraphNode(record), record)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __iter__(self) -> Iterator[GraphNode]:
+        return iter(self.nodes.values())
+
+    def __contains__(self, dialog_node) -> bool:
+        return dialog_node in self.nodes
+
+    def __getitem__(self, dialog_node: str) -> GraphNode:
+        return self.nodes[dialog_node]
+
+    def add(self, node: GraphNode, record: dict = None):
+        self.add_columns(record or chain(LINK_FIELDS, node.fields))
+        self.nodes[node.dialog_node] = node
+        self.children[node.parent][node.dialog_node] = node
+        self.intents[node.intent][node.dialog_node] = node
+
+    def add_columns(self, columns: Iterable[str]):
+        self.columns.update(dict.fromkeys(columns))
+
+    def remove(self, node: GraphNode):
+        del self.nodes[node.dialog_node]
+        del self.children[node.parent][node.dialog_node]
+        del self.intents[node.intent][node.dialog_node]
+
+    def get_children(self, dialog_node: Optional[str]) -> List[GraphNode]:
+        """Returns the children of a node (or root level nodes, for None)."""
+        return list(self.children.get(dialog_node, {}).values())
+
+    def set_field(self, node: GraphNode, column: str, value):
+        self.columns.setdefault(column)
+        node.fields[column] = value
+
+    def export_columns(self) -> List[str]:
+        return [c for c in self.columns if c not in TEMPORARY_FIELDS]
+
+    def to_list(self, nodes: Iterable[GraphNode] = None) -> List[dict]:
+        """Exports nodes (all of them, by default) as a list of dicts."""
+        columns = self.export_columns()
+        nodes = self if nodes is None else nodes
+        return [node.to_dict(columns) for node in nodes]
@@ -3,14 +3,25 @@
 # @Time:   20/11/2021
 # @Author: Gabriel O.
 
-import json
+import logging
 import re
-from typing import List
+from collections import defaultdict
+from typing import Collection, List
 
 import numpy as np
 import pandas as pd
 
+from src.dialog_nodes.dialog_node_operations import convert_to_list
+from src.dialog_nodes.node_index import (
+    DropReport,
+    get_interface_order,
+    get_intents_to_remove,
+    get_node_chains,
+)
 from src.utils.list_dict_operations import drop_duplicates
+from src.utils.tracing import stage
+
+logger = logging.getLogger(__name__)
 
 
 class NodeOrganizer:
@@ -63,6 +74,10 @@ class NodeOrganizer:
         answers_id = self.df_generated.loc[answers_node, "dialog_node"].values[0]
         self.answers = self.df_generated.parent == answers_id
 
+    def __len__(self) -> int:
+        """Returns the number of nodes, which is the number of nodes to_list gives."""
+        return len(self.df_manual) + len(self.df_generated) + len(self.df_anything_else)
+
     def _build(self):
         """Updates the main dataframe to reflect changes in its subparts."""
         self._df = pd.concat(
@@ -95,55 +110,50 @@ class NodeOrganizer:
         )
         return out
 
+    def to_list(self) -> List[dict]:
+        """Returns the organized nodes in the format of the skill file."""
+        return convert_to_list(self.df)
+
     def run(self, intent_limit: int = 0):
-        self.sort_nodes()
-        self.limit_intents(intent_limit)
-        self.set_contexts_node()
-        self.set_help_node()
-        self.fix_previous_siblings()
-        self.apply_previous_siblings()
-        self.point_to_anything_else_node()
+        with stage("sort_nodes"):
+            self.sort_nodes()
+        with stage("limit_intents"):
+            self.limit_intents(intent_limit)
+        with stage("set_contexts_node"):
+            self.set_contexts_node()
+        with stage("set_help_node"):
+            self.set_help_node()
+        with stage("fix_previous_siblings"):
+            self.fix_previous_siblings()
+        with stage("apply_previous_siblings"):
+            self.apply_previous_siblings()
+        with stage("point_to_anything_else_node"):
+            self.point_to_anything_else_node()
 
     def sort_nodes(self):
-        root_node = (
-            self.df_manual.previous_sibling.isna()
-            & self.df_manual.parent.isna()
-            & self.df_manual.next_step.isna()
+        self.df_manual = self.sort_by_previous_siblings(
+            self.df_manual, outer_nodes=self._df.dialog_node
         )
-        self.df_manual = self.sort_by_previous_siblings(self.df_manual, root_node)
         self._build()
         self._separate_nodes()
-        print("Nodes sorted!")
+        logger.info("Nodes sorted!")
 
     @staticmethod
-    def sort_by_previous_siblings(df: pd.DataFrame, root: pd.Series):
+    def sort_by_previous_siblings(
+        df: pd.DataFrame, outer_nodes: Collection[str] = ()
+    ) -> pd.DataFrame:
         """
         Sorts the rows in a dataframe to reflect how the nodes appear on the interface.
+        Nodes whose parent or previous_sibling is one of outer_nodes (e.g. children of
+        the root anything_else node) are placed after the root level.
         """
-        previous_siblings = df.previous_sibling.to_list()
-        parents = df.parent.to_list()
-        df.loc[root, "order"] = 0
-
-        curr = 1
-        last_node = df[root].dialog_node.values[0]
-        while df.order.hasnans:
-            if last_node in parents:
-                next_node = (df.parent == last_node) & (df.previous_sibling.isna())
-            elif last_node in previous_siblings:
-                next_node = df.previous_sibling == last_node
-            else:
-                last_parent = df[df.dialog_node == last_node].parent.values[0]
-                next_node = df.previous_sibling == last_parent
-            df.loc[next_node, "order"] = curr
-            try:
-                last_node = df[next_node].dialog_node.values[0]
-            except IndexError:
-                break
-            curr += 1
-
-        df.sort_values(by=["order"], inplace=True)
-        df.drop("order", inplace=True, axis=1)
-        return df
+        order = get_interface_order(
+            df.dialog_node.to_list(),
+            df.parent.to_list(),
+            df.previous_sibling.to_list(),
+            outer_nodes,
+        )
+        return df.iloc[order]
 
     def set_contexts_node(self):
         """
@@ -159,9 +169,9 @@ class NodeOrganizer:
 
         welcome_node = self.df_manual.conditions.str.contains("welcome").fillna(False)
         node_context = self.df_manual.loc[welcome_node, "context"].values[0]
-        node_context["titles"] = titles
-        self.df_manual.loc[welcome_node, "context"] = str(node_context)
-        print("Contexts set!")
+        node_context = {**node_context, "titles": titles}
+        self._set_objects(self.df_manual, welcome_node, "context", node_context)
+        logger.info("Contexts set!")
 
     def set_help_node(self, number_of_hints: int = 3):
         help_node = self.df_manual.conditions.str.contains("ajuda").fillna(False)
@@ -171,12 +181,12 @@ class NodeOrganizer:
             f"dica{i}": f"<? new Random().nextInt({intents_per_hint}) +{i * intents_per_hint} ?>"
             for i in range(number_of_hints)
         }
-        self.df_manual.loc[help_node, "context"] = str(node_context)
-        print("Help node set!")
+        self._set_objects(self.df_manual, help_node, "context", node_context)
+        logger.info("Help node set!")
 
     def fix_previous_siblings(self):
         self._build()
-        all_dialog_nodes = self._df.dialog_node.to_list()
+        all_dialog_nodes = set(self._df.dialog_node)
         self._df.previous_sibling = self._df.previous_sibling.apply(
             lambda x: x if x in all_dialog_nodes else np.nan
         )
@@ -184,7 +194,8 @@ class NodeOrganizer:
 
     def apply_previous_siblings(self):
         """
-        Applies previous_sibling to root level nodes as the root level node above.
+        Applies previous_sibling to root level nodes as the root level node above and to
+        generated nodes which don't have one as the node above with the same parent.
         """
         root_nodes = self._df.parent.isna()
         self._df.loc[root_nodes, "previous_sibling"] = self._df.loc[
@@ -192,23 +203,13 @@ class NodeOrganizer:
         ].shift(1)
         self._separate_nodes()
 
-        self.df_generated["node_above"] = self.df_generated.dialog_node.shift(1)
-        self.df_generated.previous_sibling = (
-            self.df_generated[["previous_sibling", "node_above"]]
-            .fillna("")
-            .apply(
-                lambda series: series["previous_sibling"]
-                if series["previous_sibling"]
-                else series["node_above"],
-                axis=1,
-            )
-        )
-
-        previous_sibling_is_parent = (
-            self.df_generated.previous_sibling == self.df_generated.parent
+        df = self.df_generated
+        sibling_above = df.groupby("parent", sort=False).dialog_node.shift(1)
+        previous_sibling = df.previous_sibling.replace("", np.nan).fillna(sibling_above)
+        self.df_generated["previous_sibling"] = previous_sibling.mask(
+            previous_sibling == df.parent
         )
-        self.df_generated.previous_sibling[previous_sibling_is_parent] = np.nan
-        print("Previous siblings fixed!")
+        logger.info("Previous siblings fixed!")
 
     def point_to_anything_else_node(self):
         """
@@ -218,34 +219,47 @@ class NodeOrganizer:
         df_answers = self.df_generated[self.answers]
         anything_else = df_answers.conditions == "anything_else"
         root_node = self.df_anything_else.dialog_node.values[0]
-        self.df_generated.loc[self.answers & anything_else, "next_step"] = json.dumps(
+        self._set_objects(
+            self.df_generated,
+            self.answers & anything_else,
+            "next_step",
             {
                 "behavior": "jump_to",
                 "selector": "body",
                 "dialog_node": root_node,
-            }
+            },
         )
 
-    def limit_intents(self, limit: int):
+    @staticmethod
+    def _set_objects(df: pd.DataFrame, rows: pd.Series, column: str, value):
+        """
+        Sets the column of some rows to value, which can be a dict: .loc would take
+        its keys as labels, so it's set row by row.
+        """
+        if df[column].dtype != object:
+            df[column] = df[column].astype(object)
+        for i in rows[rows].index:
+            df.at[i, column] = value
+
+    def limit_intents(self, limit: int, dry_run: bool = False) -> DropReport:
         """
         In case there is an intent limit (100 on the lite plan), cuts down on the generated
-        nodes to respect the maximum number.
+        nodes to respect the maximum number. On a dry run, only reports what would be
+        dropped.
         """
         if not limit:
-            return
-        generated_intents = self.df_generated.intent.to_list()
-        generated_intents = drop_duplicates(generated_intents)
-        generated_intents.sort()
-        number_of_intents_to_remove = len(self.get_intents()) - limit
-        intents_to_remove = generated_intents[-number_of_intents_to_remove:]
-
-        for intent in intents_to_remove:
-            intent_nodes = self.df_generated.conditions.str.contains(intent)
-            answer_node = self.df_generated[intent_nodes]
-            self.drop_node_chain(answer_node)
+            return DropReport()
+        intents_to_remove = get_intents_to_remove(
+            self.df_generated.intent, len(self.get_intents()) - limit
+        )
+        report = self.drop_node_chains(intents_to_remove, dry_run)
+        if dry_run:
+            logger.info("Intent limit (dry run): %s", report)
+            return report
         self._build()
         self._separate_nodes()
-        print("Intents limited!")
+        logger.info("Intents limited!")
+        return report
 
     def get_intents(self) -> list:
         """Returns a list of the intents used in the dialog nodes."""
@@ -253,20 +267,26 @@ class NodeOrganizer:
         intents = self._df["intent"].to_list()
         return drop_duplicates(intents)
 
-    def drop_node_chain(self, nodes: pd.DataFrame):
+    def drop_node_chains(self, intents: List[str], dry_run: bool = False) -> DropReport:
         """
-        Removes a subset of dialog nodes from the generated df and all nodes which jump
-        to those in the subset.
+        Removes the generated nodes of some intents and all nodes which depend on them:
+        the ones which jump to them and their children, transitively.
         """
-        nodes_above = self.df_generated.next_step.astype(str).apply(
-            lambda x: "jump_to" in x
-            and any(node in x for node in nodes.dialog_node.to_list())
+        df = self.df_generated
+        positions = defaultdict(list)
+        for i, intent in enumerate(df.intent):
+            positions[intent].append(i)
+        chains = get_node_chains(
+            df.dialog_node.to_list(),
+            df.parent.to_list(),
+            df.next_step.to_list(),
+            {intent: positions[intent] for intent in intents},
         )
-        df_nodes_above = self.df_generated[nodes_above]
-
-        # drop the input nodes
-        self.df_generated.drop(nodes.index, inplace=True)
-
-        # drop the nodes above
-        if nodes_above.sum() > 0:
-            self.drop_node_chain(df_nodes_above)
+        dialog_nodes = df.dialog_node.to_numpy()
+        report = DropReport(
+            {intent: dialog_nodes[chain].tolist() for intent, chain in chains.items()}
+        )
+        if not dry_run:
+            dropped = [i for chain in chains.values() for i in chain]
+            self.df_generated = df.drop(df.index[dropped])
+        return report
@@ -3,20 +3,19 @@
 # @Time:   20/11/2021
 # @Author: Gabriel O.
 
-import ast
-from typing import List, Mapping
+from typing import Dict, List, Mapping, Optional, Tuple
 
 import pandas as pd
 
 from src.dialog_nodes.Node import Node
-from src.dialog_nodes.get_title import get_contexts, get_title
-from src.utils.list_dict_operations import (
-    remove_nans,
-    drop_duplicates,
-)
+from src.dialog_nodes.get_title import get_contexts, get_titles
+from src.dialog_nodes.node_ids import ContentIds, NodeIds, node_key
+from src.utils.list_dict_operations import drop_duplicates
 
 
-def get_dialog_nodes(df: pd.DataFrame, confidence: float = None) -> List[dict]:
+def get_dialog_nodes(
+    df: pd.DataFrame, confidence: float = None, node_ids: NodeIds = None
+) -> List[dict]:
     """
     Extracts dialog nodes from the spreadsheet. They serve the following purposes:
     1. Detect and set context
@@ -38,7 +37,13 @@ def get_dialog_nodes(df: pd.DataFrame, confidence: float = None) -> List[dict]:
 
     This ensures that direct intent matching by Watson is the last resort, for when other
     means of identification have failed.
+
+    Ids are given to the nodes by node_ids from keys made of the folder path, the
+    intent and the role of each node. By default they are derived from the keys, so
+    the same spreadsheet always gives the same ids.
     """
+    if node_ids is None:
+        node_ids = ContentIds()
     context_folder = Node(
         title="Contexto", conditions="true", output={
     "generic": [
@@ -68,20 +73,33 @@ def get_dialog_nodes(df: pd.DataFrame, confidence: float = None) -> List[dict]:
       }
     ],
     "selection_policy": "random"
-  }, next_step={"behavior": "skip_user_input"}
+  }, next_step={"behavior": "skip_user_input"},
+        dialog_node=node_ids(node_key("Contexto", "folder")),
     )
     contextless_intent_folder = Node(
-        title="Sem contexto", conditions="true", next_step={"behavior": "skip_user_input"}
+        title="Sem contexto",
+        conditions="true",
+        next_step={"behavior": "skip_user_input"},
+        dialog_node=node_ids(node_key("Sem contexto", "folder")),
     )
     intent_folder = Node(
-        title="Intenção", conditions="true", next_step={"behavior": "skip_user_input"}
+        title="Intenção",
+        conditions="true",
+        next_step={"behavior": "skip_user_input"},
+        dialog_node=node_ids(node_key("Intenção", "folder")),
     )
     answer_folder = Node(
-        title="Respostas", conditions="true", next_step={"behavior": "skip_user_input"}
+        title="Respostas",
+        conditions="true",
+        next_step={"behavior": "skip_user_input"},
+        dialog_node=node_ids(node_key("Respostas", "folder")),
     )
 
     create_context_nodes_and_intent_subfolders(
-        df=df, context_folder=context_folder, intent_folder=intent_folder
+        df=df,
+        context_folder=context_folder,
+        intent_folder=intent_folder,
+        node_ids=node_ids,
     )
 
     # create intent, answer and source nodes
@@ -91,6 +109,7 @@ def get_dialog_nodes(df: pd.DataFrame, confidence: float = None) -> List[dict]:
         intent_folder=intent_folder,
         answer_folder=answer_folder,
         confidence=confidence,
+        node_ids=node_ids,
     )
 
     # create anything_else nodes
@@ -99,6 +118,7 @@ def get_dialog_nodes(df: pd.DataFrame, confidence: float = None) -> List[dict]:
         contextless_intent_folder=contextless_intent_folder,
         intent_folder=intent_folder,
         answer_folder=answer_folder,
+        node_ids=node_ids,
     )
 
     return (
@@ -110,16 +130,20 @@ def get_dialog_nodes(df: pd.DataFrame, confidence: float = None) -> List[dict]:
 
 
 def create_context_nodes_and_intent_subfolders(
-    df: pd.DataFrame, context_folder: Node, intent_folder: Node
+    df: pd.DataFrame, context_folder: Node, intent_folder: Node, node_ids: NodeIds
 ):
     all_tags = df["rótulos"].drop_duplicates().to_list()
     all_contexts = get_contexts(all_tags)
+    # the same string for every node, instead of one copy per node
+    rotulos = "_".join(all_tags)
     for context in all_contexts:
+        title = context.capitalize()
         intent_subfolder = Node(
-            title=context.capitalize(),
+            title=title,
             conditions=f"$contexto:({context})",
             next_step={"behavior": "skip_user_input"},
-            rotulos="_".join(all_tags),
+            rotulos=rotulos,
+            dialog_node=node_ids(node_key(f"{intent_folder.title}/{title}", "folder")),
         )
         intent_folder.add_child(intent_subfolder)
 
@@ -131,7 +155,10 @@ def create_context_nodes_and_intent_subfolders(
                 "selector": "body",
                 "dialog_node": intent_subfolder.dialog_node,
             },
-            rotulos="_".join(all_tags),
+            rotulos=rotulos,
+            dialog_node=node_ids(
+                node_key(f"{context_folder.title}/{context}", "context")
+            ),
         )
         context_folder.add_child(context_node)
 
@@ -142,16 +169,30 @@ def create_intent_and_answer_nodes(
     intent_folder: Node,
     answer_folder: Node,
     confidence: float,
+    node_ids: NodeIds,
 ):
     """
     For every record on the spreadsheet, create one node with the answer, one child of
     that node containing the source and a node which jumps to the one with the answer.
+
+    Questions with the same rótulos have the same contexts and go to the same intent
+    subfolder, so both are found once for each distinct rótulos.
     """
-    for i, record in df.iterrows():
-        node_tags = record["rótulos"].split("_")
-        node_contexts = get_contexts(node_tags)
+    subfolders = get_subfolders(intent_folder)
+    contexts_by_tags = {}
+    subfolder_by_tags = {}
+    for tags in df["rótulos"].unique():
+        contexts_by_tags[tags] = get_contexts(tags.split("_"))
+        subfolder_by_tags[tags] = find_subfolder(subfolders, contexts_by_tags[tags])
+
+    contexts = [contexts_by_tags[tags] for tags in df["rótulos"]]
+    titles = get_titles(df, contexts)
+    columns = ["intent", "resposta", "fonte", "modificador", "substantivo", "recipiente"]
+    records = df[columns].to_dict(orient="records")
+    for record, tags, title in zip(records, df["rótulos"], titles):
+        node_contexts = contexts_by_tags[tags]
         answer_node = Node(
-            title=get_title(record.to_dict(), node_contexts),
+            title=title,
             conditions=f"#{record['intent']} && intent.confidence > {confidence}",
             context={"other_counter": 0},
             output={
@@ -169,12 +210,28 @@ def create_intent_and_answer_nodes(
             substantivo=record["substantivo"],
             recipiente=record["recipiente"],
             rotulos="_".join(node_contexts),
+            dialog_node=node_ids(
+                node_key(answer_folder.title, "answer", record["intent"]),
+                row=record["intent"],
+            ),
         )
 
-        source_node = create_source_node(record)
+        source_node = create_source_node(
+            record,
+            node_ids(
+                node_key(answer_folder.title, "source", record["intent"]),
+                row=record["intent"],
+            ),
+        )
         answer_node.add_child(source_node)
         answer_folder.add_child(answer_node)
 
+        intent_subfolder = subfolder_by_tags[tags]
+        if intent_subfolder:
+            path = get_path(intent_folder, intent_subfolder)
+        else:
+            path = contextless_intent_folder.title
+
         intent_node = Node(
             conditions=get_full_condition(record),
             next_step={
@@ -186,20 +243,39 @@ def create_intent_and_answer_nodes(
             substantivo=record["substantivo"],
             recipiente=record["recipiente"],
             rotulos="_".join(node_contexts),
+            dialog_node=node_ids(
+                node_key(path, "intent", record["intent"]), row=record["intent"]
+            ),
         )
 
-        try:
-            intent_subfolder = next(
-                child
-                for child in intent_folder.children
-                if child.title.lower() in node_contexts
-            )
+        if intent_subfolder:
             intent_subfolder.add_child(intent_node)
-        except StopIteration:
+        else:
             contextless_intent_folder.add_child(intent_node)
 
 
-def create_source_node(record: pd.Series):
+def get_subfolders(intent_folder: Node) -> Dict[str, Tuple[int, Node]]:
+    """Returns the intent subfolders by their lowercase title, with their positions."""
+    subfolders = {}
+    for i, child in enumerate(intent_folder.children):
+        subfolders.setdefault(child.title.lower(), (i, child))
+    return subfolders
+
+
+def find_subfolder(
+    subfolders: Dict[str, Tuple[int, Node]], contexts: List[str]
+) -> Optional[Node]:
+    """Returns the first subfolder, in the folder's order, of one of the contexts."""
+    matches = [subfolders[context] for context in contexts if context in subfolders]
+    return min(matches, key=lambda match: match[0])[1] if matches else None
+
+
+def get_path(*folders: Node) -> str:
+    """Returns the path of nested folders, made of their titles."""
+    return "/".join(folder.title for folder in folders)
+
+
+def create_source_node(record: Mapping, dialog_node: str):
     fontes = record["fonte"].split("--")
     fontes = drop_duplicates(fontes)
     if len(fontes) > 1:
@@ -220,6 +296,7 @@ def create_source_node(record: pd.Series):
                 }
             ]
         },
+        dialog_node=dialog_node,
     )
 
 
@@ -228,6 +305,7 @@ def create_anything_else_nodes(
     contextless_intent_folder: Node,
     intent_folder: Node,
     answer_folder: Node,
+    node_ids: NodeIds,
 ):
     """
     Creates the following anything_else nodes:
@@ -241,16 +319,23 @@ def create_anything_else_nodes(
     """
     # 1st type
     contextless_intent_anything_else = create_anything_else_node(
-        context_folder.dialog_node
+        context_folder.dialog_node,
+        node_ids(node_key(contextless_intent_folder.title, "anything_else")),
     )
     contextless_intent_folder.add_child(contextless_intent_anything_else)
 
     # 2nd type
-    context_anything_else = create_anything_else_node(intent_folder.dialog_node)
+    context_anything_else = create_anything_else_node(
+        intent_folder.dialog_node,
+        node_ids(node_key(context_folder.title, "anything_else")),
+    )
     context_folder.add_child(context_anything_else)
 
     # 3rd type
-    intent_anything_else = create_anything_else_node(answer_folder.dialog_node)
+    intent_anything_else = create_anything_else_node(
+        answer_folder.dialog_node,
+        node_ids(node_key(intent_folder.title, "anything_else")),
+    )
     intent_folder.add_child(intent_anything_else)
 
     # 4th type
@@ -258,16 +343,19 @@ def create_anything_else_nodes(
         if subfolder.conditions == "anything_else":
             continue
         subfolder_anything_else = create_anything_else_node(
-            intent_anything_else.dialog_node
+            intent_anything_else.dialog_node,
+            node_ids(node_key(get_path(intent_folder, subfolder), "anything_else")),
         )
         subfolder.add_child(subfolder_anything_else)
 
     # 5th type
-    answer_anything_else = create_anything_else_node("")
+    answer_anything_else = create_anything_else_node(
+        "", node_ids(node_key(answer_folder.title, "anything_else"))
+    )
     answer_folder.add_child(answer_anything_else)
 
 
-def create_anything_else_node(jump_to: str) -> Node:
+def create_anything_else_node(jump_to: str, dialog_node: str) -> Node:
     return Node(
         title="Anything else",
         conditions="anything_else",
@@ -277,6 +365,7 @@ def create_anything_else_node(jump_to: str) -> Node:
             "dialog_node": jump_to,
         },
         rotulos="zzzzz",
+        dialog_node=dialog_node,
     )
 
 
@@ -298,18 +387,21 @@ def get_base_condition(modifier, noun, recipient) -> str:
 
 
 def convert_to_list(df: pd.DataFrame) -> List[dict]:
-    list_of_dicts = df.to_dict(orient="records")
-    list_of_dicts = [remove_nans(d) for d in list_of_dicts]
-    list_of_dicts = [eval_column(d, "context") for d in list_of_dicts]
-    list_of_dicts = [eval_column(d, "next_step") for d in list_of_dicts]
-    return list_of_dicts
-
-
-def eval_column(d: dict, col: str):
-    if col not in d:
-        return d
-    value = d[col]
-    if isinstance(value, str):
-        evaluated = ast.literal_eval(value)
-        d[col] = evaluated
-    return d
+    """
+    Returns the rows of a dataframe of nodes as dicts, without the fields which are
+    nan in each row. Fields like context and next_step are kept as the objects in
+    their cells, without being parsed.
+    """
+    records = [{} for _ in range(len(df))]
+    for column in df.columns:
+        values = df[column].to_numpy(dtype=object)
+        # nan is the only value which isn't equal to itself
+        present = values == values
+        if present.all():
+            for record, value in zip(records, values.tolist()):
+                record[column] = value
+            continue
+        for record, value, keep in zip(records, values.tolist(), present.tolist()):
+            if keep:
+                record[column] = value
+    return records
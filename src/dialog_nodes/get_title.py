@@ -4,31 +4,293 @@
 # @Author: Gabriel O.
 
 import re
-from typing import List, Mapping
+from typing import Callable, Dict, List, Mapping
+
+import pandas as pd
 
 from src.utils.list_dict_operations import drop_duplicates
 from src.utils.plural import plural
 
 
+NON_CONTEXTUAL_TAGS = frozenset(
+    ["fauna", "flora", "outras", "turismo", "saúde", "geologia"]
+)
+
+# a tag is non-contextual if it contains one of them, like "baleias turismo"
+NON_CONTEXTUAL_PATTERN = re.compile(
+    "|".join(re.escape(tag) for tag in sorted(NON_CONTEXTUAL_TAGS))
+)
+
+
 def get_contexts(tags: List[str]) -> List[str]:
     """Returns the contexts of a question which do not contain non-contextual tags."""
     tags = [t.replace("-", " ") for t in tags]
-    non_contextual_tags = [
-        "fauna",
-        "flora",
-        "outras",
-        "turismo",
-        "saúde",
-        "geologia",
-    ]
     output = [
-        context
-        for context in tags
-        if all(tag not in context for tag in non_contextual_tags)
+        context for context in tags if not NON_CONTEXTUAL_PATTERN.search(context)
     ]
     return drop_duplicates(output)
 
 
+# a template gets modificador, substantivo, recipiente and contexto and returns the
+# pieces of the title, or raises a ValueError if the question lacks any of them
+Template = Callable[[str, str, str, str], List[str]]
+
+TEMPLATES: Dict[str, Template] = {}
+
+
+def template(*modificadores: str) -> Callable[[Template], Template]:
+    """Registers a template for the given modificadores."""
+
+    def register(function: Template) -> Template:
+        for modificador in modificadores:
+            TEMPLATES[modificador] = function
+        return function
+
+    return register
+
+
+def require(condition, message: str):
+    if not condition:
+        raise ValueError(message)
+
+
+@template("causa")
+def causa(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(
+        contexto or recipiente,
+        "Perguntas do tipo 'causa' precisam de recipiente ou contexto!",
+    )
+    trechos = [modificador]
+    if substantivo:
+        trechos.append(f"de {substantivo}")
+    if recipiente:
+        trechos.append(f"de {recipiente}")
+    if contexto:
+        trechos.append(f"de {contexto}")
+    trechos.append("?")
+    return trechos
+
+
+@template("composição")
+def composicao(modificador, substantivo, recipiente, contexto) -> List[str]:
+    alvo = recipiente or contexto
+    trechos = ["Do que são feitos" if alvo[-1] == "s" else "Do que é feito"]
+    if substantivo:
+        trechos.append(f"{substantivo} de")
+    trechos.append(alvo)
+    return trechos
+
+
+@template("definição")
+def definicao(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(
+        recipiente or contexto,
+        "Perguntas do tipo 'definição' precisam de recipiente ou de contexto!",
+    )
+    trechos = [f"{contexto}:"] if recipiente and contexto else []
+    trechos.append(modificador)
+    if substantivo:
+        trechos.append(f"de {substantivo}")
+    trechos.append(f"de {recipiente or contexto}?")
+    return trechos
+
+
+@template("detalhar")
+def detalhar(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(
+        recipiente or contexto,
+        "Perguntas do tipo 'detalhar' precisam de recipiente ou de contexto!",
+    )
+    trechos = [modificador]
+    if substantivo:
+        trechos.append(substantivo)
+    if recipiente:
+        trechos.append(f"de {recipiente}")
+    if contexto:
+        trechos.append(f"de {contexto}")
+    return trechos
+
+
+@template("diferença")
+def diferenca(modificador, substantivo, recipiente, contexto) -> List[str]:
+    return [modificador, f"entre {substantivo}", f"e {recipiente or contexto}?"]
+
+
+@template("é")
+def ser(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(
+        (substantivo and contexto)
+        or (recipiente and contexto)
+        or (substantivo and recipiente),
+        "Perguntas do tipo 'é' precisam de dois entre substantivo, recipiente "
+        "e contexto!",
+    )
+    return [substantivo or contexto, f"é {recipiente or contexto}?"]
+
+
+@template("efeito")
+def efeito(modificador, substantivo, recipiente, contexto) -> List[str]:
+    trechos = [modificador]
+    if substantivo:
+        trechos.append(f"de {substantivo}")
+    if recipiente:
+        if contexto:
+            trechos.append(f"de {contexto}")
+        trechos.append(f"em {recipiente}")
+    else:
+        trechos.append(f"em {contexto}")
+    trechos.append("?")
+    return trechos
+
+
+@template("existe")
+def existe(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(recipiente, "Perguntas do tipo 'existe' precisam de recipiente!")
+    trechos = [f"{contexto}:"] if contexto else []
+    trechos.append(modificador)
+    if substantivo:
+        trechos.append(substantivo)
+    trechos.append(f"em {recipiente}?")
+    return trechos
+
+
+@template("explicar")
+def explicar(modificador, substantivo, recipiente, contexto) -> List[str]:
+    if not substantivo:
+        return [modificador, contexto]
+    trechos = [modificador, substantivo]
+    if recipiente:
+        trechos.append(f"de {recipiente}")
+    if contexto:
+        trechos.append(f"de {contexto}")
+    return trechos
+
+
+@template("listar")
+def listar(modificador, substantivo, recipiente, contexto) -> List[str]:
+    if not substantivo:
+        return [modificador, contexto]
+    if recipiente:
+        trechos = [f"{contexto}:"] if contexto else []
+        return trechos + [modificador, plural(substantivo), f"de {recipiente}"]
+    trechos = [modificador, plural(substantivo)]
+    if contexto:
+        trechos.append(f"de {contexto}")
+    return trechos
+
+
+@template("maior", "menor")
+def maior(modificador, substantivo, recipiente, contexto) -> List[str]:
+    trechos = [modificador]
+    if substantivo:
+        trechos.append(substantivo)
+    if contexto:
+        trechos.append(f"de {contexto}")
+    if recipiente:
+        trechos.append(f"de {recipiente}")
+    trechos.append("?")
+    return trechos
+
+
+@template("maiores", "menores")
+def maiores(modificador, substantivo, recipiente, contexto) -> List[str]:
+    trechos = [modificador, plural(substantivo)]
+    if contexto:
+        trechos.append(f"de {contexto}")
+    if recipiente:
+        trechos.append(f"de {recipiente}")
+    trechos.append("?")
+    return trechos
+
+
+@template("onde")
+def onde(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(
+        contexto or recipiente,
+        "Perguntas do tipo 'detalhar' precisam de recipiente ou contexto!",
+    )
+    trechos = [f"{modificador} tem"]
+    if substantivo:
+        trechos += [plural(substantivo), f"de {recipiente or contexto}"]
+    else:
+        trechos.append(contexto)
+        if recipiente:
+            trechos.append(f"em {recipiente}")
+    trechos.append("?")
+    return trechos
+
+
+@template("porque")
+def porque(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(contexto, "Perguntas do tipo 'porque' precisam de contexto!")
+    trechos = [f"{contexto}:"]
+    if recipiente:
+        trechos.append(recipiente)
+    trechos.append("por que?")
+    return trechos
+
+
+@template("quantidade")
+def quantidade(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(
+        substantivo or contexto,
+        "Perguntas do tipo 'quantidade' precisam de substantivo ou contexto!",
+    )
+    if substantivo:
+        trechos = [f"{contexto}:", modificador, f"de {plural(substantivo)}"]
+    else:
+        trechos = [modificador, f"de {contexto}"]
+    if recipiente:
+        trechos.append(f"em {recipiente}")
+    trechos.append("?")
+    return trechos
+
+
+@template("responsável")
+def responsavel(modificador, substantivo, recipiente, contexto) -> List[str]:
+    require(
+        substantivo, "Perguntas do tipo 'responsável' precisam de substantivo!"
+    )
+    require(
+        contexto or recipiente,
+        "Perguntas do tipo 'responsável' precisam de recipiente ou contexto!",
+    )
+    return [modificador, f"por {substantivo}", f"de {recipiente or contexto}?"]
+
+
+# applied in order to every title; "de projeto de" isn't replaced before the places
+# replaced by an earlier pattern, which would have changed its last "de"
+SUBSTITUTIONS = {
+    r"\bem amazônia azul": "na Amazônia Azul",
+    r"\bde amazônia azul": "da Amazônia Azul",
+    r"\bem brasil": "no Brasil",
+    r"\bde brasil": "do Brasil",
+    r"\bem oceano": "no oceano",
+    r"\bde oceano": "do oceano",
+    r"\bde governo": "do governo",
+    r"\bde mundo": "do mundo",
+    r"\bem ambiente": "no ambiente",
+    r"\bde branqueamento": "do branqueamento",
+    r"\bde poluição": "da poluição",
+    r"\bum tartaruga": "uma tartaruga",
+    r"\bde projeto de"
+    r"(?! (?:amazônia azul|brasil|oceano|governo|mundo|branqueamento|poluição))": (
+        "do projeto"
+    ),
+    r"\s+\?": "?",
+    r"\s+": " ",
+}
+
+# none of the patterns can match what another one replaces, so all of them are
+# applied in a single pass, each being a group of the alternation
+SUBSTITUTION_PATTERN = re.compile("|".join(f"({p})" for p in SUBSTITUTIONS))
+REPLACEMENTS = list(SUBSTITUTIONS.values())
+
+
+def substitute(titulo: str) -> str:
+    return SUBSTITUTION_PATTERN.sub(lambda m: REPLACEMENTS[m.lastindex - 1], titulo)
+
+
 def get_title(js: Mapping, contexts: List[str]) -> str:
     """
     Returns a title for a node based on modificador, substantivo, recipiente
@@ -37,224 +299,32 @@ def get_title(js: Mapping, contexts: List[str]) -> str:
     modificador = js["modificador"].replace("-", " ")
     substantivo = js["substantivo"].replace("-", " ")
     recipiente = js["recipiente"].replace("-", " ")
-
     contexto = "/".join(contexts)
-    trechos = []
-
-    if modificador in ["causa"]:
-        if not (contexto or recipiente):
-            raise ValueError(
-                f"Perguntas do tipo 'causa' precisam de recipiente ou contexto!"
-                f" Pergunta: {js['pergunta']}"
-            )
-        trechos.append(modificador)
-        if substantivo:
-            trechos.append(f"de {substantivo}")
-        if recipiente:
-            trechos.append(f"de {recipiente}")
-        if contexto:
-            trechos.append(f"de {contexto}")
-        trechos.append("?")
-    elif modificador in ["composição"]:
-        alvo = recipiente or contexto
-        if alvo[-1] == "s":
-            trechos.append("Do que são feitos")
-        else:
-            trechos.append("Do que é feito")
-        if substantivo:
-            trechos.append(f"{substantivo} de")
-        trechos.append(recipiente or contexto)
-    elif modificador in ["definição"]:
-        if not (recipiente or contexto):
-            raise ValueError(
-                f"Perguntas do tipo 'definição' precisam de recipiente ou de contexto! "
-                f"Pergunta: {js['pergunta']}"
-            )
-        if recipiente:
-            if contexto:
-                trechos.append(f"{contexto}:")
-            trechos.append(modificador)
-            if substantivo:
-                trechos.append(f"de {substantivo}")
-            trechos.append(f"de {recipiente}?")
-        elif contexto:
-            trechos.append(modificador)
-            if substantivo:
-                trechos.append(f"de {substantivo}")
-            trechos.append(f"de {contexto}?")
-    elif modificador in ["detalhar"]:
-        if not (recipiente or contexto):
-            raise ValueError(
-                f"Perguntas do tipo 'detalhar' precisam de recipiente ou de contexto! "
-                f"Pergunta: {js['pergunta']}"
-            )
-        trechos.append(modificador)
-        if substantivo:
-            trechos.append(f"{substantivo}")
-        if recipiente:
-            trechos.append(f"de {recipiente}")
-        if contexto:
-            trechos.append(f"de {contexto}")
-    elif modificador in ["diferença"]:
-        trechos.append(modificador)
-        trechos.append(f"entre {substantivo}")
-        trechos.append(f"e {recipiente or contexto}?")
-    elif modificador in ["é"]:
-        if not (
-            (substantivo and contexto)
-            or (recipiente and contexto)
-            or (substantivo and recipiente)
-        ):
-            raise ValueError(
-                f"Perguntas do tipo 'é' precisam de dois entre substantivo, recipiente "
-                f"e contexto! Pergunta: {js['pergunta']}"
-            )
-        else:
-            trechos.append(substantivo or contexto)
-            trechos.append(f"é {recipiente or contexto}?")
-    elif modificador in ["efeito"]:
-        trechos.append(modificador)
-        if substantivo:
-            trechos.append(f"de {substantivo}")
-        if recipiente:
-            if contexto:
-                trechos.append(f"de {contexto}")
-            trechos.append(f"em {recipiente}")
-        else:
-            trechos.append(f"em {contexto}")
-        trechos.append("?")
-    elif modificador in ["existe"]:
-        if not recipiente:
-            raise ValueError(
-                f"Perguntas do tipo 'existe' precisam de recipiente! "
-                f"Pergunta: {js['pergunta']}"
-            )
-        if contexto:
-            trechos.append(contexto + ":")
-        trechos.append(modificador)
-        if substantivo:
-            trechos.append(substantivo)
-        trechos.append(f"em {recipiente}?")
-    elif modificador in ["explicar"]:
-        trechos.append(modificador)
-        if substantivo:
-            trechos.append(substantivo)
-            if recipiente:
-                trechos.append(f"de {recipiente}")
-            if contexto:
-                trechos.append(f"de {contexto}")
-        else:
-            trechos.append(contexto)
-    elif modificador in ["listar"]:
-        if substantivo:
-            if recipiente:
-                if contexto:
-                    trechos.append(f"{contexto}:")
-                trechos.append(modificador)
-                trechos.append(plural(substantivo))
-                trechos.append(f"de {recipiente}")
-            else:
-                trechos.append(modificador)
-                trechos.append(plural(substantivo))
-                if contexto:
-                    trechos.append(f"de {contexto}")
-        else:
-            trechos.append(modificador)
-            trechos.append(contexto)
-    elif modificador in ["maior", "menor"]:
-        trechos.append(modificador)
-        if substantivo:
-            trechos.append(substantivo)
-        if contexto:
-            trechos.append(f"de {contexto}")
-        if recipiente:
-            trechos.append(f"de {recipiente}")
-        trechos.append("?")
-    elif modificador in ["maiores", "menores"]:
-        trechos.append(modificador)
-        trechos.append(plural(substantivo))
-        if contexto:
-            trechos.append(f"de {contexto}")
-        if recipiente:
-            trechos.append(f"de {recipiente}")
-        trechos.append("?")
-    elif modificador in ["onde"]:
-        if not (contexto or recipiente):
-            raise ValueError(
-                f"Perguntas do tipo 'detalhar' precisam de recipiente ou contexto!"
-                f" Pergunta: {js['pergunta']}"
-            )
-        trechos.append(f"{modificador} tem")
-        if substantivo:
-            trechos.append(plural(substantivo))
-            trechos.append(f"de {recipiente or contexto}")
-        else:
-            trechos.append(contexto)
-            if recipiente:
-                trechos.append(f"em {recipiente}")
-        trechos.append("?")
-    elif modificador in ["porque"]:
-        if not contexto:
-            raise ValueError(
-                f"Perguntas do tipo 'porque' precisam de contexto!"
-                f" Pergunta: {js['pergunta']}"
-            )
-        trechos.append(f"{contexto}:")
-        if recipiente:
-            trechos.append(recipiente)
-        trechos.append("por que?")
-    elif modificador in ["quantidade"]:
-        if not (substantivo or contexto):
-            raise ValueError(
-                f"Perguntas do tipo 'quantidade' precisam de substantivo ou contexto!"
-                f" Pergunta: {js['pergunta']}"
-            )
-        if substantivo:
-            trechos.append(f"{contexto}:")
-            trechos.append(modificador)
-            trechos.append(f"de {plural(substantivo)}")
-        else:
-            trechos.append(modificador)
-            trechos.append(f"de {contexto}")
-        if recipiente:
-            trechos.append(f"em {recipiente}")
-        trechos.append("?")
-    elif modificador in ["responsável"]:
-        if not substantivo:
-            raise ValueError(
-                f"Perguntas do tipo 'responsável' precisam de substantivo! "
-                f"Pergunta: {js['pergunta']}"
-            )
-        if not (contexto or recipiente):
-            raise ValueError(
-                f"Perguntas do tipo 'responsável' precisam de recipiente ou contexto! "
-                f"Pergunta: {js['pergunta']}"
-            )
-        trechos.append(modificador)
-        trechos.append(f"por {substantivo}")
-        trechos.append(f"de {recipiente or contexto}?")
-    else:
+
+    if modificador not in TEMPLATES:
         raise NotImplementedError(f"Modificador '{modificador}' não programado!")
+    try:
+        trechos = TEMPLATES[modificador](modificador, substantivo, recipiente, contexto)
+    except ValueError as e:
+        raise ValueError(f"{e} Pergunta: {js['pergunta']}") from e
     trechos[0] = trechos[0].capitalize()
-    titulo = " ".join(trechos)
-    titulo = titulo.strip()
-    substituir = {
-        r"\bem amazônia azul": "na Amazônia Azul",
-        r"\bde amazônia azul": "da Amazônia Azul",
-        r"\bem brasil": "no Brasil",
-        r"\bde brasil": "do Brasil",
-        r"\bem oceano": "no oceano",
-        r"\bde oceano": "do oceano",
-        r"\bde governo": "do governo",
-        r"\bde mundo": "do mundo",
-        r"\bem ambiente": "no ambiente",
-        r"\bde branqueamento": "do branqueamento",
-        r"\bde poluição": "da poluição",
-        r"\bum tartaruga": "uma tartaruga",
-        r"\bde projeto de": "do projeto",
-        r"\s+\?": "?",
-        r"\s+": " ",
-    }
-    for pattern, subs in substituir.items():
-        titulo = re.sub(pattern, subs, titulo)
-    return titulo
+    return substitute(" ".join(trechos).strip())
+
+
+def get_titles(df: pd.DataFrame, contexts: List[List[str]]) -> List[str]:
+    """
+    Returns the title of every question, given the contexts of each. Raises a single
+    ValueError with the problems of all the questions which can't get a title.
+    """
+    titles, errors = [], []
+    records = df[["pergunta", "modificador", "substantivo", "recipiente"]]
+    for js, question_contexts in zip(records.to_dict(orient="records"), contexts):
+        try:
+            titles.append(get_title(js, question_contexts))
+        except (ValueError, NotImplementedError) as e:
+            errors.append(str(e))
+    if errors:
+        raise ValueError(
+            f"{len(errors)} perguntas não têm título:\n\t- " + "\n\t- ".join(errors)
+        )
+    return titles
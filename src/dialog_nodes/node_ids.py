@@ -0,0 +1,65 @@
+# Filter-MSMARCO
+# @File:   node_ids.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+import hashlib
+import uuid
+from collections import defaultdict
+from typing import Dict, Mapping
+
+
+def new_dialog_node() -> str:
+    return f"node_{uuid.uuid4().hex[:16]}"
+
+
+def node_key(path: str, role: str, intent: str = "") -> str:
+    """
+    Returns a key which describes where a generated node is in the tree, e.g.
+    'Respostas/#some-intent/answer' or 'Intenção/corais/anything_else'.
+    """
+    return "/".join(filter(None, [path, f"#{intent}" if intent else "", role]))
+
+
+class NodeIds:
+    """
+    Gives dialog_node ids to generated nodes from their keys. Keys found in previous
+    get their previous id back, others get a new random one. Raises ValueError if a
+    key is used twice or if two keys get the same id.
+
+    Every id given is recorded in assigned, grouped by the spreadsheet row (the intent)
+    it was given for, or under "" for folders and other nodes shared by all rows.
+    """
+
+    def __init__(self, previous: Mapping[str, str] = None):
+        self.previous = dict(previous or {})
+        self.assigned: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self._ids: Dict[str, str] = {}
+        self._keys: Dict[str, str] = {}
+
+    def __call__(self, key: str, row: str = "") -> str:
+        if key in self._ids:
+            raise ValueError(f"There are two generated nodes with the key '{key}'")
+        dialog_node = self.previous.get(key) or self.new_id(key)
+        if dialog_node in self._keys:
+            raise ValueError(
+                f"The keys '{self._keys[dialog_node]}' and '{key}' got the same "
+                f"dialog_node: {dialog_node}"
+            )
+        self._ids[key] = dialog_node
+        self._keys[dialog_node] = key
+        self.assigned[row][key] = dialog_node
+        return dialog_node
+
+    def new_id(self, key: str) -> str:
+        return new_dialog_node()
+
+
+class ContentIds(NodeIds):
+    """
+    Derives the ids of new keys from the keys themselves, so that the same spreadsheet
+    always gives the same ids.
+    """
+
+    def new_id(self, key: str) -> str:
+        return f"node_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
@@ -0,0 +1,230 @@
+# Filter-MSMARCO
+# @File:   node_index.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import (
+    Collection,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+
+def is_empty(value) -> bool:
+    """Returns whether a node field is unset (None, nan or an empty string)."""
+    return value is None or value != value or value == ""
+
+
+def build_sibling_indexes(
+    dialog_nodes: Sequence[str],
+    parents: Sequence[Optional[str]],
+    previous_siblings: Sequence[Optional[str]],
+):
+    """
+    Builds two hash indexes over the positions of the nodes:
+    - first_child: parent -> first child (the root level uses None as parent);
+    - next_sibling: previous_sibling -> node.
+    Raises ValueError if two nodes claim the same slot, since the interface can only
+    show one of them there.
+    """
+    first_child: Dict[Hashable, int] = {}
+    next_sibling: Dict[str, int] = {}
+    collisions = []
+    for i, (parent, previous) in enumerate(zip(parents, previous_siblings)):
+        if is_empty(previous):
+            index, key = first_child, None if is_empty(parent) else parent
+        else:
+            index, key = next_sibling, previous
+        if key in index:
+            collisions.append(dialog_nodes[i])
+        index[key] = i
+    if collisions:
+        raise ValueError(
+            f"There are nodes sharing a parent and previous_sibling: "
+            f"{', '.join(collisions)}"
+        )
+    return first_child, next_sibling
+
+
+def get_interface_order(
+    dialog_nodes: Sequence[str],
+    parents: Sequence[Optional[str]],
+    previous_siblings: Sequence[Optional[str]],
+    outer_nodes: Collection[str] = (),
+) -> List[int]:
+    """
+    Returns the positions of the nodes in the order they appear on the interface: each
+    node comes right after its previous sibling's subtree, or right after its parent if
+    it is a first child. Subtrees hanging from one of outer_nodes (nodes which exist in
+    the skill, but not among these) come after the root level, in their input order.
+
+    The indexes are built once and the tree is walked depth-first with an explicit
+    stack, so this is linear on the number of nodes. Raises ValueError when there are
+    cycles or nodes which can't be reached.
+    """
+    first_child, next_sibling = build_sibling_indexes(
+        dialog_nodes, parents, previous_siblings
+    )
+    inner_nodes = set(dialog_nodes)
+    outer_nodes = set(outer_nodes)
+    outer_starts = sorted(
+        i
+        for key, i in chain(first_child.items(), next_sibling.items())
+        if key not in inner_nodes and key in outer_nodes
+    )
+    starts = [first_child[None]] if None in first_child else []
+    starts += outer_starts
+
+    order = []
+    for start in starts:
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            node = dialog_nodes[i]
+            # the sibling is pushed first so that the children are visited before it
+            if node in next_sibling:
+                stack.append(next_sibling[node])
+            if node in first_child:
+                stack.append(first_child[node])
+
+    if len(order) < len(dialog_nodes):
+        raise_unreachable(dialog_nodes, parents, previous_siblings, set(order))
+    return order
+
+
+def raise_unreachable(
+    dialog_nodes: Sequence[str],
+    parents: Sequence[Optional[str]],
+    previous_siblings: Sequence[Optional[str]],
+    reached: set,
+):
+    """
+    Every node hangs from exactly one slot of the sibling indexes, so the walk never
+    visits a node twice and cycles show up as unreachable nodes. Follows each of them
+    up through previous_sibling (or parent, for first children) to tell the ones
+    stuck in a cycle from the ones that are just orphans.
+    """
+    position = {node: i for i, node in enumerate(dialog_nodes)}
+
+    def above(i: int) -> Optional[int]:
+        previous = previous_siblings[i]
+        return position.get(parents[i] if is_empty(previous) else previous)
+
+    in_cycle = set()
+    checked = set()
+    for start in range(len(dialog_nodes)):
+        path = {}
+        i = start
+        while i is not None and i not in reached and i not in checked:
+            checked.add(i)
+            path[i] = len(path)
+            i = above(i)
+        if i in path:
+            in_cycle.update(list(path)[path[i] :])
+
+    errors = []
+    if in_cycle:
+        cycle = [node for i, node in enumerate(dialog_nodes) if i in in_cycle]
+        errors.append(f"There are nodes in a cycle: {', '.join(cycle)}")
+    orphans = [
+        node
+        for i, node in enumerate(dialog_nodes)
+        if i not in reached and i not in in_cycle
+    ]
+    if orphans:
+        errors.append(
+            f"There are nodes which can't be reached from the root: "
+            f"{', '.join(orphans)}"
+        )
+    raise ValueError("\n".join(errors))
+
+
+def build_jump_index(next_steps: Sequence) -> Dict[str, List[int]]:
+    """Returns a reverse index of jumps: dialog_node -> positions which jump to it."""
+    jumps_to = defaultdict(list)
+    for i, next_step in enumerate(next_steps):
+        if isinstance(next_step, dict) and next_step.get("behavior") == "jump_to":
+            jumps_to[next_step.get("dialog_node")].append(i)
+    return jumps_to
+
+
+def build_children_index(parents: Sequence[Optional[str]]) -> Dict[str, List[int]]:
+    """Returns an index of parent -> positions of its children."""
+    children = defaultdict(list)
+    for i, parent in enumerate(parents):
+        if not is_empty(parent):
+            children[parent].append(i)
+    return children
+
+
+def get_node_chains(
+    dialog_nodes: Sequence[str],
+    parents: Sequence[Optional[str]],
+    next_steps: Sequence,
+    starts: Mapping[Hashable, Iterable[int]],
+) -> Dict[Hashable, List[int]]:
+    """
+    For every key in starts, returns the positions of its start nodes and of all nodes
+    which depend on them: nodes that jump to them and their children, transitively.
+    A node is only returned under the first key that reaches it.
+    """
+    jumps_to = build_jump_index(next_steps)
+    children = build_children_index(parents)
+
+    seen = set()
+    chains = {}
+    for key, positions in starts.items():
+        stack = [i for i in positions if i not in seen]
+        seen.update(stack)
+        chain_ = []
+        while stack:
+            i = stack.pop()
+            chain_.append(i)
+            node = dialog_nodes[i]
+            for j in chain(jumps_to.get(node, ()), children.get(node, ())):
+                if j not in seen:
+                    seen.add(j)
+                    stack.append(j)
+        chains[key] = sorted(chain_)
+    return chains
+
+
+@dataclass
+class DropReport:
+    """The dialog nodes dropped (or which would be, on a dry run) for each intent."""
+
+    nodes: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def intents(self) -> List[str]:
+        return list(self.nodes)
+
+    @property
+    def dialog_nodes(self) -> List[str]:
+        return [node for nodes in self.nodes.values() for node in nodes]
+
+    def __str__(self) -> str:
+        lines = [
+            f"{len(self.nodes)} intents, {len(self.dialog_nodes)} nodes to drop:",
+            *(f"#{intent}: {', '.join(nodes)}" for intent, nodes in self.nodes.items()),
+        ]
+        return "\n\t".join(lines)
+
+
+def get_intents_to_remove(intents: Iterable[str], excess: int) -> List[str]:
+    """
+    Returns which of the intents to remove to get rid of some excess: the last ones
+    in alphabetical order.
+    """
+    if excess <= 0:
+        return []
+    return sorted(set(filter(None, intents)))[-excess:]
@@ -0,0 +1,204 @@
+# Filter-MSMARCO
+# @File:   fuzzy_match.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+A local stand-in for Watson's fuzzy_match of entities: finds the values (and
+synonyms) of the entities of a skill in a text, allowing a few misspelled letters in
+each word, and reports the values which can be mistaken for each other.
+
+Phrases are accent-folded with src.utils.sanitize and split into words, which are
+kept in a trie, so every value starting at a word is found in one walk. Misspellings
+are found with a symmetric deletion index: a word and a value's word are within
+distance k when deleting up to k letters from each of them gives a common string,
+which is then confirmed with a bounded edit distance.
+
+    python -m src.entities.fuzzy_match results/skill-Amazônia-Azul2.json
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+
+from src.runtime.understanding import Entities, normalize
+
+EntityValue = Tuple[str, str]
+
+
+def get_max_distance(word: str) -> int:
+    """Returns how many letters of a word may be misspelled: none in short words."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 7:
+        return 1
+    return 2
+
+
+def get_deletions(word: str, distance: int) -> Set[str]:
+    """Returns the strings made by deleting up to distance letters of a word."""
+    deletions = {word}
+    current = {word}
+    for _ in range(distance):
+        current = {w[:i] + w[i + 1 :] for w in current for i in range(len(w))}
+        deletions |= current
+    return deletions
+
+
+def get_edit_distance(a: str, b: str, limit: int) -> int:
+    """Returns the Levenshtein distance of a and b, or limit + 1 if it's greater."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, letter in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (letter != other))
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+@dataclass(frozen=True)
+class EntityMatch:
+    """A value found in words[start:end] of a normalized text."""
+
+    entity: str
+    value: str
+    start: int
+    end: int
+    text: str
+    distance: int
+
+
+class TrieNode:
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children: Dict[str, TrieNode] = {}
+        self.values: List[EntityValue] = []
+
+
+class FuzzyEntityMatcher:
+    """Finds the values of the entities of a skill in texts, allowing misspellings."""
+
+    def __init__(self, entities: List[dict]):
+        self.root = TrieNode()
+        self.phrases: Dict[EntityValue, List[str]] = defaultdict(list)
+        for entity in entities:
+            for value in entity.get("values", []):
+                key = (entity["entity"], value["value"])
+                for phrase in [value["value"], *value.get("synonyms", [])]:
+                    phrase = normalize(phrase)
+                    if phrase and phrase not in self.phrases[key]:
+                        self.phrases[key].append(phrase)
+                        self._insert(phrase.split(), key)
+
+        # deletion -> the words of the values which it can be made from
+        self.deletions: Dict[str, Set[str]] = defaultdict(set)
+        for word in self.words:
+            for deletion in get_deletions(word, get_max_distance(word)):
+                self.deletions[deletion].add(word)
+
+    def _insert(self, words: List[str], key: EntityValue):
+        node = self.root
+        for word in words:
+            node = node.children.setdefault(word, TrieNode())
+        if key not in node.values:
+            node.values.append(key)
+
+    @property
+    def words(self) -> Set[str]:
+        words, nodes = set(), [self.root]
+        while nodes:
+            node = nodes.pop()
+            words.update(node.children)
+            nodes.extend(node.children.values())
+        return words
+
+    def get_similar(self, word: str) -> Dict[str, int]:
+        """Returns the words of the values close enough to a word, with distances."""
+        limit = get_max_distance(word)
+        candidates = set()
+        for deletion in get_deletions(word, limit):
+            candidates |= self.deletions.get(deletion, set())
+        similar = {}
+        for candidate in candidates:
+            allowed = min(limit, get_max_distance(candidate))
+            distance = get_edit_distance(word, candidate, allowed)
+            if distance <= allowed:
+                similar[candidate] = distance
+        return similar
+
+    def extract(self, text: str) -> List[EntityMatch]:
+        """Returns every value found in a text, by start and then by end."""
+        words = normalize(text).split()
+        similar = {word: self.get_similar(word) for word in set(words)}
+        matches = []
+        for start in range(len(words)):
+            # the trie nodes reached so far, with the distance on the way
+            reached = [(self.root, 0)]
+            for end in range(start + 1, len(words) + 1):
+                reached = [
+                    (node.children[word], total + distance)
+                    for node, total in reached
+                    for word, distance in similar[words[end - 1]].items()
+                    if word in node.children
+                ]
+                if not reached:
+                    break
+                best: Dict[EntityValue, int] = {}
+                for node, total in reached:
+                    for key in node.values:
+                        best[key] = min(best.get(key, total), total)
+                phrase = " ".join(words[start:end])
+                for (entity, value), distance in best.items():
+                    matches.append(EntityMatch(entity, value, start, end, phrase, distance))
+        return matches
+
+    def __call__(self, text: str) -> Entities:
+        """Returns the (entity, value) pairs found in a text, for the DialogRuntime."""
+        return list(dict.fromkeys((m.entity, m.value) for m in self.extract(text)))
+
+    def find_ambiguous(self) -> List[Tuple[EntityValue, EntityValue, int]]:
+        """
+        Returns the pairs of values with a phrase which matches a phrase of the other
+        as a whole, with the distance between them. Values of different entities with
+        the same phrase are included, with distance 0.
+        """
+        ambiguous: Dict[Tuple[EntityValue, EntityValue], int] = {}
+        for key, phrases in self.phrases.items():
+            for phrase in phrases:
+                length = len(phrase.split())
+                for match in self.extract(phrase):
+                    other = (match.entity, match.value)
+                    if other == key or match.start != 0 or match.end != length:
+                        continue
+                    pair = tuple(sorted([key, other]))
+                    ambiguous[pair] = min(ambiguous.get(pair, match.distance), match.distance)
+        return [(*pair, distance) for pair, distance in sorted(ambiguous.items())]
+
+
+def get_overlapping(matches: Iterable[EntityMatch]) -> List[Tuple[EntityMatch, EntityMatch]]:
+    """Returns the pairs of matches of different values over the same words."""
+    by_span = defaultdict(list)
+    for match in matches:
+        by_span[match.start, match.end].append(match)
+    return [pair for span in by_span.values() for pair in combinations(span, 2)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    from src.io.file_operations import load_skill
+
+    skill = load_skill(sys.argv[1])
+    matcher = FuzzyEntityMatcher(skill["entities"])
+    ambiguous = matcher.find_ambiguous()
+    print(f"{len(ambiguous)} pairs of values can be mistaken for each other:")
+    for (entity, value), (other_entity, other_value), distance in ambiguous:
+        print(f"\t@{entity}:({value}) ~ @{other_entity}:({other_value}) [{distance}]")
@@ -3,75 +3,207 @@
 # @Time:   17/11/2021
 # @Author: Gabriel O.
 
+import logging
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
+from typing import List
+
+import pandas as pd
 
 from src.dialog_nodes.NodeOrganizer import NodeOrganizer
-from src.dialog_nodes.dialog_node_operations import convert_to_list, get_dialog_nodes
+from src.dialog_nodes.dialog_node_operations import get_dialog_nodes
+from src.dialog_nodes.node_ids import ContentIds, NodeIds
 from src.entities.entity_operations import get_entities
 from src.intents.intent_operations import get_intents
-from src.io.file_operations import load_questions, load_skill, save_skill
+from src.io.file_operations import (
+    get_saved_path,
+    load_questions,
+    load_skill,
+    save_skill,
+)
+from src.skills.incremental import (
+    fingerprint_rows,
+    get_changes,
+    get_manifest_path,
+    get_reusable_ids,
+    load_manifest,
+    make_manifest,
+    save_manifest,
+)
 from src.skills.skill_operations import mix_skills
 from src.utils.list_dict_operations import mix_list, remove
-from tests import unit, collisions
-
-
-def main(confidence: float, limit: int = 0):
-    sheet_path = Path(__file__).parent / "../results/Perguntas.xlsx"
-    questions = load_questions(sheet_path.resolve().as_posix())
-
-    skill_path = Path(__file__).parent / "../results/skill-Amazônia-Azul.json"
-    old_skill = load_skill(skill_path.resolve().as_posix())
-
-    new_intents = get_intents(questions)
-    print("Intents obtained!")
-    mixed_intents = mix_list(old_skill["intents"], new_intents)
-    print("Intents mixed!")
+from src.utils.logs import setup_logging
+from src.utils.tracing import StageTracer, stage, tracing
+from tests import unit, collisions, dialog_flow
+
+
+SHEET_PATH = Path(__file__).parent / "../results/Perguntas.xlsx"
+SKILL_PATH = Path(__file__).parent / "../results/skill-Amazônia-Azul.json"
+
+logger = logging.getLogger(__name__)
+
+
+def main(
+    confidence: float,
+    limit: int = 0,
+    organizer: type = NodeOrganizer,
+    incremental: bool = False,
+    trace_path: str = None,
+    profile_dir: str = None,
+    compact: bool = False,
+):
+    """
+    Generates the skill from the spreadsheet. The organizer can be either the
+    NodeOrganizer or the GraphOrganizer, which give the same output.
+
+    Generated nodes get ids derived from where they are in the tree, so the same
+    input always gives the same skill. On incremental builds, nodes of rows which
+    haven't changed since the last incremental build keep their previous ids, and a
+    manifest of the ids and of what changed is saved next to the skill.
+
+    Every stage is timed. Given a trace path, the time, CPU time, peak memory and
+    counts of every stage are saved there as JSON; given a profile directory, every
+    stage is profiled with cProfile too. Compact skills have no whitespace, for
+    uploading.
+    """
+    tracer = StageTracer(memory=trace_path is not None, profile_dir=profile_dir)
+    with tracing(tracer):
+        with stage("load_questions", "Questions loaded!") as counts:
+            questions = load_questions(SHEET_PATH.resolve().as_posix())
+            counts["rows"] = len(questions)
+        skill_path = SKILL_PATH.resolve()
+        with stage("load_skill", "Old skill loaded!") as counts:
+            old_skill = load_skill(skill_path.as_posix())
+            counts["dialog_nodes"] = len(old_skill["dialog_nodes"])
+
+        node_ids = ContentIds()
+        if incremental:
+            manifest_path = get_manifest_path(get_saved_path(skill_path))
+            manifest = load_manifest(manifest_path)
+            fingerprints = fingerprint_rows(questions)
+            node_ids = ContentIds(get_reusable_ids(manifest, fingerprints))
+
+        mixed_skill = build_skill(
+            questions, old_skill, confidence, limit, organizer, node_ids
+        )
+        with stage("save_skill") as counts:
+            save_skill(skill_path, mixed_skill, compact)
+            counts["dialog_nodes"] = len(mixed_skill["dialog_nodes"])
+
+        if incremental:
+            changes = get_changes(manifest, fingerprints)
+            save_manifest(manifest_path, make_manifest(fingerprints, node_ids, changes))
+            logger.info(
+                "Rows changed since the last build!",
+                extra={"fields": {k: len(v) for k, v in changes.items()}},
+            )
+
+    if trace_path:
+        tracer.save(trace_path)
+    logger.info(
+        "Finished at %s", datetime.now().strftime("%H:%M"),
+        extra={"fields": {"seconds": tracer.to_dict()["seconds"]}},
+    )
 
-    new_entities = get_entities(questions)
-    print("Entities obtained!")
-    key_priority = {"conditions": 1, "title": 0}
-    mixed_entities = mix_list(old_skill["entities"], new_entities, key_priority)
-    mixed_entities.sort(key=lambda x: x["entity"])
-    print("Entities mixed!")
 
-    new_nodes = get_dialog_nodes(questions, confidence)
-    print("Nodes obtained!")
+def build_skill(
+    questions: pd.DataFrame,
+    old_skill: dict,
+    confidence: float,
+    limit: int = 0,
+    organizer: type = NodeOrganizer,
+    node_ids: NodeIds = None,
+) -> dict:
+    """
+    Returns the skill made of the old skill and the questions, after testing it.
+    Neither the questions nor the old skill are changed, so they can be used to build
+    other skills.
+    """
+    with stage("get_intents", "Intents obtained!") as counts:
+        new_intents = get_intents(questions)
+        counts["intents"] = len(new_intents)
+    with stage("mix_intents", "Intents mixed!") as counts:
+        mixed_intents = mix_list(old_skill["intents"], new_intents)
+        counts["intents"] = len(mixed_intents)
+
+    with stage("get_entities", "Entities obtained!") as counts:
+        new_entities = get_entities(questions)
+        counts["entities"] = len(new_entities)
+    with stage("mix_entities", "Entities mixed!") as counts:
+        key_priority = {"conditions": 1, "title": 0}
+        mixed_entities = mix_list(old_skill["entities"], new_entities, key_priority)
+        mixed_entities.sort(key=lambda x: x["entity"])
+        counts["entities"] = len(mixed_entities)
+
+    mixed_nodes = get_mixed_nodes(questions, old_skill, confidence, node_ids)
+
+    with stage("organize", "Nodes organized!") as counts:
+        node_organizer = organizer(mixed_nodes)
+        node_organizer.run(intent_limit=limit)
+        counts["dialog_nodes"] = len(node_organizer)
+
+    with stage("remove_intents", "Unused intents removed!") as counts:
+        used_intents = node_organizer.get_intents()
+        removed_intents = remove(mixed_intents, used_intents)
+        mixed_intents = [
+            intent for intent in mixed_intents if intent["intent"] in used_intents
+        ]
+        counts["intents"] = len(mixed_intents)
+
+    with stage("test_collisions"):
+        collisions.run(node_organizer)
+    with stage("convert_to_list") as counts:
+        organized_nodes = node_organizer.to_list()
+        counts["dialog_nodes"] = len(organized_nodes)
+    with stage("test_unit"):
+        unit.run(pd.DataFrame(organized_nodes))
+
+    with stage("mix_skills"):
+        mixed_skill = mix_skills(
+            old_skill,
+            intents=mixed_intents,
+            entities=mixed_entities,
+            dialog_nodes=organized_nodes,
+        )
+    with stage("test_dialog_flow"):
+        dialog_flow.run(mixed_skill)
+    return mixed_skill
+
+
+def get_mixed_nodes(
+    questions: pd.DataFrame,
+    old_skill: dict,
+    confidence: float,
+    node_ids: NodeIds = None,
+) -> List[dict]:
+    """Returns the manual nodes of the old skill mixed with newly generated nodes."""
+    with stage("get_dialog_nodes", "Nodes obtained!") as counts:
+        new_nodes = get_dialog_nodes(questions, confidence, node_ids)
+        counts["dialog_nodes"] = len(new_nodes)
 
     # delete old generated nodes
     old_nodes = old_skill["dialog_nodes"]
     old_nodes = [n for n in old_nodes if re.search(r"node_._", n["dialog_node"])]
 
-    mixed_nodes = mix_list(old_nodes, new_nodes)
-    print("Nodes mixed!")
-
-    node_organizer = NodeOrganizer(mixed_nodes)
-    node_organizer.run(intent_limit=limit)
-
-    used_intents = node_organizer.get_intents()
-    removed_intents = remove(mixed_intents, used_intents)
-    mixed_intents = [
-        intent for intent in mixed_intents if intent["intent"] in used_intents
-    ]
-    print("Unused intents removed!")
-
-    collisions.run(node_organizer)
-    unit.run(node_organizer.df)
-
-    organized_nodes = convert_to_list(node_organizer.df)
-    mixed_skill = mix_skills(
-        old_skill,
-        intents=mixed_intents,
-        entities=mixed_entities,
-        dialog_nodes=organized_nodes,
-    )
-    save_skill(skill_path.resolve(), mixed_skill)
-
-    print("Finished at", datetime.now().strftime("%H:%M"))
+    with stage("mix_nodes", "Nodes mixed!") as counts:
+        mixed_nodes = mix_list(old_nodes, new_nodes)
+        counts["dialog_nodes"] = len(mixed_nodes)
+    return mixed_nodes
 
 
 if __name__ == "__main__":
+    # python -m src.generate_skill [trace.json [profile directory]]
+    # --compact writes the skill without whitespace, --json-logs logs JSON lines
     MINIMUM_CONFIDENCE = 0.8
     INTENT_LIMIT = 2000
-    main(confidence=MINIMUM_CONFIDENCE, limit=INTENT_LIMIT)
+    arguments = [a for a in sys.argv[1:] if not a.startswith("--")]
+    setup_logging(as_json="--json-logs" in sys.argv)
+    main(
+        confidence=MINIMUM_CONFIDENCE,
+        limit=INTENT_LIMIT,
+        trace_path=arguments[0] if len(arguments) > 0 else None,
+        profile_dir=arguments[1] if len(arguments) > 1 else None,
+        compact="--compact" in sys.argv,
+    )
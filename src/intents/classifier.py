@@ -0,0 +1,320 @@
+# Filter-MSMARCO
+# @File:   classifier.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+A local intent classifier trained on the examples of get_intents, to see how the
+examples score without Watson and pick the minimum confidence from data.
+
+Texts are turned into TF-IDF vectors of character n-grams and words, kept as sparse
+matrices in plain numpy arrays. The model is a one-vs-rest ridge regression in its
+dual form, so it needs a Gram matrix of the examples instead of a weight per
+feature and intent. An intent's confidence is its score clipped to [0, 1]: like
+Watson's, confidences don't add up to 1, so text about nothing known gets low
+confidence for every intent.
+
+    python -m src.intents.classifier
+"""
+
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.runtime.understanding import (
+    Entities,
+    ExactUnderstanding,
+    Intents,
+    normalize,
+)
+
+
+@dataclass
+class SparseRows:
+    """A CSR matrix: row i has the values data[indptr[i]:indptr[i + 1]] at indices."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    shape: Tuple[int, int]
+
+    def to_columns(self) -> "SparseRows":
+        """Returns the same matrix in CSC, i.e. the CSR of its transpose."""
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        counts = np.bincount(self.indices, minlength=self.shape[1])
+        return SparseRows(
+            np.concatenate([[0], np.cumsum(counts)]),
+            rows[order],
+            self.data[order],
+            (self.shape[1], self.shape[0]),
+        )
+
+
+def sparse_gram(rows: SparseRows, columns: SparseRows) -> np.ndarray:
+    """
+    Returns the dense product of a CSR matrix with the transpose of another, given
+    as its CSC, i.e. the dot products of every row of the first with every row of
+    the second.
+    """
+    n_rows, n_columns = rows.shape[0], columns.shape[1]
+    features = rows.indices
+    starts = columns.indptr[features]
+    lengths = columns.indptr[features + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros((n_rows, n_columns))
+    # for every nonzero of rows, the positions of the nonzeros of its feature
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    positions = offsets + np.arange(total)
+    row_of_entry = np.repeat(np.arange(n_rows), np.diff(rows.indptr))
+    cells = np.repeat(row_of_entry, lengths) * n_columns + columns.indices[positions]
+    weights = np.repeat(rows.data, lengths) * columns.data[positions]
+    gram = np.bincount(cells, weights=weights, minlength=n_rows * n_columns)
+    return gram.reshape(n_rows, n_columns)
+
+
+def get_features(text: str, ngram_range: Tuple[int, int] = (3, 5)) -> Counter:
+    """Counts the words and the character n-grams of each word, padded by spaces."""
+    features = Counter()
+    for word in normalize(text).split():
+        features[f"w:{word}"] += 1
+        padded = f" {word} "
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            if n > len(padded):
+                break
+            for i in range(len(padded) - n + 1):
+                features[padded[i : i + n]] += 1
+        if len(padded) < ngram_range[0]:
+            features[padded] += 1
+    return features
+
+
+class IntentClassifier:
+    """
+    Ridge regression of TF-IDF features onto one-hot intents, solved in the dual:
+    scores = K(texts, examples) @ coefficients, where K holds the dot products of
+    the texts' and the examples' features.
+    """
+
+    def __init__(
+        self,
+        regularization: float = 0.1,
+        ngram_range: Tuple[int, int] = (3, 5),
+        batch_size: int = 1000,
+    ):
+        self.regularization = regularization
+        self.ngram_range = ngram_range
+        self.batch_size = batch_size
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0)
+        self.intents: List[str] = []
+        self.examples = None
+        self.coefficients = np.zeros((0, 0))
+
+    def fit(self, intents: List[dict]) -> "IntentClassifier":
+        """Trains on a list of intents as given by get_intents."""
+        texts, labels = get_labeled_examples(intents)
+        return self.fit_texts(texts, labels)
+
+    def fit_texts(self, texts: Sequence[str], labels: Sequence[str]):
+        counts = [get_features(text, self.ngram_range) for text in texts]
+        document_frequency = Counter(feature for c in counts for feature in c)
+        self.vocabulary = {f: i for i, f in enumerate(sorted(document_frequency))}
+        self.idf = np.array(
+            [
+                math.log((1 + len(texts)) / (1 + document_frequency[f])) + 1
+                for f in self.vocabulary
+            ]
+        )
+        examples = self._vectorize_counts(counts)
+        self.examples = examples.to_columns()
+
+        self.intents = sorted(set(labels))
+        positions = {intent: i for i, intent in enumerate(self.intents)}
+        targets = np.zeros((len(texts), len(self.intents)))
+        targets[np.arange(len(texts)), [positions[label] for label in labels]] = 1
+
+        gram = sparse_gram(examples, self.examples)
+        gram[np.diag_indices_from(gram)] += self.regularization
+        self.coefficients = np.linalg.solve(gram, targets)
+        return self
+
+    def vectorize(self, texts: Iterable[str]) -> SparseRows:
+        return self._vectorize_counts(get_features(t, self.ngram_range) for t in texts)
+
+    def _vectorize_counts(self, counts: Iterable[Counter]) -> SparseRows:
+        """Returns L2-normalized TF-IDF rows, with sublinear term frequencies."""
+        indptr, indices, data = [0], [], []
+        for count in counts:
+            row = [(self.vocabulary[f], n) for f, n in count.items() if f in self.vocabulary]
+            row_indices = np.array([i for i, _ in row], dtype=np.int64)
+            values = (1 + np.log([n for _, n in row])) * self.idf[row_indices]
+            norm = np.linalg.norm(values)
+            indices.append(row_indices)
+            data.append(values / norm if norm else values)
+            indptr.append(indptr[-1] + len(row))
+        return SparseRows(
+            np.array(indptr),
+            np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+            np.concatenate(data) if data else np.zeros(0),
+            (len(indptr) - 1, len(self.vocabulary)),
+        )
+
+    def predict_confidences(self, texts: Sequence[str]) -> np.ndarray:
+        """Returns the confidence of every intent (in self.intents) for every text."""
+        out = np.zeros((len(texts), len(self.intents)))
+        for start in range(0, len(texts), self.batch_size):
+            rows = self.vectorize(texts[start : start + self.batch_size])
+            scores = sparse_gram(rows, self.examples) @ self.coefficients
+            out[start : start + rows.shape[0]] = np.clip(scores, 0, 1)
+        return out
+
+    def predict(
+        self, texts: Sequence[str], top: int = 10
+    ) -> List[List[Tuple[str, float]]]:
+        """Returns the top intents of each text, in the format of the runtime."""
+        confidences = self.predict_confidences(texts)
+        best = np.argsort(-confidences, axis=1, kind="stable")[:, :top]
+        return [
+            [
+                (self.intents[j], float(confidences[i, j]))
+                for j in row
+                if confidences[i, j] > 0
+            ]
+            for i, row in enumerate(best)
+        ]
+
+
+class ClassifierUnderstanding(ExactUnderstanding):
+    """
+    Recognizes intents with an IntentClassifier, trained on the skill's intents
+    unless one is given, and entities by their values, for the DialogRuntime.
+    """
+
+    def __init__(self, skill: dict, classifier: IntentClassifier = None):
+        super().__init__(skill)
+        self.classifier = classifier or IntentClassifier().fit(skill["intents"])
+
+    def __call__(self, text: str) -> Tuple[Intents, Entities]:
+        intents = self.classifier.predict([text])[0]
+        return intents, self.get_entities(text, normalize(text))
+
+
+def get_labeled_examples(intents: List[dict]) -> Tuple[List[str], List[str]]:
+    texts, labels = [], []
+    for intent in intents:
+        for example in intent["examples"]:
+            texts.append(example["text"])
+            labels.append(intent["intent"])
+    return texts, labels
+
+
+def cross_validate(
+    intents: List[dict], folds: int = 5, **kwargs
+) -> pd.DataFrame:
+    """
+    Predicts every example with a classifier trained without it. The first example of
+    each intent (its question) is never held out, since an intent without examples
+    can't be predicted, so intents with a single example aren't evaluated.
+    """
+    texts, labels = get_labeled_examples(intents)
+    fold_of = np.full(len(texts), -1)
+    seen = defaultdict(int)
+    for i, label in enumerate(labels):
+        if seen[label]:
+            fold_of[i] = i % folds
+        seen[label] += 1
+
+    predictions = []
+    for fold in range(folds):
+        held_out = np.flatnonzero(fold_of == fold)
+        if not len(held_out):
+            continue
+        training = np.flatnonzero(fold_of != fold)
+        classifier = IntentClassifier(**kwargs).fit_texts(
+            [texts[i] for i in training], [labels[i] for i in training]
+        )
+        confidences = classifier.predict_confidences([texts[i] for i in held_out])
+        positions = {intent: j for j, intent in enumerate(classifier.intents)}
+        for row, i in zip(confidences, held_out):
+            best = int(np.argmax(row))
+            predictions.append(
+                {
+                    "text": texts[i],
+                    "intent": labels[i],
+                    "predicted": classifier.intents[best],
+                    "confidence": float(row[best]),
+                    "intent_confidence": float(row[positions[labels[i]]]),
+                }
+            )
+    return pd.DataFrame(predictions)
+
+
+def get_confidence_distributions(predictions: pd.DataFrame) -> pd.DataFrame:
+    """Summarizes, by intent, the confidences its examples got for it."""
+    predictions = predictions.assign(hit=predictions.intent == predictions.predicted)
+    grouped = predictions.groupby("intent")
+    return pd.DataFrame(
+        {
+            "examples": grouped.size(),
+            "hit_rate": grouped.hit.mean(),
+            "min": grouped.intent_confidence.min(),
+            "median": grouped.intent_confidence.median(),
+            "mean": grouped.intent_confidence.mean(),
+            "max": grouped.intent_confidence.max(),
+        }
+    )
+
+
+def sweep_thresholds(
+    predictions: pd.DataFrame, thresholds: Iterable[float] = None
+) -> pd.DataFrame:
+    """
+    Returns, for each minimum confidence, the rate of examples which would be
+    answered right, answered wrong or not answered (i.e. fall back).
+    """
+    if thresholds is None:
+        thresholds = np.round(np.arange(0, 1, 0.05), 2)
+    hit = (predictions.intent == predictions.predicted).to_numpy()
+    confidence = predictions.confidence.to_numpy()
+    rows = []
+    for threshold in thresholds:
+        answered = confidence > threshold
+        rows.append(
+            {
+                "threshold": threshold,
+                "right": (answered & hit).mean(),
+                "wrong": (answered & ~hit).mean(),
+                "fallback": (~answered).mean(),
+                "precision": (answered & hit).sum() / max(answered.sum(), 1),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def pick_threshold(sweep: pd.DataFrame, max_wrong: float = 0.05) -> float:
+    """Returns the lowest threshold whose wrong answer rate is at most max_wrong."""
+    allowed = sweep[sweep.wrong <= max_wrong]
+    if allowed.empty:
+        raise ValueError(f"No threshold has a wrong answer rate under {max_wrong}")
+    return float(allowed.threshold.min())
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+
+    from src.intents.intent_operations import get_intents
+    from src.io.file_operations import load_questions
+
+    sheet_path = Path(__file__).parent / "../../results/Perguntas.xlsx"
+    questions = load_questions(sheet_path.resolve().as_posix())
+    cross_validation = cross_validate(get_intents(questions))
+    print(get_confidence_distributions(cross_validation).describe().round(3))
+    sweep = sweep_thresholds(cross_validation)
+    print(sweep.round(3).to_string(index=False))
+    print("Suggested minimum confidence:", pick_threshold(sweep))
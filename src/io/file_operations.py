@@ -3,43 +3,181 @@
 # @Time:   20/11/2021
 # @Author: Gabriel O.
 
+import hashlib
 import json
+import logging
 import os
+import pickle
+import tempfile
 from pathlib import Path
+from typing import List
 
+import openpyxl
 import pandas as pd
 
+from src.io.json_stream import iter_skill_json, write_atomically
 
-def load_questions(filepath: str) -> pd.DataFrame:
-    df = pd.read_excel(filepath, sheet_name="finais")
+logger = logging.getLogger(__name__)
+
+# spreadsheet columns used to generate the skill and what they are renamed to
+QUESTION_COLUMNS = {
+    "Pergunta": "pergunta",
+    "Resposta": "resposta",
+    "Fonte": "fonte",
+    "Intenção": "intent",
+    "Rótulos": "rótulos",
+    "Modificador": "modificador",
+    "Substantivo": "substantivo",
+    "Recipiente": "recipiente",
+    "Elocuções": "examples",
+}
+
+# bump when the way questions are read changes, to invalidate old snapshots
+SNAPSHOT_VERSION = 1
+
+
+def load_questions(
+    filepath: str, sheet_name: str = "finais", use_cache: bool = True
+) -> pd.DataFrame:
+    """
+    Loads the questions from a workbook, or from a .csv or .json export of its sheet
+    with the same headers. Workbooks are cached as a snapshot of the loaded questions,
+    which is used instead of the workbook for as long as the workbook doesn't change.
+    """
+    path = Path(filepath)
+    if path.suffix == ".csv":
+        df = pd.read_csv(path, usecols=list(QUESTION_COLUMNS), dtype=str)
+    elif path.suffix == ".json":
+        df = pd.DataFrame(load_skill(filepath), columns=list(QUESTION_COLUMNS))
+    elif use_cache:
+        return load_cached_questions(path, sheet_name)
+    else:
+        df = read_sheet(path, sheet_name, list(QUESTION_COLUMNS))
+    return prepare_questions(df)
+
+
+def prepare_questions(df: pd.DataFrame) -> pd.DataFrame:
     df = df.dropna(subset=["Resposta"])
-    subs = {
-        "Pergunta": "pergunta",
-        "Resposta": "resposta",
-        "Fonte": "fonte",
-        "Intenção": "intent",
-        "Rótulos": "rótulos",
-        "Modificador": "modificador",
-        "Substantivo": "substantivo",
-        "Recipiente": "recipiente",
-        "Elocuções": "examples",
-    }
-    df = df[subs]
-    df = df.rename(columns=subs)
+    df = df[list(QUESTION_COLUMNS)]
+    df = df.rename(columns=QUESTION_COLUMNS)
     df = df.fillna("")
     return df
 
 
+def read_sheet(filepath: Path, sheet_name: str, columns: List[str]) -> pd.DataFrame:
+    """
+    Reads some columns of a sheet, streaming its rows instead of loading the whole
+    workbook. Gives the same values as pd.read_excel, with None for empty cells.
+    """
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        header = next(rows)
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise ValueError(f"Sheet '{sheet_name}' has no columns {missing}")
+        positions = [header.index(c) for c in columns]
+        data = [[_cell_value(row, i) for i in positions] for row in rows]
+    finally:
+        wb.close()
+    # like pandas, ignore empty rows at the end of the sheet
+    while data and all(v is None for v in data[-1]):
+        data.pop()
+    return pd.DataFrame(data, columns=columns)
+
+
+def _cell_value(row: tuple, i: int):
+    value = row[i] if i < len(row) else None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def get_snapshot_path(filepath: Path, sheet_name: str = "finais") -> Path:
+    """Returns where the snapshot of a sheet is kept; each sheet has its own."""
+    return filepath.parent / ".cache" / f"{filepath.name}.{sheet_name}.pkl"
+
+
+def load_cached_questions(filepath: Path, sheet_name: str = "finais") -> pd.DataFrame:
+    """
+    Returns the questions of a workbook from its snapshot, if there is one for the
+    same sheet and contents. The workbook is only hashed when its modification time
+    or size changed, and only read when its contents changed too.
+    """
+    stat = filepath.stat()
+    key = {
+        "version": SNAPSHOT_VERSION,
+        "sheet_name": sheet_name,
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+    snapshot_path = get_snapshot_path(filepath, sheet_name)
+    snapshot = _read_snapshot(snapshot_path)
+    same_sheet = snapshot.get("version") == key["version"] and snapshot.get(
+        "sheet_name"
+    ) == sheet_name
+    if same_sheet and all(snapshot[k] == key[k] for k in ("mtime", "size")):
+        return snapshot["questions"]
+
+    key["sha1"] = hashlib.sha1(filepath.read_bytes()).hexdigest()
+    if same_sheet and snapshot.get("sha1") == key["sha1"]:
+        questions = snapshot["questions"]
+    else:
+        columns = list(QUESTION_COLUMNS)
+        questions = prepare_questions(read_sheet(filepath, sheet_name, columns))
+    _write_snapshot(snapshot_path, {**key, "questions": questions})
+    return questions
+
+
+def _read_snapshot(filepath: Path) -> dict:
+    try:
+        with open(filepath, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return {}
+
+
+def _write_snapshot(filepath: Path, snapshot: dict):
+    """
+    Writes a snapshot through a temporary file of its own, like write_atomically, so
+    that processes writing the same snapshot at once don't remove each other's file.
+    """
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary_path = tempfile.mkstemp(
+        dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp"
+    )
+    try:
+        with open(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, filepath)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
 def load_skill(filepath: str) -> dict:
     with open(filepath, "r", encoding="utf-8") as f:
         sk = json.load(f)
     return sk
 
 
-def save_skill(filepath: Path, to_save: dict):
+def get_saved_path(filepath: Path) -> Path:
+    """Returns where save_skill saves a skill loaded from filepath."""
     new_stem = f"{filepath.stem}2"
-    new_path = filepath.with_name(new_stem + filepath.suffix)
-    with open(new_path, "w", encoding="utf-8") as f:
-        json.dump(to_save, f, ensure_ascii=False, indent=2)
+    return filepath.with_name(new_stem + filepath.suffix)
+
+
+def write_skill(filepath: Path, to_save: dict, compact: bool = False):
+    """
+    Writes a skill to filepath. Its lists can be generators, which are written one
+    item at a time. Compact skills have no whitespace, for uploading.
+    """
+    write_atomically(filepath, iter_skill_json(to_save, compact))
+
+
+def save_skill(filepath: Path, to_save: dict, compact: bool = False):
+    """Saves a skill next to filepath, as written by write_skill."""
+    new_path = get_saved_path(filepath)
+    write_skill(new_path, to_save, compact)
     common_path = os.path.commonpath([Path(__file__), new_path])
-    print(f"Skill saved as {new_path.relative_to(common_path).as_posix()}!")
+    logger.info("Skill saved as %s!", new_path.relative_to(common_path).as_posix())
@@ -0,0 +1,126 @@
+# Filter-MSMARCO
+# @File:   json_stream.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Writes skills section by section: the lists of a skill (intents, entities,
+dialog_nodes...) can be given as generators and are serialized one item at a time,
+so the whole skill is never held as a single string. The indented output is the
+same as json.dump(skill, ensure_ascii=False, indent=2).
+"""
+
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+INDENT = "  "
+
+
+def get_encoder(compact: bool = False, use_orjson: bool = True) -> Callable:
+    """
+    Returns a function which serializes a value. orjson is only used for compact
+    output, since its indented output isn't the same as the json module's. Compact
+    output is uploaded, so NaN and infinities raise a ValueError with or without
+    orjson, instead of being written as null by one and as NaN by the other.
+    """
+    if compact and use_orjson and orjson is not None:
+        return _encode_orjson
+    if compact:
+        return lambda value: json.dumps(
+            value, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+        )
+    return lambda value: json.dumps(value, ensure_ascii=False, indent=len(INDENT))
+
+
+def _encode_orjson(value) -> str:
+    text = orjson.dumps(value)
+    # orjson writes non-finite floats as null, so values are only checked then
+    if b"null" in text and _has_non_finite(value):
+        raise ValueError("Out of range float values are not JSON compliant")
+    return text.decode("utf-8")
+
+
+def _has_non_finite(value) -> bool:
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(v) for v in value)
+    return False
+
+
+def is_section(value) -> bool:
+    """Returns whether a value of the skill is serialized one item at a time."""
+    return isinstance(value, (list, tuple, Iterator))
+
+
+def iter_skill_json(
+    skill: dict, compact: bool = False, use_orjson: bool = True
+) -> Iterator[str]:
+    """Yields the json of a skill in chunks of at most one list item each."""
+    encode = get_encoder(compact, use_orjson)
+    newline = "" if compact else "\n"
+    key_separator = ":" if compact else ": "
+
+    yield "{"
+    for i, (key, value) in enumerate(skill.items()):
+        yield ("," if i else "") + newline + (0 if compact else 1) * INDENT
+        yield json.dumps(key, ensure_ascii=False) + key_separator
+        if is_section(value):
+            yield from _iter_section(value, encode, compact)
+        else:
+            yield _indent(encode(value), 1, compact)
+    yield (newline if skill else "") + "}"
+
+
+def _iter_section(items: Iterable, encode: Callable, compact: bool) -> Iterator[str]:
+    newline = "" if compact else "\n"
+    prefix = "" if compact else 2 * INDENT
+    empty = True
+    for item in items:
+        yield ("[" if empty else ",") + newline + prefix
+        yield _indent(encode(item), 2, compact)
+        empty = False
+    yield "[]" if empty else newline + ("" if compact else INDENT) + "]"
+
+
+def _indent(text: str, depth: int, compact: bool) -> str:
+    """Indents every line of a value but the first, which is already indented."""
+    if compact:
+        return text
+    return text.replace("\n", "\n" + depth * INDENT)
+
+
+def write_atomically(filepath: Path, chunks: Iterable[str]):
+    """
+    Writes chunks to a temporary file next to filepath and then renames it, so that
+    filepath is never left half-written.
+    """
+    fd, temporary_path = tempfile.mkstemp(
+        dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp"
+    )
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            f.writelines(chunks)
+        # mkstemp only lets the owner read the file
+        os.chmod(temporary_path, 0o666 & ~_get_umask())
+        os.replace(temporary_path, filepath)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def _get_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
@@ -0,0 +1,285 @@
+# Filter-MSMARCO
+# @File:   DialogRuntime.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.dialog_nodes.node_index import build_sibling_indexes
+from src.runtime.conditions import (
+    Condition,
+    Expression,
+    TurnState,
+    compile_context_value,
+    evaluate_context,
+    parse_condition,
+)
+from src.runtime.dispatch import (
+    SiblingDispatch,
+    UnmatchableReport,
+    find_unmatchable,
+    get_known,
+)
+from src.runtime.understanding import Entities, ExactUnderstanding, Intents
+
+
+class RuntimeNode:
+    """A dialog node with its condition and context compiled."""
+
+    __slots__ = (
+        "dialog_node",
+        "title",
+        "is_folder",
+        "conditions",
+        "ast",
+        "condition",
+        "context",
+        "texts",
+        "next_step",
+        "parent",
+        "children",
+        "dispatch",
+    )
+
+    def __init__(self, record: dict):
+        self.dialog_node: str = record["dialog_node"]
+        self.title: Optional[str] = record.get("title")
+        self.is_folder: bool = record.get("type") == "folder"
+        self.conditions: Optional[str] = record.get("conditions")
+        self.ast: Condition = parse_condition(self.conditions)
+        self.condition: Expression = self.ast.compile()
+        self.context = compile_context_value(record.get("context") or {})
+        self.texts: List[str] = get_texts(record.get("output") or {})
+        self.next_step: dict = record.get("next_step") or {}
+        self.parent: Optional[RuntimeNode] = None
+        self.children: List[RuntimeNode] = []
+        self.dispatch: Optional[SiblingDispatch] = None
+
+    def __repr__(self) -> str:
+        return f"RuntimeNode({self.dialog_node}, {self.title or self.conditions!r})"
+
+
+def get_texts(output: dict) -> List[str]:
+    """Returns the first value of each text response and the title of each option."""
+    texts = []
+    for response in output.get("generic", []):
+        if response.get("response_type") == "text" and response.get("values"):
+            texts.append(response["values"][0].get("text", ""))
+        elif response.get("response_type") == "option":
+            texts.append(response.get("title", ""))
+    return texts
+
+
+@dataclass
+class Response:
+    """What the dialog did in a turn."""
+
+    texts: List[str]
+    dialog_nodes: List[str]
+    intents: Intents
+    entities: Entities
+    context: dict = field(default_factory=dict)
+
+
+class DialogRuntime:
+    """
+    Runs the dialog of a skill locally, the way Watson does: every turn, the children
+    of the node waiting for an answer are evaluated, then the root level, in order.
+    Folders are evaluated as if their children were in their place. The first node
+    whose condition holds runs: its context is set, its texts are answered and its
+    next_step is followed:
+    - jump_to goes to another node, either running it (body) or evaluating it and
+      the siblings after it (condition) or waiting for the user (user_input);
+    - skip_user_input evaluates its children right away;
+    - without a next_step, the dialog waits for the user, evaluating the node's
+      children first on the next turn.
+    When no node matches after a jump or skip_user_input, the root anything_else
+    runs instead.
+
+    Conditions and <? ?> context expressions are compiled once, when loading the
+    skill. Conditions which can't be compiled never hold and are kept in
+    invalid_conditions; the ones which can never match are kept in unmatchable.
+    Jumps to nodes which aren't in the skill are never followed and are kept in
+    dangling_jumps.
+    Siblings are indexed by what their conditions require, so that only the ones
+    which can match a turn are evaluated. Intents and entities come from
+    understand, which by default only recognizes the skill's own examples and
+    entity values.
+    """
+
+    def __init__(
+        self,
+        skill: dict,
+        understand: Callable[[str], Tuple[Intents, Entities]] = None,
+        max_steps: int = 100,
+    ):
+        self.understand = understand or ExactUnderstanding(skill)
+        self.max_steps = max_steps
+        self.invalid_conditions: Dict[str, str] = {}
+        self.nodes: Dict[str, RuntimeNode] = {}
+        for record in skill["dialog_nodes"]:
+            try:
+                node = RuntimeNode(record)
+            except ValueError as e:
+                self.invalid_conditions[record["dialog_node"]] = str(e)
+                node = RuntimeNode({**record, "conditions": None})
+            self.nodes[node.dialog_node] = node
+        self.dangling_jumps = self._find_dangling_jumps()
+        self.root = self._link_nodes(skill["dialog_nodes"])
+        self.root_dispatch = get_dispatch(self.root)
+        self.fallbacks = [
+            node for node in self.root if node.conditions == "anything_else"
+        ]
+        self.unmatchable = self._find_unmatchable(get_known(skill))
+        self.context: dict = {}
+        self.waiting: Siblings = ([], None)
+
+    def _link_nodes(self, records: List[dict]) -> List[RuntimeNode]:
+        """Sets the parent and the ordered children of every node."""
+        dialog_nodes = [record["dialog_node"] for record in records]
+        first_child, next_sibling = build_sibling_indexes(
+            dialog_nodes,
+            [record.get("parent") for record in records],
+            [record.get("previous_sibling") for record in records],
+        )
+        children = {}
+        for parent, i in first_child.items():
+            siblings = []
+            while i is not None:
+                siblings.append(self.nodes[dialog_nodes[i]])
+                i = next_sibling.get(dialog_nodes[i])
+            children[parent] = siblings
+        for dialog_node, node in self.nodes.items():
+            node.children = children.get(dialog_node, [])
+            node.dispatch = get_dispatch(node.children)
+            for child in node.children:
+                child.parent = node
+        return children.get(None, [])
+
+    def _find_dangling_jumps(self) -> Dict[str, str]:
+        """Returns the targets of jumps to nodes which don't exist, and drops the jumps."""
+        dangling = {}
+        for node in self.nodes.values():
+            target = node.next_step.get("dialog_node")
+            if node.next_step.get("behavior") == "jump_to" and target not in self.nodes:
+                dangling[node.dialog_node] = target
+                node.next_step = {}
+        return dangling
+
+    def _find_unmatchable(self, known: set) -> UnmatchableReport:
+        jump_targets = {}
+        for node in self.nodes.values():
+            if node.next_step.get("behavior") == "jump_to":
+                target = node.next_step["dialog_node"]
+                selector = node.next_step.get("selector", "body")
+                if jump_targets.get(target, "body") == "body":
+                    jump_targets[target] = selector
+        report = UnmatchableReport()
+        for siblings in [self.root, *(node.children for node in self.nodes.values())]:
+            find_unmatchable(
+                [(n.dialog_node, None if n.is_folder else n.ast) for n in siblings],
+                known,
+                jump_targets,
+                report,
+            )
+        return report
+
+    def reset(self):
+        self.context = {}
+        self.waiting = ([], None)
+
+    def start(self) -> Response:
+        """Starts a new conversation, which runs the welcome node."""
+        self.reset()
+        return self.run_turn(TurnState(context=self.context, start=True))
+
+    def message(self, text: str) -> Response:
+        intents, entities = self.understand(text)
+        return self.run_turn(TurnState(text, intents, entities, self.context))
+
+    def run_turn(self, state: TurnState) -> Response:
+        response = Response([], [], state.intents, state.entities)
+        waiting, self.waiting = self.waiting, ([], None)
+        node = self.find_match(*waiting, state) or self.find_match(
+            self.root, self.root_dispatch, state
+        )
+        for _ in range(self.max_steps):
+            if node is None:
+                break
+            self.execute(node, state, response)
+            node = self.follow_next_step(node, state)
+        else:
+            raise ValueError(
+                f"The dialog didn't stop after {self.max_steps} nodes: "
+                f"{', '.join(response.dialog_nodes[-5:])}"
+            )
+        response.context = dict(self.context)
+        return response
+
+    def find_match(
+        self,
+        siblings: List[RuntimeNode],
+        dispatch: Optional[SiblingDispatch],
+        state: TurnState,
+    ) -> Optional[RuntimeNode]:
+        """
+        Returns the first node whose condition holds, looking inside folders. Only
+        the siblings given by the dispatch are evaluated, if there is one.
+        """
+        positions = range(len(siblings)) if dispatch is None else dispatch.candidates(state)
+        for i in positions:
+            node = siblings[i]
+            if node.is_folder:
+                if node.conditions and not node.condition(state):
+                    continue
+                match = self.find_match(node.children, node.dispatch, state)
+                if match is not None:
+                    return match
+            elif node.condition(state):
+                return node
+        return None
+
+    def execute(self, node: RuntimeNode, state: TurnState, response: Response):
+        for key, value in node.context.items():
+            self.context[key] = evaluate_context(value, state)
+        response.texts.extend(node.texts)
+        response.dialog_nodes.append(node.dialog_node)
+
+    def follow_next_step(
+        self, node: RuntimeNode, state: TurnState
+    ) -> Optional[RuntimeNode]:
+        """Returns the node to run next in this turn, if any."""
+        behavior = node.next_step.get("behavior")
+        if behavior == "jump_to":
+            target = self.nodes[node.next_step["dialog_node"]]
+            selector = node.next_step.get("selector", "body")
+            if selector == "body":
+                return target
+            siblings = target.parent.children if target.parent else self.root
+            siblings = siblings[siblings.index(target) :]
+            if selector == "user_input":
+                self.waiting = (siblings, None)
+                return None
+            return self.find_match(siblings, None, state) or self.fall_back(node, state)
+        if behavior == "skip_user_input":
+            return self.find_match(
+                node.children, node.dispatch, state
+            ) or self.fall_back(node, state)
+        self.waiting = (node.children, node.dispatch)
+        return None
+
+    def fall_back(self, node: RuntimeNode, state: TurnState) -> Optional[RuntimeNode]:
+        """Returns the root anything_else, unless it is the one which didn't match."""
+        if node in self.fallbacks:
+            return None
+        return self.find_match(self.fallbacks, None, state)
+
+
+Siblings = Tuple[List[RuntimeNode], Optional[SiblingDispatch]]
+
+
+def get_dispatch(siblings: List[RuntimeNode]) -> SiblingDispatch:
+    return SiblingDispatch([None if n.is_folder else n.ast for n in siblings])
@@ -0,0 +1,4 @@
+# Filter-MSMARCO
+# @File:   __init__.py.py
+# @Time:   20/11/2021
+# @Author: Gabriel O.
@@ -0,0 +1,509 @@
+# Filter-MSMARCO
+# @File:   conditions.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Parses the conditions of dialog nodes (and the <? ?> expressions of their contexts)
+into an AST, which is compiled into Python functions of a TurnState. This is done
+once, when a skill is loaded, instead of on every turn.
+
+Supports the subset of the Watson expression language the skill uses: #intents,
+@entities and $context variables (with an optional :value or :(value with spaces)),
+intent.confidence, input.text and its methods, the special conditions (true, false,
+anything_else, welcome, conversation_start, irrelevant), literals, comparisons,
+arithmetic, !, && and ||.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+Expression = Callable[["TurnState"], object]
+
+TOKEN = re.compile(
+    r"""
+    \s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<reference>[#@$][\w\-]+)(?::(?:\((?P<enclosed>[^)]*)\)|(?P<bare>[^\s&|()]+)))?
+      | (?P<operator>&&|\|\||==|!=|>=|<=|[><!+\-*/()\[\].,])
+      | (?P<word>\w+)
+    )""",
+    re.VERBOSE,
+)
+
+
+@dataclass
+class TurnState:
+    """What the conditions of a turn are evaluated against."""
+
+    text: str = ""
+    intents: List[Tuple[str, float]] = field(default_factory=list)
+    entities: List[Tuple[str, str]] = field(default_factory=list)
+    context: Dict[str, object] = field(default_factory=dict)
+    start: bool = False
+    entity_names: Set[str] = field(init=False)
+    entity_values: Set[Tuple[str, str]] = field(init=False)
+
+    def __post_init__(self):
+        self.entity_names = {entity for entity, _ in self.entities}
+        self.entity_values = set(self.entities)
+
+    @property
+    def top_intent(self) -> Optional[str]:
+        return self.intents[0][0] if self.intents else None
+
+    @property
+    def confidence(self) -> float:
+        return self.intents[0][1] if self.intents else 0.0
+
+
+# ------------------------------------------------------------------- the AST
+
+
+class Condition(ABC):
+    """A node of the AST of a condition."""
+
+    @abstractmethod
+    def compile(self) -> Expression:
+        """Returns a function of a TurnState which evaluates this condition."""
+
+    def atoms(self) -> Optional[FrozenSet["Condition"]]:
+        """
+        Returns the conditions which must all hold for this one to hold, when this is
+        a conjunction of them, or None when it isn't. Always-true conditions are
+        conjunctions of nothing.
+        """
+        return frozenset([self])
+
+
+@dataclass(frozen=True)
+class Literal(Condition):
+    value: object
+
+    def compile(self) -> Expression:
+        value = self.value
+        return lambda state: value
+
+    def atoms(self):
+        return frozenset() if self.value is True else frozenset([self])
+
+
+@dataclass(frozen=True)
+class Special(Condition):
+    """welcome, conversation_start and irrelevant."""
+
+    word: str
+
+    def compile(self) -> Expression:
+        if self.word == "irrelevant":
+            return lambda state: not state.intents
+        return lambda state: state.start
+
+
+@dataclass(frozen=True)
+class IntentRef(Condition):
+    name: str
+
+    def compile(self) -> Expression:
+        name = self.name
+        return lambda state: state.top_intent == name
+
+
+@dataclass(frozen=True)
+class EntityRef(Condition):
+    name: str
+    value: Optional[str] = None
+
+    def compile(self) -> Expression:
+        name = self.name
+        if self.value is None:
+            return lambda state: name in state.entity_names
+        key = (name, self.value)
+        return lambda state: key in state.entity_values
+
+
+@dataclass(frozen=True)
+class VariableRef(Condition):
+    name: str
+    value: Optional[str] = None
+
+    def compile(self) -> Expression:
+        name, value = self.name, self.value
+        if value is None:
+            return lambda state: state.context.get(name)
+        return lambda state: state.context.get(name) == value
+
+
+@dataclass(frozen=True)
+class Turn(Condition):
+    """input or intent, which are the properties of the turn itself."""
+
+    word: str
+
+    def compile(self) -> Expression:
+        return lambda state: state
+
+
+@dataclass(frozen=True)
+class Property(Condition):
+    target: Condition
+    name: str
+
+    def compile(self) -> Expression:
+        target, name = self.target.compile(), self.name
+        return lambda state: getattr(target(state), name)
+
+
+@dataclass(frozen=True)
+class Call(Condition):
+    target: Condition
+    method: str
+    arguments: Tuple[Condition, ...]
+
+    def compile(self) -> Expression:
+        target, method = self.target.compile(), METHODS[self.method]
+        arguments = [a.compile() for a in self.arguments]
+        return lambda state: method(target(state), *(a(state) for a in arguments))
+
+
+@dataclass(frozen=True)
+class Index(Condition):
+    target: Condition
+    index: Condition
+
+    def compile(self) -> Expression:
+        target, index = self.target.compile(), self.index.compile()
+        return lambda state: target(state)[index(state)]
+
+
+@dataclass(frozen=True)
+class Not(Condition):
+    operand: Condition
+
+    def compile(self) -> Expression:
+        operand = self.operand.compile()
+        return lambda state: not operand(state)
+
+
+@dataclass(frozen=True)
+class Negative(Condition):
+    operand: Condition
+
+    def compile(self) -> Expression:
+        operand = self.operand.compile()
+        return lambda state: -operand(state)
+
+
+@dataclass(frozen=True)
+class And(Condition):
+    operands: Tuple[Condition, ...]
+
+    def compile(self) -> Expression:
+        operands = [o.compile() for o in self.operands]
+        return lambda state: all(operand(state) for operand in operands)
+
+    def atoms(self):
+        atoms = [operand.atoms() for operand in self.operands]
+        return None if None in atoms else frozenset().union(*atoms)
+
+
+@dataclass(frozen=True)
+class Or(Condition):
+    operands: Tuple[Condition, ...]
+
+    def compile(self) -> Expression:
+        operands = [o.compile() for o in self.operands]
+        return lambda state: any(operand(state) for operand in operands)
+
+    def atoms(self):
+        return None
+
+
+@dataclass(frozen=True)
+class Compare(Condition):
+    operator: str
+    left: Condition
+    right: Condition
+
+    def compile(self) -> Expression:
+        function, left, right = COMPARISONS[self.operator], self.left, self.right
+        left, right = left.compile(), right.compile()
+
+        def comparison(state):
+            try:
+                return function(left(state), right(state))
+            except TypeError:  # e.g. a context variable which is still an expression
+                return False
+
+        return comparison
+
+
+@dataclass(frozen=True)
+class Arithmetic(Condition):
+    operator: str
+    left: Condition
+    right: Condition
+
+    def compile(self) -> Expression:
+        function = ARITHMETIC[self.operator]
+        left, right = self.left.compile(), self.right.compile()
+        return lambda state: function(left(state), right(state))
+
+
+COMPARISONS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+}
+
+ARITHMETIC = {
+    "+": lambda a, b: f"{a}{b}" if isinstance(a, str) or isinstance(b, str) else a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+}
+
+# the properties of input and intent and the string and list methods used
+PROPERTIES = {"text", "confidence"}
+METHODS = {
+    "split": lambda value, separator: re.split(separator, value),
+    "size": len,
+    "length": len,
+    "contains": lambda value, other: other in value,
+    "toLowerCase": str.lower,
+    "trim": str.strip,
+}
+
+
+# --------------------------------------------------------------- compiling
+
+
+def parse_condition(text: Optional[str]) -> Condition:
+    """
+    Parses a condition into its AST. Empty conditions are the literal false, since
+    they never hold. Raises ValueError if the condition can't be parsed.
+    """
+    if text is None or not text.strip():
+        return Literal(False)
+    return Parser(text).parse()
+
+
+def compile_condition(text: Optional[str]) -> Expression:
+    """
+    Compiles a condition into a function which returns whether it holds. Raises
+    ValueError if the condition can't be parsed.
+    """
+    expression = parse_condition(text).compile()
+    return lambda state: bool(expression(state))
+
+
+def compile_context_value(value):
+    """
+    Compiles the <? ?> expressions of a context value. Values without expressions, or
+    with expressions this parser doesn't support, are kept as they are.
+    """
+    if isinstance(value, dict):
+        return {k: compile_context_value(v) for k, v in value.items()}
+    search = re.fullmatch(r"\s*<\?(.*)\?>\s*", value) if isinstance(value, str) else None
+    if not search:
+        return value
+    try:
+        expression = Parser(search.group(1)).parse().compile()
+    except ValueError:
+        return value
+    return ContextExpression(expression, value)
+
+
+@dataclass
+class ContextExpression:
+    """A compiled <? ?> expression, which falls back to its text if it fails."""
+
+    expression: Expression
+    text: str
+
+    def __call__(self, state: "TurnState"):
+        try:
+            return self.expression(state)
+        except (TypeError, ValueError, IndexError, AttributeError):
+            return self.text
+
+
+def evaluate_context(value, state: TurnState):
+    if isinstance(value, dict):
+        return {k: evaluate_context(v, state) for k, v in value.items()}
+    if isinstance(value, ContextExpression):
+        return value(state)
+    return value
+
+
+# ----------------------------------------------------------------- parsing
+
+
+class Parser:
+    """A recursive descent parser which builds the AST of an expression."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.position = 0
+
+    def _tokenize(self, text: str) -> List[Tuple[str, str, Optional[str]]]:
+        """Splits the text into (kind, text, value) tokens. Only references have values."""
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = TOKEN.match(text, position)
+            if not match:
+                raise ValueError(f"Unexpected '{text[position:]}' in '{text}'")
+            kind = "reference" if match.group("reference") else match.lastgroup
+            value = match.group("enclosed") or match.group("bare")
+            tokens.append((kind, match.group(kind), value))
+            position = match.end()
+        return tokens
+
+    def parse(self) -> Condition:
+        condition = self._or()
+        if self.position < len(self.tokens):
+            raise ValueError(
+                f"Unexpected '{self.tokens[self.position][1]}' in '{self.text}'"
+            )
+        return condition
+
+    def _peek(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None, None
+
+    def _accept(self, *values: str) -> Optional[str]:
+        kind, value, _ = self._peek()
+        if kind == "operator" and value in values:
+            self.position += 1
+            return value
+        return None
+
+    def _expect(self, value: str):
+        if not self._accept(value):
+            raise ValueError(f"Expected '{value}' in '{self.text}'")
+
+    def _or(self) -> Condition:
+        operands = [self._and()]
+        while self._accept("||"):
+            operands.append(self._and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def _and(self) -> Condition:
+        operands = [self._not()]
+        while self._accept("&&"):
+            operands.append(self._not())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def _not(self) -> Condition:
+        if self._accept("!"):
+            return Not(self._not())
+        return self._comparison()
+
+    def _comparison(self) -> Condition:
+        left = self._sum()
+        operator = self._accept(*COMPARISONS)
+        if operator is None:
+            return left
+        return Compare(operator, left, self._sum())
+
+    def _sum(self) -> Condition:
+        left = self._product()
+        while True:
+            operator = self._accept("+", "-")
+            if operator is None:
+                return left
+            left = Arithmetic(operator, left, self._product())
+
+    def _product(self) -> Condition:
+        left = self._unary()
+        while True:
+            operator = self._accept("*", "/")
+            if operator is None:
+                return left
+            left = Arithmetic(operator, left, self._unary())
+
+    def _unary(self) -> Condition:
+        if self._accept("-"):
+            return Negative(self._unary())
+        return self._postfix(self._primary())
+
+    def _postfix(self, condition: Condition) -> Condition:
+        while True:
+            if self._accept("["):
+                index = self._or()
+                self._expect("]")
+                condition = Index(condition, index)
+            elif self._accept("."):
+                kind, name, _ = self._peek()
+                if kind != "word":
+                    raise ValueError(f"Expected a method or property in '{self.text}'")
+                self.position += 1
+                if self._accept("("):
+                    if name not in METHODS:
+                        raise ValueError(f"Unknown method '{name}' in '{self.text}'")
+                    condition = Call(condition, name, self._arguments())
+                elif name in PROPERTIES:
+                    condition = Property(condition, name)
+                else:
+                    raise ValueError(f"Unknown property '{name}' in '{self.text}'")
+            else:
+                return condition
+
+    def _arguments(self) -> Tuple[Condition, ...]:
+        arguments = []
+        if self._accept(")"):
+            return ()
+        arguments.append(self._or())
+        while self._accept(","):
+            arguments.append(self._or())
+        self._expect(")")
+        return tuple(arguments)
+
+    def _primary(self) -> Condition:
+        kind, text, value = self._peek()
+        if kind is None:
+            raise ValueError(f"Unexpected end of '{self.text}'")
+        self.position += 1
+        if kind == "operator" and text == "(":
+            condition = self._or()
+            self._expect(")")
+            return condition
+        if kind == "string":
+            return Literal(re.sub(r"\\(['\"\\])", r"\1", text[1:-1]))
+        if kind == "number":
+            return Literal(float(text) if "." in text else int(text))
+        if kind == "reference":
+            return self._reference(text[0], text[1:], value)
+        if kind == "word":
+            return self._word(text)
+        raise ValueError(f"Unexpected '{text}' in '{self.text}'")
+
+    def _reference(self, symbol: str, name: str, value: Optional[str]) -> Condition:
+        """Parses an #intent, an @entity or a $variable, with or without a value."""
+        if symbol == "#":
+            if value is not None:
+                raise ValueError(f"Intents can't have values: #{name}:{value}")
+            return IntentRef(name)
+        if symbol == "@":
+            return EntityRef(name, value)
+        return VariableRef(name, value)
+
+    def _word(self, word: str) -> Condition:
+        literals = {"true": True, "anything_else": True, "false": False, "null": None}
+        if word in literals:
+            return Literal(literals[word])
+        if word in ("welcome", "conversation_start", "irrelevant"):
+            return Special(word)
+        if word in ("input", "intent"):
+            return Turn(word)
+        raise ValueError(f"Unknown '{word}' in '{self.text}'")
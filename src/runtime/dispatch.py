@@ -0,0 +1,212 @@
+# Filter-MSMARCO
+# @File:   dispatch.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Hash indexes over the conditions of sibling nodes, so that finding the first sibling
+whose condition holds doesn't mean evaluating every one of them, and a static
+analysis of the conditions which can never match.
+
+Most generated conditions are conjunctions which require some entity values
+(@modificador:(x) && @substantivo:(y) && @recipiente:(z)), an intent
+(#intent && intent.confidence > 0.8) or a context value ($contexto:(x)). Siblings
+are indexed by what their conditions require and, on each turn, only the ones whose
+requirements are met by the turn are evaluated, along with the siblings which
+couldn't be indexed.
+"""
+
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import product
+from typing import (
+    Collection,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from src.runtime.conditions import (
+    Condition,
+    EntityRef,
+    IntentRef,
+    Literal,
+    TurnState,
+    VariableRef,
+)
+
+# the entities which generated conditions are made of, in the order of their keys
+ENTITY_KEY = ("modificador", "substantivo", "recipiente")
+
+DispatchKey = Tuple[str, Hashable]
+
+
+def get_dispatch_key(condition: Optional[Condition]) -> Optional[DispatchKey]:
+    """
+    Returns what a condition requires, if it is a conjunction which requires values
+    of ENTITY_KEY's entities (as a (modificador, substantivo, recipiente) tuple,
+    with None for the ones which aren't required), an intent or a context value.
+    """
+    atoms = condition.atoms() if condition is not None else None
+    if atoms is None:
+        return None
+    entities = [a for a in atoms if isinstance(a, EntityRef) and a.value is not None]
+    entities = [a for a in entities if a.name in ENTITY_KEY]
+    names = [a.name for a in entities]
+    if entities and len(set(names)) == len(names):
+        values = {a.name: a.value for a in entities}
+        return "entities", tuple(values.get(name) for name in ENTITY_KEY)
+    intents = {a.name for a in atoms if isinstance(a, IntentRef)}
+    if len(intents) == 1:
+        return "intent", intents.pop()
+    variables = [a for a in atoms if isinstance(a, VariableRef) and a.value is not None]
+    if len(variables) == 1:
+        return "variable", (variables[0].name, variables[0].value)
+    return None
+
+
+class SiblingDispatch:
+    """
+    Indexes the positions of sibling nodes by the dispatch keys of their conditions.
+    Conditions given as None (like the ones of folders) are never indexed.
+    """
+
+    def __init__(self, conditions: Sequence[Optional[Condition]]):
+        self.tables: Dict[str, Dict[Hashable, List[int]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self.general: List[int] = []
+        for i, condition in enumerate(conditions):
+            key = get_dispatch_key(condition)
+            if key is None:
+                self.general.append(i)
+            else:
+                self.tables[key[0]][key[1]].append(i)
+        self.tables = {kind: dict(table) for kind, table in self.tables.items()}
+        self.variables = {name for name, _ in self.tables.get("variable", {})}
+
+    def candidates(self, state: TurnState) -> Iterator[int]:
+        """
+        Returns, in order, the positions of the siblings whose requirements are met
+        by the turn, and of the siblings which weren't indexed.
+        """
+        hits = []
+        for kind, key in self._get_keys(state):
+            hits.extend(self.tables[kind].get(key, ()))
+        if not hits:
+            return iter(self.general)
+        hits.sort()
+        return heapq.merge(hits, self.general)
+
+    def _get_keys(self, state: TurnState) -> Iterator[DispatchKey]:
+        if "entities" in self.tables:
+            values = {name: [None] for name in ENTITY_KEY}
+            for name, value in state.entities:
+                if name in values:
+                    values[name].append(value)
+            for key in product(*values.values()):
+                yield "entities", key
+        if "intent" in self.tables and state.top_intent is not None:
+            yield "intent", state.top_intent
+        for name in self.variables:
+            value = state.context.get(name)
+            if isinstance(value, Hashable):
+                yield "variable", (name, value)
+
+
+@dataclass
+class UnmatchableReport:
+    """The nodes whose conditions can never match and why, by dialog_node."""
+
+    nodes: Dict[str, str] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.nodes)
+
+    def __str__(self) -> str:
+        return "; ".join(f"{node} ({reason})" for node, reason in self.nodes.items())
+
+
+def find_unmatchable(
+    siblings: Sequence[Tuple[str, Optional[Condition]]],
+    known: Collection[Condition],
+    jump_targets: Dict[str, str],
+    report: UnmatchableReport = None,
+) -> UnmatchableReport:
+    """
+    Adds to the report the siblings, given as (dialog_node, condition), whose
+    conditions can never match:
+    - contradictions, like two intents or two values of a context variable;
+    - conditions requiring an intent or an entity value which isn't in known;
+    - conditions shadowed by an earlier sibling which requires only part of what
+      they require, and so always matches first.
+    Siblings which are jumped to by body, whose conditions don't matter, are left
+    out. Jumps by condition start evaluating siblings in the middle, so siblings
+    are only shadowed by the ones after the last such jump target before them.
+    Folders, given without a condition, don't shadow their siblings.
+    """
+    report = UnmatchableReport() if report is None else report
+    earlier: List[Tuple[str, frozenset]] = []
+    for dialog_node, condition in siblings:
+        selector = jump_targets.get(dialog_node)
+        if selector not in (None, "body"):
+            earlier = []
+        atoms = condition.atoms() if condition is not None else None
+        if selector == "body" or atoms is None:
+            continue
+        reason = get_contradiction(atoms) or get_unknown(atoms, known)
+        if reason is None:
+            reason = next(
+                (f"shadowed by {node}" for node, other in earlier if other <= atoms),
+                None,
+            )
+        if reason is not None:
+            report.nodes[dialog_node] = reason
+        earlier.append((dialog_node, atoms))
+    return report
+
+
+def get_contradiction(atoms: frozenset) -> Optional[str]:
+    if Literal(False) in atoms or Literal(None) in atoms:
+        return "always false"
+    intents = sorted(a.name for a in atoms if isinstance(a, IntentRef))
+    if len(intents) > 1:
+        return f"requires two intents: {', '.join(intents)}"
+    values: Dict[str, Set[str]] = defaultdict(set)
+    for atom in atoms:
+        if isinstance(atom, VariableRef) and atom.value is not None:
+            values[atom.name].add(atom.value)
+    for name, variable_values in values.items():
+        if len(variable_values) > 1:
+            return f"requires two values of ${name}"
+    return None
+
+
+def get_unknown(atoms: frozenset, known: Collection[Condition]) -> Optional[str]:
+    for atom in atoms:
+        if isinstance(atom, IntentRef) and atom not in known:
+            return f"unknown intent #{atom.name}"
+        if (
+            isinstance(atom, EntityRef)
+            and not atom.name.startswith("sys-")
+            and atom not in known
+        ):
+            value = f":({atom.value})" if atom.value is not None else ""
+            return f"unknown entity @{atom.name}{value}"
+    return None
+
+
+def get_known(skill: dict) -> Set[Condition]:
+    """Returns the intents and entity values (with and without value) of a skill."""
+    known = {IntentRef(intent["intent"]) for intent in skill.get("intents", [])}
+    for entity in skill.get("entities", []):
+        known.add(EntityRef(entity["entity"]))
+        for value in entity.get("values", []):
+            known.add(EntityRef(entity["entity"], value["value"]))
+    return known
@@ -0,0 +1,79 @@
+# Filter-MSMARCO
+# @File:   understanding.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+A stand-in for Watson's natural language understanding, made from the intents and
+entities of a skill. Intents are only recognized from their exact examples and
+entities from their values, synonyms and patterns (the ones Python can compile),
+which is enough to test the flow of the dialog.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from src.utils.sanitize import sanitize
+
+Intents = List[Tuple[str, float]]
+Entities = List[Tuple[str, str]]
+
+
+def normalize(text: str) -> str:
+    """Lowercases, removes accents and punctuation and collapses whitespace."""
+    return " ".join(re.findall(r"\w+", sanitize(text.lower())))
+
+
+class ExactUnderstanding:
+    """Recognizes intents by their examples and entities by their values."""
+
+    def __init__(self, skill: dict):
+        self.examples: Dict[str, str] = {}
+        for intent in skill.get("intents", []):
+            for example in intent.get("examples", []):
+                self.examples.setdefault(normalize(example["text"]), intent["intent"])
+
+        # normalized phrase -> the (entity, value) pairs it stands for
+        self.phrases: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        self.patterns: List[Tuple[re.Pattern, str, str]] = []
+        self.invalid_patterns: List[str] = []
+        for entity in skill.get("entities", []):
+            for value in entity.get("values", []):
+                key = (entity["entity"], value["value"])
+                for pattern in value.get("patterns", []):
+                    try:
+                        self.patterns.append((re.compile(pattern), *key))
+                    except re.error:
+                        self.invalid_patterns.append(pattern)
+                for phrase in [value["value"], *value.get("synonyms", [])]:
+                    if normalize(phrase) and key not in self.phrases[normalize(phrase)]:
+                        self.phrases[normalize(phrase)].append(key)
+        self.longest = max((len(p.split()) for p in self.phrases), default=0)
+
+    def __call__(self, text: str) -> Tuple[Intents, Entities]:
+        normalized = normalize(text)
+        intent = self.examples.get(normalized)
+        intents = [(intent, 1.0)] if intent else []
+        return intents, self.get_entities(text, normalized)
+
+    def get_entities(self, text: str, normalized: str) -> Entities:
+        """
+        Returns the entities of the text. Like Watson, phrases are matched from left
+        to right, taking the longest phrase starting at each word and continuing
+        after it, so "engenharia de petróleo" isn't also petróleo.
+        """
+        words = normalized.split()
+        entities = {}
+        start = 0
+        while start < len(words):
+            end = min(start + self.longest, len(words))
+            while end > start and " ".join(words[start:end]) not in self.phrases:
+                end -= 1
+            for key in self.phrases.get(" ".join(words[start:end]), ()):
+                entities[key] = None
+            start = max(end, start + 1)
+        for pattern, *key in self.patterns:
+            if pattern.search(text):
+                entities[tuple(key)] = None
+        return list(entities)
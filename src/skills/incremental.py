@@ -0,0 +1,96 @@
+# Filter-MSMARCO
+# @File:   incremental.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Incremental builds: every spreadsheet row is fingerprinted and the ids given to its
+nodes are saved in a manifest next to the skill. On the next build, rows with the same
+fingerprint get the same ids back, so only the nodes of changed rows change in the
+uploaded skill.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from src.dialog_nodes.node_ids import NodeIds
+
+# the columns which the generated nodes of a row are made from
+FINGERPRINT_COLUMNS = [
+    "intent",
+    "resposta",
+    "fonte",
+    "rótulos",
+    "modificador",
+    "substantivo",
+    "recipiente",
+]
+
+
+def fingerprint_rows(df: pd.DataFrame) -> Dict[str, str]:
+    """Returns a hash of each row's node-making columns, by intent."""
+    records = df[FINGERPRINT_COLUMNS].to_numpy().tolist()
+    return {
+        record[0]: hashlib.sha1(
+            json.dumps(record, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        for record in records
+    }
+
+
+def get_manifest_path(skill_path: Path) -> Path:
+    return skill_path.with_suffix(".manifest.json")
+
+
+def load_manifest(filepath: Path) -> dict:
+    """Loads a manifest, or returns an empty one if there was no previous build."""
+    if not filepath.exists():
+        return {"shared": {}, "rows": {}}
+    with open(filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(filepath: Path, manifest: dict):
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def get_reusable_ids(manifest: dict, fingerprints: Dict[str, str]) -> Dict[str, str]:
+    """Returns the ids of shared nodes and of rows which haven't changed, by key."""
+    ids = dict(manifest["shared"])
+    for intent, row in manifest["rows"].items():
+        if fingerprints.get(intent) == row["fingerprint"]:
+            ids.update(row["ids"])
+    return ids
+
+
+def get_changes(manifest: dict, fingerprints: Dict[str, str]) -> Dict[str, List[str]]:
+    """Returns which rows were added, changed, removed or kept since the manifest."""
+    previous = {intent: row["fingerprint"] for intent, row in manifest["rows"].items()}
+    changes = {"added": [], "changed": [], "unchanged": []}
+    for intent, fingerprint in fingerprints.items():
+        if intent not in previous:
+            changes["added"].append(intent)
+        elif previous[intent] != fingerprint:
+            changes["changed"].append(intent)
+        else:
+            changes["unchanged"].append(intent)
+    changes["removed"] = [intent for intent in previous if intent not in fingerprints]
+    return {k: sorted(v) for k, v in changes.items()}
+
+
+def make_manifest(
+    fingerprints: Dict[str, str], node_ids: NodeIds, changes: Dict[str, List[str]]
+) -> dict:
+    return {
+        "shared": node_ids.assigned.get("", {}),
+        "rows": {
+            intent: {"fingerprint": fingerprint, "ids": node_ids.assigned.get(intent, {})}
+            for intent, fingerprint in fingerprints.items()
+        },
+        "changes": changes,
+    }
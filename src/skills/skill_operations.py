@@ -3,11 +3,6 @@
 # @Time:   20/11/2021
 # @Author: Gabriel O.
 
-from copy import deepcopy
-
-
 def mix_skills(base, **kwargs):
-    new = deepcopy(base)
-    for k, v in kwargs.items():
-        new[k] = v
-    return new
+    """Returns a copy of base with some keys replaced. The values are not copied."""
+    return {**base, **kwargs}
@@ -0,0 +1,49 @@
+# Filter-MSMARCO
+# @File:   accents.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Accent folding shared by every sanitize: each accented letter is replaced by its base
+letter, taken from the letter's NFKD decomposition.
+
+str.translate(FOLD_TABLE) does it in one pass, but CPython looks every character of
+a non-ASCII string up in the table, which is slower than the old str.replace loop on
+our texts. fold_accents returns ASCII texts as they are and only replaces the
+accented letters a text has, which is faster than both.
+"""
+
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+ACCENTED = "áàâãäéèêëíìîïóòôõöúùûüçñ"
+
+FOLDS = {
+    letter: unicodedata.normalize("NFKD", letter)[0]
+    for letter in ACCENTED + ACCENTED.upper()
+}
+
+FOLD_TABLE = str.maketrans(FOLDS)
+
+
+def fold_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    for letter, folded in FOLDS.items():
+        if letter in text:
+            text = text.replace(letter, folded)
+    return text
+
+
+@lru_cache(maxsize=65536)
+def fold_accents_cached(text: str) -> str:
+    """fold_accents for texts which repeat a lot, like the sort keys of nodes."""
+    return fold_accents(text)
+
+
+def fold_accents_series(series: pd.Series) -> pd.Series:
+    """Folds the accents of a Series of texts, each distinct text once."""
+    unique = series.dropna().unique()
+    return series.map(dict(zip(unique, map(fold_accents, unique))))
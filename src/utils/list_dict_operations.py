@@ -3,13 +3,15 @@
 # @Time:   20/11/2021
 # @Author: Gabriel O.
 
-from copy import deepcopy
 from typing import List, Tuple, Union, Iterator
 
 
 def drop_duplicates(ls: list) -> list:
-    """Removes empty and duplicated elements from a list."""
-    return list(filter(None, set(ls)))
+    """
+    Removes empty and duplicated elements from a list, keeping the order in which
+    they first appear.
+    """
+    return list(filter(None, dict.fromkeys(ls)))
 
 
 def drop_empty(a: Union[list, dict]) -> Union[list, dict]:
@@ -35,7 +37,8 @@ def remove(ls: list, to_remove: list) -> list:
 
 
 def inner_join(a: list, b: list):
-    return [v for v in a + b if v in a and v in b]
+    a_set, b_set = set(a), set(b)
+    return [v for v in a + b if v in a_set and v in b_set]
 
 
 def is_flat(x) -> bool:
@@ -62,11 +65,11 @@ def mix_list(a: list, b: list, priority: dict = None) -> list:
         raise ValueError(a, b)
 
     a_keys = get_possible_global_keys(a)
-    b_keys = get_possible_global_keys(b)
-    common_keys = inner_join(a_keys, b_keys)
+    b_keys = set(get_possible_global_keys(b))
+    common_keys = [key for key in a_keys if key in b_keys]
     if len(common_keys) > 0:
-        common_keys.sort(key=lambda x: priority.get(x, 999))
-        global_key = common_keys[0]
+        # the first one of the highest priority, in the order of a
+        global_key = min(common_keys, key=lambda x: priority.get(x, 999))
     else:
         raise ValueError(
             f"Different global keys were found for each list: {a_keys} "
@@ -95,31 +98,38 @@ def get_possible_global_keys(ls: List[dict]) -> List[str]:
     >>> get_possible_global_keys(fruits)
     []
     """
-    first_dict = ls[0]
-    global_keys = []
-    for key in first_dict:
-        # if not all dicts have this key
-        if not all(key in d_ for d_ in ls):
-            continue
-        # if the value for this key is not flat in all dicts
-        if not all(is_flat(d_[key]) for d_ in ls):
-            continue
-        # if not all dicts have a truthy value for this key
-        if not all(bool(d_[key]) for d_ in ls):
-            continue
-        # if not all dicts have a unique value for this key
-        if not len(set(d_[key] for d_ in ls)) == len(ls):
-            continue
-        global_keys.append(key)
-    return global_keys
+    # the values seen so far for each key which is still possible
+    candidates = {key: set() for key in ls[0]}
+    for d_ in ls:
+        for key, seen in list(candidates.items()):
+            value = d_.get(key)
+            if not (is_flat(value) and value and _is_new(value, seen)):
+                del candidates[key]
+        if not candidates:
+            break
+    return list(candidates)
+
+
+def _is_new(value, seen: set) -> bool:
+    """Adds a value to seen and returns whether it wasn't there before."""
+    try:
+        if value in seen:
+            return False
+    except TypeError:  # unhashable values can't be told apart
+        return False
+    seen.add(value)
+    return True
 
 
 def mix_dict(a: dict, b: dict) -> dict:
     """
-    Returns a dict containing items from both dicts and using values from
-    b on key conflicts.
+    Returns a dict containing items from both dicts. On key conflicts, lists and
+    dicts are mixed and flat values are taken from a.
+
+    Values which don't need mixing aren't copied, so the output shares them with the
+    inputs.
     """
-    out = deepcopy(b)
+    out = dict(b)
     for k, v in a.items():
         if k not in out:
             out[k] = v
@@ -0,0 +1,64 @@
+# Filter-MSMARCO
+# @File:   logs.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Logging of the build. Modules log with logging.getLogger(__name__), passing the
+values worth keeping as extra={"fields": {...}}; scripts call setup_logging once,
+to write them either as text, like "Intents obtained! stage=get_intents seconds=0.01",
+or as one JSON object per line.
+"""
+
+import json
+import logging
+import sys
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Writes to sys.stdout as it is when a record is logged, so redirecting it works."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class StructuredFormatter(logging.Formatter):
+    def __init__(self, as_json: bool = False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", {})
+        if self.as_json:
+            return json.dumps(
+                {
+                    "time": self.formatTime(record),
+                    "level": record.levelname,
+                    "logger": record.name,
+                    "message": record.getMessage(),
+                    **fields,
+                },
+                ensure_ascii=False,
+                default=str,
+            )
+        text = " ".join(f"{key}={value}" for key, value in fields.items())
+        return f"{record.getMessage()} {text}" if text else record.getMessage()
+
+
+def setup_logging(as_json: bool = False, level: int = logging.INFO):
+    """Sends the logs to stdout. Calling it again only changes the format and level."""
+    root = logging.getLogger()
+    handler = next((h for h in root.handlers if isinstance(h, StdoutHandler)), None)
+    if handler is None:
+        handler = StdoutHandler()
+        root.addHandler(handler)
+    handler.setFormatter(StructuredFormatter(as_json))
+    root.setLevel(level)
@@ -3,13 +3,52 @@
 # @Time:   17/11/2021
 # @Author: Gabriel O.
 
+import json
 import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Mapping
 
+import pandas as pd
 
+EXCEPTIONS_PATH = Path(__file__).parent / "plural_exceptions.json"
+
+# palavras que não seguem as regras, carregadas uma vez
+EXCEPTIONS = {}
+
+ACCENTED = re.compile(r"[áéíóúâêô]")
+
+# (final da palavra, plural se a palavra for oxítona, plural se não for)
+RULES = [
+    (re.compile(r"ão$"), "ões", "ões"),
+    (re.compile(r"([rz])$"), r"\1es", r"\1es"),
+    (re.compile(r"al$"), "ais", "ais"),
+    (re.compile(r"el$"), "éis", "eis"),
+    (re.compile(r"ol$"), "óis", "ois"),
+    (re.compile(r"ul$"), "uis", "uis"),
+    (re.compile(r"il$"), "is", "eis"),
+    (re.compile(r"m$"), "ns", "ns"),
+]
+
+
+def load_exceptions(filepath: str = EXCEPTIONS_PATH) -> dict:
+    with open(filepath, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def set_exceptions(exceptions: Mapping[str, str]):
+    """Troca as exceções usadas por plural."""
+    EXCEPTIONS.clear()
+    EXCEPTIONS.update(exceptions)
+    plural.cache_clear()
+
+
+@lru_cache(maxsize=4096)
 def plural(palavra: str) -> str:
     """
-    Passa uma palavra em português para o plural. Não funciona sempre,
-    devido à quantidade de exceções que precisam ser programadas à mão.
+    Passa uma palavra em português para o plural. Palavras que não seguem as regras
+    precisam estar nas exceções; palavras acentuadas, fora as terminadas em -ão, são
+    tratadas como paroxítonas (fóssil -> fósseis, mas funil -> funis).
     """
     palavra = palavra.strip()
 
@@ -17,21 +56,24 @@ def plural(palavra: str) -> str:
     if not palavra or len(palavra.split(" ")) > 1:
         return palavra
 
+    if palavra in EXCEPTIONS:
+        return EXCEPTIONS[palavra]
+
     # se a palavra no plural é igual no singular, retorna sem alterar
-    invariaveis = [r"x$"]
-    for p in invariaveis:
-        if re.search(p, palavra):
-            return palavra
-
-    substituicoes = {
-        r"ão": r"õe",
-        r"r$": r"re",
-        r"z$": r"ze",
-        r"(?<=[aeou])l": r"i",
-        r"il": r"ei",
-        r"m$": r"n",
-    }
-    for p, s in substituicoes.items():
-        palavra = re.sub(p, s, palavra)
-
-    return palavra + "s" if palavra[-1] != "s" else palavra
+    if palavra[-1] in "sx":
+        return palavra
+
+    oxitona = not ACCENTED.search(palavra[:-2])
+    for final, oxitono, paroxitono in RULES:
+        if final.search(palavra):
+            return final.sub(oxitono if oxitona else paroxitono, palavra)
+    return palavra + "s"
+
+
+def plural_series(series: pd.Series) -> pd.Series:
+    """Passa para o plural todas as palavras de uma série, cada uma calculada uma vez."""
+    unique = series.dropna().unique()
+    return series.map(dict(zip(unique, map(plural, unique))))
+
+
+set_exceptions(load_exceptions())
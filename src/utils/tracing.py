@@ -0,0 +1,156 @@
+# Filter-MSMARCO
+# @File:   tracing.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Measures the stages of a build. Code wraps its stages in stage(), which logs how long
+they took; inside tracing(tracer), the tracer also keeps a record of each stage, which
+can be saved as a JSON trace to compare builds:
+
+    with tracing(StageTracer(memory=True)) as tracer:
+        with stage("get_intents", "Intents obtained!") as counts:
+            intents = get_intents(questions)
+            counts["intents"] = len(intents)
+    tracer.save("trace.json")
+
+Stages can be nested, and are named by their path, like "organize/sort_nodes".
+"""
+
+import cProfile
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageTracer:
+    """
+    Records the wall and CPU time of every stage and the counts it reports. With
+    memory, also the memory allocated by Python when the stage started and its peak
+    during the stage, as measured by tracemalloc, which makes the build a few times
+    slower. With a profile directory, stages are profiled with cProfile and saved
+    there as <stage>.prof; stages inside a profiled stage are part of its profile.
+    """
+
+    def __init__(self, memory: bool = False, profile_dir: str = None):
+        self.memory = memory
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.stages: List[dict] = []
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+        self._path: List[str] = []
+        self._peaks: List[int] = []
+        self._profiling = False
+
+    @contextmanager
+    def stage(self, name: str, message: str = None) -> Iterator[Dict[str, int]]:
+        """
+        Measures the code inside it, which can add counts to the dictionary it gives.
+        The message is logged at the end, along with the measures.
+        """
+        self._path.append(name)
+        path = "/".join(self._path)
+        counts = {}
+        record = {"stage": path}
+        if self.memory:
+            record["start_memory"] = self._start_peak()
+        profiler = self._start_profiler()
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        except BaseException:
+            record["failed"] = True
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            record["cpu_seconds"] = round(time.process_time() - cpu_start, 4)
+            if profiler is not None:
+                record["profile"] = self._stop_profiler(profiler, path)
+            if self.memory:
+                record["peak_memory"] = self._stop_peak()
+            record.update(counts)
+            self._path.pop()
+            self.stages.append(record)
+            logger.log(
+                logging.INFO if message else logging.DEBUG,
+                message or path,
+                extra={"fields": record},
+            )
+
+    def _start_peak(self) -> int:
+        current, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self._peaks.append(current)
+        return current
+
+    def _stop_peak(self) -> int:
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(self._peaks.pop(), peak)
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        return peak
+
+    def _start_profiler(self) -> Optional[cProfile.Profile]:
+        if self.profile_dir is None or self._profiling:
+            return None
+        self._profiling = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, profiler: cProfile.Profile, path: str) -> str:
+        profiler.disable()
+        self._profiling = False
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        filepath = self.profile_dir / f"{path.replace('/', '.')}.prof"
+        profiler.dump_stats(filepath)
+        return filepath.as_posix()
+
+    def to_dict(self) -> dict:
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self._start, 4),
+            "python": platform.python_version(),
+            "memory": self.memory,
+            "stages": self.stages,
+        }
+
+    def save(self, filepath: str):
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+_tracer: Optional[StageTracer] = None
+
+
+def stage(name: str, message: str = None):
+    """Measures a stage with the current tracer, or only logs how long it took."""
+    return (_tracer or StageTracer()).stage(name, message)
+
+
+@contextmanager
+def tracing(tracer: StageTracer) -> Iterator[StageTracer]:
+    """Makes the tracer record the stages run inside it."""
+    global _tracer
+    previous = _tracer
+    started_memory = tracer.memory and not tracemalloc.is_tracing()
+    if started_memory:
+        tracemalloc.start()
+    _tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _tracer = previous
+        if started_memory:
+            tracemalloc.stop()
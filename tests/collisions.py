@@ -2,6 +2,7 @@
 # @File:   collisions.py
 # @Time:   22/11/2021
 # @Author: Gabriel O.
+import logging
 from typing import List
 
 import pandas as pd
@@ -9,6 +10,8 @@ import pandas as pd
 from src.dialog_nodes.NodeOrganizer import NodeOrganizer
 from src.utils.list_dict_operations import flatten
 
+logger = logging.getLogger(__name__)
+
 
 def run(organizer: NodeOrganizer):
     df = organizer.df_generated[organizer.answers]
@@ -29,9 +32,11 @@ def run(organizer: NodeOrganizer):
 
     possible_collisions = flatten(possible_collisions)
     if possible_collisions:
-        possible_collisions.insert(0, "Possible collisions found:")
-        collisions_string = "\n\t".join(possible_collisions)
-        print(collisions_string)
+        logger.warning(
+            "Possible collisions found:%s",
+            "".join(f"\n\t{collision}" for collision in possible_collisions),
+            extra={"fields": {"collisions": len(possible_collisions)}},
+        )
 
 
 def check_collisions(
@@ -0,0 +1,66 @@
+# Filter-MSMARCO
+# @File:   copy_on_write.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Checks that the NodeOrganizer gives the same nodes, with valid sibling chains, with and
+without pandas' copy-on-write mode (available from pandas 1.5 on), where chained
+assignments silently do nothing.
+
+    python -m tests.copy_on_write
+"""
+
+import contextlib
+import io
+from copy import deepcopy
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from src.dialog_nodes.NodeOrganizer import NodeOrganizer
+from tests import unit
+
+
+def run(nodes: List[dict], intent_limit: int = 0) -> List[unit.TestFailure]:
+    print("Running copy-on-write tests...")
+    try:
+        pd.get_option("mode.copy_on_write")
+    except KeyError:
+        print(f"Tests skipped: pandas {pd.__version__} has no copy-on-write mode")
+        return []
+
+    outputs = []
+    for copy_on_write in (False, True):
+        with pd.option_context("mode.copy_on_write", copy_on_write):
+            with contextlib.redirect_stdout(io.StringIO()):
+                node_organizer = NodeOrganizer(deepcopy(nodes))
+                node_organizer.run(intent_limit=intent_limit)
+            outputs.append(node_organizer.to_list())
+
+    errors = unit.test_sibling_chains(pd.DataFrame(outputs[1]), [])
+    if outputs[0] != outputs[1]:
+        errors.append(
+            unit.TestFailure(
+                "copy_on_write", "The nodes change when copy-on-write is enabled"
+            )
+        )
+
+    if errors:
+        print("Tests failed:", *errors, sep="\n\t- ")
+    else:
+        print("Tests passed!")
+    return errors
+
+
+if __name__ == "__main__":
+    from src.generate_skill import get_mixed_nodes
+    from src.io.file_operations import load_questions, load_skill
+
+    results = Path(__file__).parent / "../results"
+    questions = load_questions((results / "Perguntas.xlsx").resolve().as_posix())
+    old_skill = load_skill((results / "skill-Amazônia-Azul.json").resolve().as_posix())
+    mixed_nodes = get_mixed_nodes(questions, old_skill, confidence=0.8)
+    run(mixed_nodes)
+    run(mixed_nodes, intent_limit=100)
@@ -0,0 +1,193 @@
+# Filter-MSMARCO
+# @File:   dialog_flow.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Runs conversations on a skill with the local DialogRuntime, to check the flow of the
+dialog without uploading it to Watson.
+
+    python -m tests.dialog_flow results/skill-Amazônia-Azul2.json
+"""
+
+import logging
+import sys
+from typing import List
+
+from src.runtime.DialogRuntime import DialogRuntime
+from tests.unit import TestFailure, log_results
+
+logger = logging.getLogger(__name__)
+
+
+def run(skill: dict) -> List[TestFailure]:
+    """Runs every test on the dialog of the skill, logs and returns the failures."""
+    errors = []
+    logger.info("Running dialog tests...")
+    runtime = DialogRuntime(skill)
+    errors = test_conditions(runtime, errors)
+    errors = test_unmatchable(runtime, errors)
+    errors = test_jumps(runtime, errors)
+    errors = test_welcome(runtime, errors)
+    errors = test_contexts(runtime, errors)
+    errors = test_fallback(runtime, errors)
+    errors = test_examples(runtime, skill, errors)
+    errors = test_nested_values(errors)
+    log_results(logger, "Dialog tests", errors)
+    return errors
+
+
+def test_conditions(
+    runtime: DialogRuntime, errors: List[TestFailure]
+) -> List[TestFailure]:
+    if runtime.invalid_conditions:
+        errors.append(
+            TestFailure(
+                "invalid_conditions",
+                "There are nodes whose conditions can't be parsed",
+                list(runtime.invalid_conditions),
+            )
+        )
+    return errors
+
+
+def test_unmatchable(
+    runtime: DialogRuntime, errors: List[TestFailure]
+) -> List[TestFailure]:
+    if runtime.unmatchable:
+        errors.append(
+            TestFailure(
+                "unmatchable",
+                f"There are conditions which can never match: {runtime.unmatchable}",
+            )
+        )
+    return errors
+
+
+def test_jumps(runtime: DialogRuntime, errors: List[TestFailure]) -> List[TestFailure]:
+    if runtime.dangling_jumps:
+        errors.append(
+            TestFailure(
+                "dangling_jumps",
+                "There are nodes jumping to nodes which don't exist",
+                [f"{node} -> {target}" for node, target in runtime.dangling_jumps.items()],
+            )
+        )
+    return errors
+
+
+def test_welcome(runtime: DialogRuntime, errors: List[TestFailure]) -> List[TestFailure]:
+    if not runtime.start().texts:
+        errors.append(TestFailure("welcome", "Nothing is said when a conversation starts"))
+    return errors
+
+
+def test_contexts(
+    runtime: DialogRuntime, errors: List[TestFailure]
+) -> List[TestFailure]:
+    """Checks that saying each context sets it."""
+    failed = []
+    for node in runtime.nodes.values():
+        context = node.context.get("contexto")
+        if not context or node.conditions == "anything_else":
+            continue
+        runtime.reset()
+        if runtime.message(context).context.get("contexto") != context:
+            failed.append(node.dialog_node)
+    if failed:
+        errors.append(
+            TestFailure("contexts", "There are contexts which can't be set", failed)
+        )
+    return errors
+
+
+def test_fallback(
+    runtime: DialogRuntime, errors: List[TestFailure]
+) -> List[TestFailure]:
+    """Checks that the root anything_else answers what isn't understood."""
+    runtime.reset()
+    response = runtime.message("xyzzy")
+    fallbacks = {node.dialog_node for node in runtime.fallbacks}
+    if not fallbacks.intersection(response.dialog_nodes) or not response.texts:
+        errors.append(
+            TestFailure("fallback", "The root anything_else doesn't answer unknown input")
+        )
+    return errors
+
+
+def test_examples(
+    runtime: DialogRuntime, skill: dict, errors: List[TestFailure]
+) -> List[TestFailure]:
+    """Checks that every intent example can be answered without the dialog looping."""
+    looping = []
+    for intent in skill["intents"]:
+        for example in intent["examples"]:
+            runtime.reset()
+            try:
+                runtime.message(example["text"])
+            except ValueError:
+                looping.append(intent["intent"])
+                break
+    if looping:
+        errors.append(
+            TestFailure("loops", "There are intents whose examples loop", looping)
+        )
+    return errors
+
+
+# values which are a prefix and a suffix of another, with nodes for the shorter ones first
+NESTED_VALUES_SKILL = {
+    "intents": [],
+    "entities": [
+        {
+            "entity": "rótulos",
+            "values": [
+                {"value": "engenharia"},
+                {"value": "petróleo"},
+                {"value": "engenharia de petróleo"},
+            ],
+        }
+    ],
+    "dialog_nodes": [
+        {"dialog_node": "engenharia", "conditions": "@rótulos:(engenharia)"},
+        {
+            "dialog_node": "petróleo",
+            "conditions": "@rótulos:(petróleo)",
+            "previous_sibling": "engenharia",
+        },
+        {
+            "dialog_node": "engenharia de petróleo",
+            "conditions": "@rótulos:(engenharia de petróleo)",
+            "previous_sibling": "petróleo",
+        },
+    ],
+}
+
+
+def test_nested_values(errors: List[TestFailure]) -> List[TestFailure]:
+    """Checks that, like in Watson, only the longest of nested values is recognized."""
+    runtime = DialogRuntime(NESTED_VALUES_SKILL)
+    expected = {
+        "engenharia de petróleo": ["engenharia de petróleo"],
+        "engenharia naval": ["engenharia"],
+        "petróleo do pré-sal": ["petróleo"],
+    }
+    failed = []
+    for text, dialog_nodes in expected.items():
+        runtime.reset()
+        if runtime.message(text).dialog_nodes != dialog_nodes:
+            failed.append(text)
+    if failed:
+        errors.append(
+            TestFailure("nested_values", "There are texts with nested values", failed)
+        )
+    return errors
+
+
+if __name__ == "__main__":
+    from src.io.file_operations import load_skill
+    from src.utils.logs import setup_logging
+
+    setup_logging()
+    failures = run(load_skill(sys.argv[1]))
+    sys.exit(1 if failures else 0)
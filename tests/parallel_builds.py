@@ -0,0 +1,108 @@
+# Filter-MSMARCO
+# @File:   parallel_builds.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Checks that build_skills can build skills from several sheets of the same workbook in
+parallel: every job succeeds, each sheet gets its own snapshot, and jobs of the same
+sheet give the same skill. The sheets are copies of part of the questions, in a
+temporary workbook, which is built once with its snapshots written by the driver and
+once with them written by the workers at the same time.
+
+    python -m tests.parallel_builds results/Perguntas.xlsx results/skill-Amazônia-Azul.json
+"""
+
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from src import build_skills
+from src.build_skills import BuildJob
+from src.io.file_operations import QUESTION_COLUMNS, get_snapshot_path, load_questions
+from tests.unit import TestFailure
+
+SHEETS = {"finais": 1.0, "metade": 0.5}
+
+
+def write_workbook(filepath: Path, questions: pd.DataFrame):
+    """Writes a share of the questions to each sheet, with the headers of the sheet."""
+    headers = {column: header for header, column in QUESTION_COLUMNS.items()}
+    with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
+        for sheet_name, share in SHEETS.items():
+            rows = questions.head(int(len(questions) * share))
+            rows.rename(columns=headers).to_excel(writer, sheet_name, index=False)
+
+
+def get_jobs(directory: Path, base_skill: str) -> List[BuildJob]:
+    return [
+        BuildJob(
+            name=f"{sheet_name}-{i}",
+            workbook=(directory / "Perguntas.xlsx").as_posix(),
+            base_skill=base_skill,
+            output=(directory / f"{sheet_name}-{i}.json").as_posix(),
+            sheet_name=sheet_name,
+        )
+        for sheet_name in SHEETS
+        for i in range(2)
+    ]
+
+
+def check_results(
+    name: str, results: List[dict], jobs: List[BuildJob], errors: List[TestFailure]
+) -> List[TestFailure]:
+    failed = [result["name"] for result in results if result["error"]]
+    if failed:
+        errors.append(TestFailure(name, "There are jobs which failed", failed))
+        return errors
+    outputs: Dict[str, set] = {}
+    for job in jobs:
+        outputs.setdefault(job.sheet_name, set()).add(Path(job.output).read_bytes())
+    different = [sheet_name for sheet_name, skills in outputs.items() if len(skills) > 1]
+    if different:
+        errors.append(
+            TestFailure(name, "There are sheets whose jobs built different skills", different)
+        )
+    workbook = Path(jobs[0].workbook)
+    missing = [s for s in SHEETS if not get_snapshot_path(workbook, s).exists()]
+    if missing:
+        errors.append(TestFailure(name, "There are sheets without a snapshot", missing))
+    return errors
+
+
+def run(workbook: str, base_skill: str, processes: int = 2) -> List[TestFailure]:
+    """Builds skills from two sheets in parallel, prints and returns the failures."""
+    print("Running parallel build tests...")
+    errors = []
+    questions = load_questions(workbook)
+    directory = Path(tempfile.mkdtemp())
+    try:
+        write_workbook(directory / "Perguntas.xlsx", questions)
+        jobs = get_jobs(directory, Path(base_skill).resolve().as_posix())
+
+        summary = build_skills.run(jobs, processes)
+        errors = check_results("parallel_sheets", summary["results"], jobs, errors)
+
+        # without the driver writing them first, workers write the snapshots at once
+        shutil.rmtree(directory / ".cache")
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(build_skills.run_job, jobs))
+        errors = check_results("parallel_snapshots", results, jobs, errors)
+    finally:
+        shutil.rmtree(directory)
+
+    if errors:
+        print("Parallel build tests failed:", *errors, sep="\n\t- ")
+    else:
+        print("Parallel build tests passed!")
+    return errors
+
+
+if __name__ == "__main__":
+    failures = run(sys.argv[1], sys.argv[2])
+    sys.exit(1 if failures else 0)
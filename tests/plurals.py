@@ -0,0 +1,53 @@
+# Filter-MSMARCO
+# @File:   plurals.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Checks plural against a corpus of the nouns in Perguntas.xlsx, plus a few words for
+each rule, with the plurals they should get.
+
+    python -m tests.plurals
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from src.utils.plural import plural_series
+from tests.unit import TestFailure
+
+CORPUS_PATH = Path(__file__).parent / "plural_corpus.json"
+
+
+def run(corpus: dict = None) -> List[TestFailure]:
+    """Runs every test on the pluralizer, prints and returns the failures."""
+    if corpus is None:
+        with open(CORPUS_PATH, encoding="utf-8") as f:
+            corpus = json.load(f)
+    errors = []
+    print("Running plural tests...")
+    expected = pd.Series(corpus)
+    got = plural_series(pd.Series(expected.index, index=expected.index))
+    wrong = expected.index[got != expected]
+    if len(wrong):
+        errors.append(
+            TestFailure(
+                "plurals",
+                "There are words with the wrong plural",
+                [f"{word} -> {got[word]} (not {expected[word]})" for word in wrong],
+            )
+        )
+
+    if errors:
+        print("Plural tests failed:", *errors, sep="\n\t- ")
+    else:
+        print("Plural tests passed!")
+    return errors
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run() else 0)
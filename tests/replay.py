@@ -0,0 +1,234 @@
+# Filter-MSMARCO
+# @File:   replay.py
+# @Time:   18/10/2026
+# @Author: Gabriel O.
+
+"""
+Replays every question of the spreadsheet, and every one of its examples, as a new
+conversation with the local DialogRuntime, to measure how much of what the skill was
+built from it answers. A turn is:
+- a hit, if a node of the question's intent runs;
+- wrong, if only nodes of other intents run;
+- a fallback, if no node of any intent runs;
+- dropped, if the question's intent isn't in the skill (e.g. over the intent limit).
+
+By default intents are recognized by ExactUnderstanding, from the skill's own examples,
+so every replayed example is understood and the rates only measure how the dialog
+routes them. With --held-out, a share of the examples of each intent is held out of
+an IntentClassifier, which recognizes them instead, and only those are replayed, so
+that the rates measure understanding too.
+
+Turns are split among processes. The turns, the rates by intent and a summary are
+written next to the skill, as <skill>.replay.csv and <skill>.replay.json, so that
+builds can be diffed. Given the report of an earlier build, the intents whose hit
+rate went down fail.
+
+    python -m tests.replay results/skill-Amazônia-Azul2.json results/Perguntas.xlsx [--held-out] [baseline.json]
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.dialog_nodes.NodeGraph import extract_intent
+from src.intents.classifier import ClassifierUnderstanding, IntentClassifier
+from src.intents.intent_operations import get_intents
+from src.runtime.DialogRuntime import DialogRuntime
+from src.runtime.understanding import Entities, Intents
+from tests.unit import TestFailure
+
+OUTCOMES = ["hit", "wrong", "fallback", "dropped"]
+
+_runtime: Optional[DialogRuntime] = None
+_skill_intents: set = set()
+
+
+Understand = Callable[[str], Tuple[Intents, Entities]]
+
+
+def _start_worker(skill: dict, understand: Understand = None):
+    global _runtime, _skill_intents
+    _runtime = DialogRuntime(skill, understand)
+    _skill_intents = {intent["intent"] for intent in skill["intents"]}
+
+
+def _replay_chunk(turns: List[Tuple[str, str]]) -> List[dict]:
+    return [replay_turn(_runtime, _skill_intents, *turn) for turn in turns]
+
+
+def replay_turn(
+    runtime: DialogRuntime, skill_intents: set, intent: str, text: str
+) -> dict:
+    runtime.reset()
+    response = runtime.message(text)
+    answered = [
+        extract_intent(runtime.nodes[node].conditions) for node in response.dialog_nodes
+    ]
+    answered = list(dict.fromkeys(a for a in answered if a))
+    if intent not in skill_intents:
+        outcome = "dropped"
+    elif intent in answered:
+        outcome = "hit"
+    else:
+        outcome = "wrong" if answered else "fallback"
+    return {
+        "intent": intent,
+        "text": text,
+        "outcome": outcome,
+        "answered": " ".join(answered),
+    }
+
+
+def get_turns(questions: pd.DataFrame) -> List[Tuple[str, str]]:
+    """Returns every question and example as (intent, text)."""
+    return [
+        (intent["intent"], example["text"])
+        for intent in get_intents(questions)
+        for example in intent["examples"]
+    ]
+
+
+def hold_out(
+    skill: dict, turns: List[Tuple[str, str]], folds: int = 5
+) -> Tuple[ClassifierUnderstanding, List[Tuple[str, str]]]:
+    """
+    Returns an understanding whose classifier wasn't trained on one in folds of the
+    turns, and those turns. Like in cross_validate, the first turn of each intent (its
+    question) is never held out.
+    """
+    seen = set()
+    held_out = []
+    for i, (intent, text) in enumerate(turns):
+        if intent in seen and i % folds == 0:
+            held_out.append((intent, text))
+        seen.add(intent)
+    held_out_texts = {text for _, text in held_out}
+    texts, labels = [], []
+    for intent in skill["intents"]:
+        for example in intent["examples"]:
+            if example["text"] not in held_out_texts:
+                texts.append(example["text"])
+                labels.append(intent["intent"])
+    classifier = IntentClassifier().fit_texts(texts, labels)
+    return ClassifierUnderstanding(skill, classifier), held_out
+
+
+def replay(
+    skill: dict,
+    questions: pd.DataFrame,
+    processes: int = None,
+    chunk_size: int = 64,
+    held_out: bool = False,
+) -> Tuple[pd.DataFrame, dict]:
+    """
+    Replays the questions on the skill, returning the turns and a summary. With
+    held_out, only the turns held out of the classifier by hold_out are replayed.
+    """
+    turns = get_turns(questions)
+    understand = None
+    if held_out:
+        understand, turns = hold_out(skill, turns)
+    chunks = [turns[i : i + chunk_size] for i in range(0, len(turns), chunk_size)]
+    processes = processes or min(os.cpu_count() or 1, len(chunks)) or 1
+    start = time.perf_counter()
+    if processes == 1:
+        _start_worker(skill, understand)
+        results = [_replay_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(
+            processes, initializer=_start_worker, initargs=(skill, understand)
+        ) as pool:
+            results = list(pool.map(_replay_chunk, chunks))
+    seconds = time.perf_counter() - start
+
+    df = pd.DataFrame([turn for chunk in results for turn in chunk])
+    rates = df.outcome.value_counts(normalize=True)
+    summary = {
+        "understanding": "held-out classifier" if held_out else "exact",
+        "turns": len(df),
+        **{f"{outcome}_rate": round(rates.get(outcome, 0.0), 4) for outcome in OUTCOMES},
+        "processes": processes,
+        "seconds": round(seconds, 3),
+        "turns_per_second": round(len(df) / seconds, 1),
+    }
+    return df, summary
+
+
+def get_rates(turns: pd.DataFrame) -> pd.DataFrame:
+    """Returns the rate of each outcome by intent."""
+    rates = pd.crosstab(turns.intent, turns.outcome, normalize="index")
+    rates = rates.reindex(columns=OUTCOMES, fill_value=0.0).round(4)
+    rates.columns = [f"{outcome}_rate" for outcome in OUTCOMES]
+    rates.insert(0, "turns", turns.intent.value_counts())
+    return rates.sort_index()
+
+
+def save_report(filepath: str, turns: pd.DataFrame, summary: dict) -> dict:
+    """Writes the turns to <filepath>.replay.csv and the rates to <filepath>.replay.json."""
+    path = Path(filepath)
+    turns.to_csv(path.with_suffix(".replay.csv"), index=False)
+    report = {"summary": summary, "intents": get_rates(turns).to_dict(orient="index")}
+    with open(path.with_suffix(".replay.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def run(
+    skill: dict,
+    questions: pd.DataFrame,
+    baseline: dict = None,
+    filepath: str = None,
+    held_out: bool = False,
+) -> List[TestFailure]:
+    """
+    Replays the questions, prints the summary and returns a failure if any intent's
+    hit rate is lower than in the baseline report, which should have been made with
+    the same understanding. The report is saved if filepath is given.
+    """
+    print("Replaying questions...")
+    turns, summary = replay(skill, questions, held_out=held_out)
+    print(", ".join(f"{key}: {value}" for key, value in summary.items()))
+    report = (
+        save_report(filepath, turns, summary)
+        if filepath
+        else {"summary": summary, "intents": get_rates(turns).to_dict(orient="index")}
+    )
+
+    errors = []
+    if baseline:
+        worse = [
+            intent
+            for intent, rates in report["intents"].items()
+            if rates["hit_rate"] < baseline["intents"].get(intent, {}).get("hit_rate", 0)
+        ]
+        if worse:
+            errors.append(
+                TestFailure("replay", "There are intents answered less often", worse)
+            )
+    if errors:
+        print("Replay failed:", *errors, sep="\n\t- ")
+    return errors
+
+
+if __name__ == "__main__":
+    from src.io.file_operations import load_questions, load_skill
+
+    arguments = [a for a in sys.argv[1:] if not a.startswith("--")]
+    baseline = None
+    if len(arguments) > 2:
+        with open(arguments[2], encoding="utf-8") as f:
+            baseline = json.load(f)
+    failures = run(
+        load_skill(arguments[0]),
+        load_questions(arguments[1]),
+        baseline,
+        arguments[0],
+        "--held-out" in sys.argv,
+    )
+    sys.exit(1 if failures else 0)
@@ -3,48 +3,265 @@
 # @Time:   22/11/2021
 # @Author: Gabriel O.
 
+import logging
+import sys
+from dataclasses import dataclass, field
 from typing import List
 
 import pandas as pd
 
+from src.dialog_nodes.node_index import build_children_index
 
-def run(df: pd.DataFrame):
-    dup = df[df.dialog_node.duplicated()]
-    empty = df[df.dialog_node.isna()]
-    is_self_parent = df[df.dialog_node == df.parent]
-    is_self_sibling = df[df.dialog_node == df.previous_sibling]
+logger = logging.getLogger(__name__)
 
-    errors = []
-    print("Running tests...")
-    if dup.shape[0] > 0:
-        errors.append("There are nodes with duplicated dialog_node")
-    if empty.shape[0] > 0:
-        errors.append("There are nodes without dialog_node")
-    if is_self_parent.shape[0] > 0:
-        errors.append("There are nodes which are their own parent")
-    if is_self_sibling.shape[0] > 0:
-        errors.append("There are nodes which are their own previous_sibling")
 
+@dataclass
+class TestFailure:
+    """A failed test and the dialog nodes which made it fail."""
+
+    test: str
+    message: str
+    dialog_nodes: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        if not self.dialog_nodes:
+            return self.message
+        return f"{self.message}: {', '.join(map(str, self.dialog_nodes))}"
+
+
+def run(df: pd.DataFrame) -> List[TestFailure]:
+    """Runs every test on the dialog nodes, logs and returns the failures."""
+    errors = []
+    logger.info("Running tests...")
+    errors = test_ids(df, errors)
+    errors = test_self_references(df, errors)
     errors = test_collisions(df, errors)
+    errors = test_sibling_chains(df, errors)
+    errors = test_dangling_references(df, errors)
+    errors = test_unreachable(df, errors)
+    log_results(logger, "Tests", errors)
+    return errors
+
 
+def log_results(log: logging.Logger, tests: str, errors: List[TestFailure]):
+    """Logs whether the tests passed, with the failures if they didn't."""
     if errors:
-        errors.insert(0, "")
-        print("Tests failed:", "\n\t- ".join(errors))
+        log.warning(
+            "%s failed:%s",
+            tests,
+            "".join(f"\n\t- {error}" for error in errors),
+            extra={"fields": {"failed": [error.test for error in errors]}},
+        )
     else:
-        print("Tests passed!")
+        log.info("%s passed!", tests)
+
+
+def fail(
+    errors: List[TestFailure], test: str, message: str, nodes: pd.Series
+) -> List[TestFailure]:
+    """Adds a failure to errors if there are any nodes."""
+    if nodes.shape[0] != 0:
+        errors.append(TestFailure(test, message, nodes.to_list()))
+    return errors
 
 
-def test_collisions(df: pd.DataFrame, errors: List[str]) -> List[str]:
+def test_ids(df: pd.DataFrame, errors: List[TestFailure]) -> List[TestFailure]:
+    counts = df.dialog_node.value_counts()
+    fail(
+        errors,
+        "duplicated_ids",
+        "There are nodes with duplicated dialog_node",
+        counts.index[counts > 1].to_series(),
+    )
+    if df.dialog_node.isna().any():
+        errors.append(TestFailure("empty_ids", "There are nodes without dialog_node"))
+    return errors
+
+
+def test_self_references(
+    df: pd.DataFrame, errors: List[TestFailure]
+) -> List[TestFailure]:
+    fail(
+        errors,
+        "self_parent",
+        "There are nodes which are their own parent",
+        df.dialog_node[df.dialog_node == df.parent],
+    )
+    fail(
+        errors,
+        "self_sibling",
+        "There are nodes which are their own previous_sibling",
+        df.dialog_node[df.dialog_node == df.previous_sibling],
+    )
+    return errors
+
+
+def test_collisions(df: pd.DataFrame, errors: List[TestFailure]) -> List[TestFailure]:
     """
     Looks for collisions in nodes, which is when a dialog_node is the previous_sibling of
     more than one node.
     """
-    df["prev_sib_count"] = df.dialog_node.apply(
-        lambda x: df.previous_sibling.str.contains(x).sum()
+    counts = df.previous_sibling.value_counts()
+    return fail(
+        errors,
+        "collisions",
+        "There are collisions in nodes",
+        counts.index[counts > 1].to_series(),
+    )
+
+
+def test_sibling_chains(
+    df: pd.DataFrame, errors: List[TestFailure]
+) -> List[TestFailure]:
+    """
+    Checks that the nodes under each parent (and at the root level) form a single chain:
+    there is only one first child and every previous_sibling has the same parent as the
+    node pointing to it.
+    """
+    parents = df.parent.fillna("")
+    first_children = parents[df.previous_sibling.isna()].value_counts()
+    fail(
+        errors,
+        "many_first_children",
+        "There are parents with more than one first child",
+        first_children.index[first_children > 1].to_series(),
+    )
+
+    sibling_parents = df.previous_sibling.map(
+        df.drop_duplicates("dialog_node").set_index("dialog_node").parent.fillna("")
+    )
+    has_sibling = df.previous_sibling.notna()
+    return fail(
+        errors,
+        "broken_sibling_chains",
+        "There are nodes whose previous_sibling has another parent",
+        df.dialog_node[has_sibling & (sibling_parents != parents)],
     )
-    collisions = df[df.prev_sib_count > 1]
-    if collisions.shape[0] != 0:
+
+
+def test_dangling_references(
+    df: pd.DataFrame, errors: List[TestFailure]
+) -> List[TestFailure]:
+    """Looks for parents, previous_siblings and jump_to targets which don't exist."""
+    jump_to = get_jump_targets(df)
+    for test, column, references in [
+        ("dangling_parents", "parent", df.parent),
+        ("dangling_previous_siblings", "previous_sibling", df.previous_sibling),
+        ("dangling_jumps", "jump_to", jump_to),
+    ]:
+        dangling = references.notna() & ~references.isin(df.dialog_node)
+        fail(
+            errors,
+            test,
+            f"There are nodes with a {column} which doesn't exist",
+            df.dialog_node[dangling],
+        )
+    return errors
+
+
+def get_jump_targets(df: pd.DataFrame) -> pd.Series:
+    """Returns the node each node jumps to, or None for nodes which don't jump."""
+    if "next_step" not in df:
+        return pd.Series(None, index=df.index, dtype=object)
+    return df.next_step.map(
+        lambda x: x.get("dialog_node")
+        if isinstance(x, dict) and x.get("behavior") == "jump_to"
+        else None
+    )
+
+
+def test_unreachable(df: pd.DataFrame, errors: List[TestFailure]) -> List[TestFailure]:
+    """
+    Looks for nodes which can't be reached by going down from the root level, such as
+    nodes whose parent doesn't exist or nodes which are their own ancestors.
+    """
+    dialog_nodes = df.dialog_node.to_list()
+    children = build_children_index(df.parent.to_list())
+    reached = df.parent.isna().to_numpy().copy()
+    stack = [dialog_nodes[i] for i in reached.nonzero()[0]]
+    while stack:
+        for i in children.get(stack.pop(), ()):
+            if not reached[i]:
+                reached[i] = True
+                stack.append(dialog_nodes[i])
+    return fail(
+        errors,
+        "unreachable",
+        "There are nodes which can't be reached from the root",
+        df.dialog_node[~reached],
+    )
+
+
+# nodes to check the intent limit on: #ab must not be dropped with #a, and the nodes
+# which jump to #a, along with their children, must be
+INTENT_LIMIT_NODES = [
+    {"dialog_node": "node_1_1", "conditions": "welcome", "title": "Olá"},
+    {"dialog_node": "respostas", "conditions": "true", "title": "Respostas"},
+    {"dialog_node": "ans_a", "parent": "respostas", "conditions": "#a"},
+    {"dialog_node": "src_a", "parent": "ans_a", "conditions": "true"},
+    {"dialog_node": "ans_ab", "parent": "respostas", "conditions": "#ab"},
+    {
+        "dialog_node": "jump_a",
+        "parent": "respostas",
+        "conditions": "@substantivo:(a)",
+        "next_step": {"behavior": "jump_to", "selector": "body", "dialog_node": "ans_a"},
+    },
+    {"dialog_node": "after_jump_a", "parent": "jump_a", "conditions": "true"},
+    {"dialog_node": "ans_b", "parent": "respostas", "conditions": "#b"},
+    {"dialog_node": "node_2_2", "conditions": "anything_else", "title": "Não entendi"},
+]
+
+
+def test_intent_limit(errors: List[TestFailure]) -> List[TestFailure]:
+    """
+    Checks that limiting the intents drops the nodes of exactly the intents over the
+    limit and the chains which depend on them, and that a dry run drops nothing.
+    """
+    from src.dialog_nodes.NodeOrganizer import NodeOrganizer
+
+    organizer = NodeOrganizer(INTENT_LIMIT_NODES)
+    report = organizer.drop_node_chains(["a"], dry_run=True)
+    expected = ["ans_a", "src_a", "jump_a", "after_jump_a"]
+    if report.nodes != {"a": expected}:
+        errors.append(
+            TestFailure(
+                "intent_chains",
+                f"Dropping #a should drop {expected}, not",
+                report.dialog_nodes,
+            )
+        )
+
+    before = organizer.df
+    limit = len(organizer.get_intents()) - 1
+    report = organizer.limit_intents(limit, dry_run=True)
+    if report.intents != ["b"]:
         errors.append(
-            f"There are collisions in nodes: {', '.join(collisions.dialog_node.to_list())}"
+            TestFailure("intent_limit", "The intent over the limit should be #b, not", report.intents)
         )
+    if not organizer.df.equals(before):
+        errors.append(TestFailure("intent_limit_dry_run", "A dry run changed the nodes"))
+
+    organizer.limit_intents(limit)
+    kept = organizer.df.dialog_node.to_list()
+    fail(
+        errors,
+        "intent_limit_drop",
+        "Limiting the intents kept the nodes of #b or dropped others",
+        pd.Series(sorted(set(kept) ^ (set(before.dialog_node) - {"ans_b"})), dtype=object),
+    )
     return errors
+
+
+if __name__ == "__main__":
+    # python -m tests.unit [skill.json]: checks the intent limit, then the skill
+    from src.utils.logs import setup_logging
+
+    setup_logging()
+    failures = test_intent_limit([])
+    log_results(logger, "Intent limit tests", failures)
+    if len(sys.argv) > 1:
+        from src.io.file_operations import load_skill
+
+        skill = load_skill(sys.argv[1])
+        failures += run(pd.DataFrame(skill["dialog_nodes"]))
+    sys.exit(1 if failures else 0)
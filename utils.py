@@ -4,6 +4,8 @@
 # @Author: Gabriel O.
 from dataclasses import dataclass, field
 
+from src.utils.accents import fold_accents
+
 
 def getInput(message, dic: dict = None):
     """
@@ -36,19 +38,7 @@ def sanitize(string) -> str:
     :param string: string a ser sanitizada
     :return out: string sem acentos
     """
-    out = string.lower().strip()
-    accented = {
-        "a": ["ã", "á", "à", "â"],
-        "e": ["é", "è", "ê"],
-        "i": ["í", "ì", "î"],
-        "o": ["õ", "ó", "ò", "ô"],
-        "u": ["ú", "ù", "û"],
-        "c": ["ç"],
-    }
-    for letra, acentuadas in accented.items():
-        for acc in acentuadas:
-            out = out.replace(acc, letra)
-    return out
+    return fold_accents(string.lower().strip())
 
 
 @dataclass